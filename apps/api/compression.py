@@ -0,0 +1,204 @@
+'''Compresión de respuestas de la API (gzip / br / zstd)'''
+# apps/api/compression.py
+import zlib
+from typing import List, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional
+    zstandard = None
+
+# Tipos que vale la pena comprimir; PDFs, imágenes, zip, parquet... ya van comprimidos
+_COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "application/ndjson",
+                 "application/javascript", "application/xml", "image/svg+xml")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+def available_encodings() -> List[str]:
+    """Codificaciones soportadas en este entorno (gzip siempre; br/zstd si están instalados)."""
+    return [e for e, mod in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if mod is not None]
+
+
+def _compressor(encoding: str, levels: dict):
+    cls = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}[encoding]
+    return cls(levels[encoding])
+
+
+def negotiate(accept_encoding: str, preferred: Sequence[str]) -> Optional[str]:
+    """
+    Elige la codificación según Accept-Encoding (respetando q=0) y el orden
+    de preferencia del servidor. None = enviar sin comprimir.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip()] = q
+    for enc in preferred:
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > 0:
+            return enc
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime respuestas JSON/NDJSON/CSV/texto.
+    - Respuestas completas: se comprimen solo si superan `minimum_size` bytes.
+    - Streaming (more_body): se acumula hasta `minimum_size`; si el cuerpo
+      termina antes sale tal cual, si no se comprime por tramos con flush
+      por chunk para que el cliente reciba los datos a medida que llegan.
+    No toca respuestas que ya traen Content-Encoding, 204/206/304 ni tipos
+    binarios. Un ETag fuerte pasa a débil: el cuerpo ya no es byte a byte el mismo.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = ("zstd", "br", "gzip"),
+                 gzip_level: int = 6, brotli_level: int = 4, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        supported = available_encodings()
+        self.encodings = [e for e in encodings if e in supported]
+        self.levels = {"gzip": gzip_level, "br": brotli_level, "zstd": zstd_level}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for k, v in scope["headers"]:
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.encodings) if accept else None
+        await _Responder(self, encoding)(scope, receive, send, self.app)
+
+
+class _Responder:
+    def __init__(self, mw: CompressionMiddleware, encoding: Optional[str]):
+        self.mw = mw
+        self.encoding = encoding
+        self.start = None       # mensaje http.response.start retenido
+        self.buffer = b""
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send, app):
+        self.send = send
+        await app(scope, receive, self.send_wrapper)
+
+    def _eligible(self, headers) -> bool:
+        if self.start["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        ctype = headers.get("content-type", "").lower()
+        return ctype.startswith(_COMPRESSIBLE)
+
+    async def _start_compressed(self):
+        headers = [(k, v) for k, v in self.start["headers"]
+                   if k.lower() not in (b"content-length", b"content-encoding")]
+        out = []
+        for k, v in headers:
+            if k.lower() == b"etag" and not v.startswith(b"W/"):
+                v = b"W/" + v
+            out.append((k, v))
+        out.append((b"content-encoding", self.encoding.encode()))
+        self.start["headers"] = out
+        self.compressor = _compressor(self.encoding, self.mw.levels)
+        await self.send(self.start)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start = dict(message)
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in message["headers"]}
+            # Vary siempre, aunque esta vez no se comprima: la representación depende del header
+            if headers.get("content-type", "").lower().startswith(_COMPRESSIBLE):
+                vary = headers.get("vary", "")
+                if "accept-encoding" not in vary.lower():
+                    vary = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+                    self.start["headers"] = [(k, v) for k, v in message["headers"] if k.lower() != b"vary"]
+                    self.start["headers"].append((b"vary", vary.encode("latin-1")))
+            if self.encoding is None or not self._eligible(headers):
+                self.passthrough = True
+                await self.send(self.start)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.buffer += body
+            if len(self.buffer) < self.mw.minimum_size:
+                if more:
+                    return
+                # Cuerpo chico: va sin comprimir
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": self.buffer})
+                return
+            await self._start_compressed()
+            body, self.buffer = self.buffer, b""
+
+        c = self.compressor
+        if more:
+            data = c.compress(body) + c.flush()
+            if data:
+                await self.send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": c.compress(body) + c.finish()})
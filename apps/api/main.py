@@ -1,9 +1,20 @@
 # apps/api/main.py
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.responses import ORJSONResponse, FileResponse, HTMLResponse
-from typing import List, Optional
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, FileResponse, HTMLResponse, StreamingResponse
+from typing import List, Optional, Iterator, Iterable, Any, Callable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from decimal import Decimal
+from email.utils import formatdate, parsedate_to_datetime
+from itertools import chain, islice
+import csv
+import hashlib
+import io
+import orjson
 import sys
 import os
 
@@ -18,7 +29,10 @@ from domain.services import (
     usuarios_service,
     auth_service,
     documentos_service,
-    perfiles_service
+    perfiles_service,
+    cambios_service,
+    relaciones_service,
+    conciliacion_service
 )
 from domain.schemas.personas import PersonaListItem
 from domain.schemas.proyectos import ProyectoListItem
@@ -27,19 +41,37 @@ from domain.schemas.asignaciones import AsignacionListItem
 from domain.schemas.usuarios import UsuarioListItem
 from domain.schemas.documentos import DocumentoListItem
 from domain.schemas.perfiles import PerfilListItem
+from apps.api.compression import CompressionMiddleware
+from infra.db.connection import pool_stats
+from infra.db.async_connection import async_pool_stats, close_async_pool
+from infra.db.paging import MAX_PAGE_SIZE
+from infra.repositories import eventlog_repo
+from shared.auth.auth import API_TOKEN_AUDIENCE, create_token, decode_token
+from shared.config import settings
 
 tags_metadata = [
     {"name": "Anexos", "description": "Consulta de anexos/documentos asociados a proyectos"},
     {"name": "Asignaciones", "description": "Consulta de asignaciones persona-proyecto"},
+    {"name": "Auth", "description": "Obtención de tokens Bearer a partir de credenciales Basic"},
+    {"name": "Cambios", "description": "Feed incremental de cambios (event_log) para sincronización"},
     {"name": "Documentos", "description": "Ver y descargar archivos de documentos"},
     {"name": "Health", "description": "Estado de la API"},
     {"name": "Perfiles", "description": "Consulta de perfiles y tarifas"},
     {"name": "Personas", "description": "Consulta de personas"},
     {"name": "Proyectos", "description": "Consulta de proyectos"},
+    {"name": "SAP", "description": "Conciliación de horas reportadas en SAP contra lo planificado"},
     {"name": "Sprints", "description": "Consulta de sprints"},
     {"name": "Usuarios", "description": "Consulta de usuarios"},
 ]
 
+# Los endpoints de lectura son async y consultan con el pool aiomysql
+# (infra/db/async_connection); el threadpool queda para streaming, auth Basic
+# y descargas de archivos.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_async_pool()
+
 app = FastAPI(
     title="Project Ops API - Read Only",
     description="API REST de solo lectura para consulta de proyectos, sprints, personas y asignaciones. No permite crear, editar ni eliminar datos.",
@@ -47,58 +79,310 @@ app = FastAPI(
     default_response_class=ORJSONResponse,
     openapi_tags=tags_metadata,
     root_path=os.getenv("API_ROOT_PATH", ""),
+    lifespan=lifespan,
 )
 
 # Configurar CORS para permitir acceso desde cualquier origen
-# Solo permite métodos GET (read-only)
+# Solo permite métodos GET (read-only); POST únicamente para /api/auth/token
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["GET"],  # Solo lectura
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After"],
 )
 
-security = HTTPBasic()
+# Compresión en la app (nginx no comprime /colombia-api ni /peru-api)
+if settings.API_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.API_COMPRESSION_MIN_SIZE,
+        encodings=[e.strip() for e in settings.API_COMPRESSION_ENCODINGS.split(",") if e.strip()],
+        gzip_level=settings.API_COMPRESSION_GZIP_LEVEL,
+        brotli_level=settings.API_COMPRESSION_BROTLI_LEVEL,
+        zstd_level=settings.API_COMPRESSION_ZSTD_LEVEL,
+    )
+
+security = HTTPBasic(auto_error=False)
+bearer = HTTPBearer(auto_error=False)
+
+def _unauthorized(detail: str = "Credenciales inválidas"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Basic"},
+    )
 
-# Autenticación básica
-def get_current_user(credentials: HTTPBasicCredentials = Depends(security)):
-    user = auth_service.verify_credentials(credentials.username, credentials.password)
+def _basic_user(credentials: Optional[HTTPBasicCredentials] = Depends(security)):
+    if not credentials:
+        raise _unauthorized("Se requieren credenciales")
+    user = auth_service.verify_credentials_cached(credentials.username, credentials.password)
     if not user:
+        raise _unauthorized()
+    return user
+
+# Autenticación: Bearer (JWT de /api/auth/token) o Basic
+async def get_current_user(
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+    credentials: Optional[HTTPBasicCredentials] = Depends(security),
+):
+    if token:
+        # Solo tokens emitidos por /api/auth/token (aud), de usuarios todavía activos
+        payload = decode_token(token.credentials, audience=API_TOKEN_AUDIENCE)
+        user = await run_in_threadpool(auth_service.active_user_cached, int(payload["sub"])) if payload else None
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token inválido o expirado",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return {
+            "id": user["id"],
+            "email": user["email"],
+            "rol_app": user["rol_app"],
+            "proyectos": payload.get("proyectos", []),
+        }
+    # Basic: bcrypt y lookup del usuario son bloqueantes, van al threadpool
+    return await run_in_threadpool(_basic_user, credentials)
+
+# ==================== GET CONDICIONAL (ETag / Last-Modified) ====================
+# Validadores baratos: high-water mark de event_log de las entidades que
+# componen la respuesta (todo write registra un evento). Si el cliente manda
+# If-None-Match / If-Modified-Since y nada cambió, se responde 304 sin tocar
+# las tablas ni serializar.
+_VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+
+class _NotModified(Exception):
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+@app.exception_handler(_NotModified)
+async def _not_modified_handler(request: Request, exc: _NotModified):
+    return Response(status_code=304, headers=exc.headers)
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        # Comparación débil: W/"x" equivale a "x"
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+def _conditional(*entidades: str, extra: Optional[Callable[[], Any]] = None):
+    """
+    Dependencia para endpoints de lectura: calcula ETag/Last-Modified a partir
+    de las versiones de `entidades` (más ruta, query y Accept) y corta con 304
+    si el cliente ya tiene esa versión. Declararla después de get_current_user.
+    Con include= suma las entidades de las relaciones embebidas.
+    extra: función (sync) que devuelve otros valores de los que depende la
+    respuesta y no pasan por event_log (p. ej. un parámetro). Entran en el ETag;
+    como no tienen fecha, no se envía Last-Modified ni se acepta If-Modified-Since.
+    """
+    async def dep(request: Request, response: Response):
+        todas = list(entidades)
+        for rel in (request.query_params.get("include") or "").split(","):
+            todas += [e for e in relaciones_service.ENTIDADES_RELACION.get(rel.strip(), ()) if e not in todas]
+        versiones, ts = await eventlog_repo.entity_versions_async(todas)
+        partes = [
+            request.url.path, request.url.query, request.headers.get("accept", ""),
+            ",".join(f"{e}:{versiones.get(e, 0)}" for e in todas),
+        ]
+        if extra is not None:
+            partes.append(repr(await run_in_threadpool(extra)))
+            ts = None
+        base = "|".join(partes)
+        headers = {
+            "ETag": 'W/"' + hashlib.sha1(base.encode()).hexdigest() + '"',
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization, Accept",
+        }
+        if ts is not None:
+            headers["Last-Modified"] = formatdate(ts, usegmt=True)
+        if _is_not_modified(request, headers["ETag"], ts):
+            raise _NotModified(headers)
+        response.headers.update(headers)
+    return Depends(dep)
+
+def _validators(response: Response) -> dict:
+    """Headers de validación ya puestos por _conditional, para respuestas construidas a mano."""
+    return {k: v for k, v in response.headers.items() if k in _VALIDATOR_HEADERS}
+
+# ==================== STREAMING (NDJSON / CSV) ====================
+# Para cargas masivas (BI): las filas salen de un cursor de servidor y se
+# serializan por lotes, sin armar la lista completa en memoria.
+_STREAM_MEDIA = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+_STREAM_BATCH = 500
+
+def _stream_format(request: Request, formato: Optional[str]) -> Optional[str]:
+    """Formato pedido por ?format= o por Accept; None = JSON normal."""
+    if formato:
+        return None if formato == "json" else formato
+    accept = request.headers.get("accept", "")
+    if "application/x-ndjson" in accept or "application/ndjson" in accept:
+        return "ndjson"
+    if "text/csv" in accept:
+        return "csv"
+    return None
+
+def _json_default(v: Any):
+    if isinstance(v, Decimal):
+        return float(v)
+    raise TypeError
+
+def _ndjson_chunks(rows: Iterator[dict]) -> Iterator[bytes]:
+    while True:
+        batch = list(islice(rows, _STREAM_BATCH))
+        if not batch:
+            return
+        yield b"".join(orjson.dumps(r, default=_json_default) + b"\n" for r in batch)
+
+def _csv_chunks(rows: Iterator[dict]) -> Iterator[bytes]:
+    first = next(rows, None)
+    if first is None:
+        return
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(first.keys()), extrasaction="ignore")
+    writer.writeheader()
+    writer.writerow(first)
+    while True:
+        batch = list(islice(rows, _STREAM_BATCH))
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        if not batch:
+            return
+
+def _streaming_response(items: Iterable[Any], fmt: str, filename: str,
+                        headers: Optional[dict] = None) -> StreamingResponse:
+    it = iter(items)
+    # Leer la primera fila antes de responder: errores de conexión/consulta
+    # salen como 500 y no como una respuesta 200 truncada
+    first = next(it, None)
+    rows = (i.dict() for i in (chain([first], it) if first is not None else it))
+    chunks = _ndjson_chunks(rows) if fmt == "ndjson" else _csv_chunks(rows)
+    headers = {**(headers or {}), "Content-Disposition": f'inline; filename="{filename}.{fmt}"'}
+    return StreamingResponse(chunks, media_type=_STREAM_MEDIA[fmt], headers=headers)
+
+_FORMAT_QUERY = Query(None, alias="format", pattern="^(json|ndjson|csv)$",
+                      description="json (defecto), ndjson o csv en streaming. También por header Accept.")
+
+# ==================== PAGINACIÓN Y PROYECCIÓN ====================
+# Keyset por id: ?limit=N devuelve los N primeros por id ascendente y, si la
+# página vino llena, el header X-Next-After con el id a pasar como ?after=.
+# ?fields=a,b,c devuelve solo esas columnas (la proyección se hace en SQL).
+_LIMIT_QUERY = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página (keyset por id)")
+_AFTER_QUERY = Query(None, ge=0, description="Devolver solo ids mayores a este (valor de X-Next-After)")
+_FIELDS_QUERY = Query(None, description="Columnas a devolver, separadas por coma (id siempre incluido)")
+_IDS_QUERY = Query(None, description=f"Lookup en lote: ids separados por coma (máx {MAX_PAGE_SIZE}), una sola consulta")
+
+def _parse_ids(ids: Optional[str]) -> Optional[List[int]]:
+    if ids is None:
+        return None
+    try:
+        lista = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por coma")
+    if len(lista) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_PAGE_SIZE} ids por consulta")
+    return lista
+
+def _parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    if not fields:
+        return None
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in model.model_fields]
+    if unknown:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Credenciales inválidas",
-            headers={"WWW-Authenticate": "Basic"},
+            status_code=400,
+            detail=f"Campos no válidos: {', '.join(unknown)}. Disponibles: {', '.join(model.model_fields)}",
         )
-    return user
+    return wanted or None
+
+def _page(response: Response, rows: list, limit: Optional[int], projected: bool):
+    """Agrega X-Next-After si la página vino llena; las proyecciones salen sin response_model."""
+    headers = {}
+    if limit is not None and rows and len(rows) >= limit:
+        last = rows[-1]
+        headers["X-Next-After"] = str(last["id"] if isinstance(last, dict) else last.id)
+    if projected:
+        return ORJSONResponse(jsonable_encoder(rows), headers={**_validators(response), **headers})
+    response.headers.update(headers)
+    return rows
+
+def _no_stream_paging(fields, after, limit, ids=None, include=None):
+    if fields or after is not None or limit is not None or ids is not None or include:
+        raise HTTPException(status_code=400, detail="fields/after/limit/ids/include no aplican a format=ndjson|csv")
+
+# ==================== RELACIONES EMBEBIDAS (include=) ====================
+# ?include=sprints,asignaciones,anexos anida las filas relacionadas en cada
+# proyecto (asignaciones en cada persona): una consulta por relación para toda
+# la página, en vez de una llamada del cliente por fila y relación.
+def _include_query(entidad: str):
+    return Query(None, description="Relaciones a anidar, separadas por coma: "
+                                   + ", ".join(relaciones_service.RELACIONES[entidad]))
+
+def _parse_include(include: Optional[str], entidad: str) -> List[str]:
+    if not include:
+        return []
+    wanted = list(dict.fromkeys(i.strip() for i in include.split(",") if i.strip()))
+    disponibles = relaciones_service.RELACIONES[entidad]
+    unknown = [i for i in wanted if i not in disponibles]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Relaciones no válidas: {', '.join(unknown)}. Disponibles: {', '.join(disponibles)}",
+        )
+    return wanted
 
 # ==================== ANEXOS (DOCUMENTOS) ====================
 @app.get("/api/anexos", response_model=List[DocumentoListItem], tags=["Anexos"])
-def listar_anexos(
+async def listar_anexos(
+    response: Response,
     proyecto_id: Optional[int] = None,
     search: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("documentos", "proyectos", "personas")
 ):
     """
     Obtener lista de anexos/documentos.
     - proyecto_id: Filtrar por proyecto específico
     - search: Buscar por nombre o descripción
     
+    - limit/after: paginación keyset por id; fields: columnas a devolver
+    
     Retorna información completa de cada anexo incluyendo URLs para ver/descargar.
     """
-    items = documentos_service.listar(proyecto_id=proyecto_id, search=search)
-    return items
+    campos = _parse_fields(fields, DocumentoListItem)
+    if campos:
+        rows = await documentos_service.listar_campos_async(campos, proyecto_id=proyecto_id, search=search,
+                                                            after=after, limit=limit)
+    else:
+        rows = await documentos_service.listar_async(proyecto_id=proyecto_id, search=search, after=after, limit=limit)
+    return _page(response, rows, limit, bool(campos))
 
 @app.get("/api/anexos/proyecto/{proyecto_id}", tags=["Anexos"])
-def listar_anexos_por_proyecto(
+async def listar_anexos_por_proyecto(
     proyecto_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("documentos", "proyectos", "personas")
 ):
     """
     Obtener todos los anexos de un proyecto específico con URLs de acceso.
     Retorna la información de la tabla y links para ver cada documento.
     """
-    items = documentos_service.listar(proyecto_id=proyecto_id)
+    items = await documentos_service.listar_async(proyecto_id=proyecto_id)
     
     # Construir respuesta con URLs de acceso
     result = []
@@ -115,42 +399,110 @@ def listar_anexos_por_proyecto(
     }
 
 @app.get("/api/anexos/{anexo_id}", response_model=DocumentoListItem, tags=["Anexos"])
-def obtener_anexo(
+async def obtener_anexo(
     anexo_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("documentos", "proyectos", "personas")
 ):
     """Obtener un anexo por ID"""
-    doc = documentos_service.obtener(anexo_id)
+    doc = await documentos_service.obtener_async(anexo_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Anexo no encontrado")
     return doc
 
+# ==================== AUTH ====================
+@app.post("/api/auth/token", tags=["Auth"])
+def obtener_token(user: dict = Depends(_basic_user)):
+    """
+    Intercambia credenciales Basic por un token Bearer (JWT HS256) con expiración.
+    Usar luego `Authorization: Bearer <access_token>` en el resto de endpoints.
+    """
+    expires = timedelta(minutes=settings.API_TOKEN_TTL_MINUTES)
+    token = create_token({"id": user["id"], "email": user["email"], "rol_app": user["rol_app"]},
+                         expires_in=expires, audience=API_TOKEN_AUDIENCE)
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": int(expires.total_seconds()),
+    }
+
 # ==================== ASIGNACIONES ====================
 @app.get("/api/asignaciones", response_model=List[AsignacionListItem], tags=["Asignaciones"])
-def listar_asignaciones(
+async def listar_asignaciones(
+    request: Request,
+    response: Response,
     persona_id: Optional[int] = None,
     proyecto_id: Optional[int] = None,
     solo_activas: Optional[bool] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    ids: Optional[str] = _IDS_QUERY,
+    formato: Optional[str] = _FORMAT_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("asignaciones", "personas", "proyectos", "sprints", "perfiles")
 ):
-    """Obtener lista de asignaciones"""
-    return asignaciones_service.listar(persona_id, proyecto_id, solo_activas)
+    """Obtener lista de asignaciones (format=ndjson|csv para streaming)"""
+    fmt = _stream_format(request, formato)
+    if fmt:
+        _no_stream_paging(fields, after, limit, ids)
+        # La primera fila (consulta) se lee fuera del event loop
+        return await run_in_threadpool(
+            _streaming_response, asignaciones_service.iterar(persona_id, proyecto_id, solo_activas),
+            fmt, "asignaciones", _validators(response))
+    id_list = _parse_ids(ids)
+    campos = _parse_fields(fields, AsignacionListItem)
+    if campos:
+        rows = await asignaciones_service.listar_campos_async(campos, persona_id, proyecto_id, solo_activas,
+                                                              after=after, limit=limit, ids=id_list)
+    else:
+        rows = await asignaciones_service.listar_async(persona_id, proyecto_id, solo_activas, after=after, limit=limit, ids=id_list)
+    return _page(response, rows, limit, bool(campos))
 
 @app.get("/api/asignaciones/{asignacion_id}", response_model=AsignacionListItem, tags=["Asignaciones"])
-def obtener_asignacion(
+async def obtener_asignacion(
     asignacion_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("asignaciones", "personas", "proyectos", "sprints", "perfiles")
 ):
     """Obtener una asignación por ID"""
-    asignaciones = asignaciones_service.listar()
-    asignacion = next((a for a in asignaciones if a.id == asignacion_id), None)
+    asignacion = await asignaciones_service.obtener_async(asignacion_id)
     if not asignacion:
         raise HTTPException(status_code=404, detail="Asignación no encontrada")
     return asignacion
 
+# ==================== CAMBIOS ====================
+@app.get("/api/changes", tags=["Cambios"])
+def listar_cambios(
+    since: int = Query(0, ge=0, description="Último evento ya procesado (valor 'hasta' de la llamada anterior)"),
+    entidades: Optional[str] = Query(None, description="Entidades separadas por coma (defecto: todas)"),
+    limit: int = Query(1000, ge=1, le=cambios_service.MAX_EVENTOS, description="Máximo de eventos a recorrer"),
+    detalle: bool = Query(False, description="Devolver los objetos actuales en vez de solo ids"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Cambios desde el evento `since`, por entidad: ids actualizados y eliminados
+    (u objetos completos con detalle=true), más el high-water mark `hasta`.
+    Sincronización incremental: guardar `hasta` y repetir con since=hasta
+    (inmediatamente mientras `hay_mas` sea true).
+    Los eventos aparecen con un retraso de CHANGES_LAG_SECONDS (defecto 30 s):
+    los ids se asignan al insertar y no al commit, así que un evento más nuevo
+    podría tener un id menor que `hasta` y el consumidor lo perdería.
+    """
+    lista = None
+    if entidades:
+        lista = [e.strip() for e in entidades.split(",") if e.strip()]
+        invalidas = [e for e in lista if e not in cambios_service.ENTIDADES]
+        if invalidas:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Entidades no válidas: {', '.join(invalidas)}. Disponibles: {', '.join(cambios_service.ENTIDADES)}",
+            )
+    return cambios_service.cambios_desde(since, lista, limit, detalle)
+
 # ==================== DOCUMENTOS ====================
 @app.get("/api/documentos/{documento_id}/download", tags=["Documentos"])
-def descargar_documento(documento_id: int):
+def descargar_documento(documento_id: int, request: Request):
     """Descargar un documento por ID"""
     doc = documentos_service.obtener(documento_id)
     if not doc:
@@ -159,10 +511,23 @@ def descargar_documento(documento_id: int):
     if not doc.ruta_archivo or not os.path.exists(doc.ruta_archivo):
         raise HTTPException(status_code=404, detail="Archivo no encontrado en el servidor")
     
+    # Validadores: archivo (mtime/tamaño) + datos de la fila que afectan la respuesta
+    st = os.stat(doc.ruta_archivo)
+    base = f"{doc.id}|{doc.nombre_archivo}|{doc.tipo_mime}|{doc.ruta_archivo}|{st.st_mtime_ns}|{st.st_size}"
+    headers = {
+        "ETag": '"' + hashlib.sha1(base.encode()).hexdigest() + '"',
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if _is_not_modified(request, headers["ETag"], st.st_mtime):
+        return Response(status_code=304, headers=headers)
+    
     return FileResponse(
         path=doc.ruta_archivo,
         filename=doc.nombre_archivo,
-        media_type=doc.tipo_mime or "application/octet-stream"
+        media_type=doc.tipo_mime or "application/octet-stream",
+        headers=headers,
+        stat_result=st,
     )
 
 @app.get("/api/documentos/{documento_id}/view", tags=["Documentos"])
@@ -285,105 +650,225 @@ def ver_documento(documento_id: int):
 @app.get("/api/health", tags=["Health"])
 def health_check():
     """Verificar estado de la API"""
-    return {"status": "ok", "service": "Project Ops API"}
+    return {"status": "ok", "service": "Project Ops API", "db_pool": pool_stats(),
+            "db_pool_async": async_pool_stats()}
 
 # ==================== PERFILES ====================
 @app.get("/api/perfiles", response_model=List[PerfilListItem], tags=["Perfiles"])
-def listar_perfiles(
+async def listar_perfiles(
+    response: Response,
     solo_activos: Optional[bool] = None,
     search: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("perfiles")
 ):
     """Obtener lista de perfiles"""
-    return perfiles_service.listar(solo_activos, search)
+    campos = _parse_fields(fields, PerfilListItem)
+    if campos:
+        rows = await perfiles_service.listar_campos_async(campos, solo_activos, search, after=after, limit=limit)
+    else:
+        rows = await perfiles_service.listar_async(solo_activos, search, after=after, limit=limit)
+    return _page(response, rows, limit, bool(campos))
 
 @app.get("/api/perfiles/{perfil_id}", response_model=PerfilListItem, tags=["Perfiles"])
-def obtener_perfil(
+async def obtener_perfil(
     perfil_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("perfiles")
 ):
     """Obtener un perfil por ID"""
-    perfil = perfiles_service.obtener(perfil_id)
+    perfil = await perfiles_service.obtener_async(perfil_id)
     if not perfil:
         raise HTTPException(status_code=404, detail="Perfil no encontrado")
     return perfil
 
 # ==================== PERSONAS ====================
 @app.get("/api/personas", response_model=List[PersonaListItem], tags=["Personas"])
-def listar_personas(
+async def listar_personas(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     activo: Optional[bool] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    ids: Optional[str] = _IDS_QUERY,
+    include: Optional[str] = _include_query("personas"),
+    formato: Optional[str] = _FORMAT_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("personas")
 ):
-    """Obtener lista de personas"""
-    return personas_service.listar(search, activo)
+    """Obtener lista de personas (format=ndjson|csv para streaming, include=asignaciones)"""
+    fmt = _stream_format(request, formato)
+    if fmt:
+        _no_stream_paging(fields, after, limit, ids, include)
+        # La primera fila (consulta) se lee fuera del event loop
+        return await run_in_threadpool(
+            _streaming_response, personas_service.iterar(solo_activas=activo, search=search),
+            fmt, "personas", _validators(response))
+    id_list = _parse_ids(ids)
+    campos = _parse_fields(fields, PersonaListItem)
+    relaciones = _parse_include(include, "personas")
+    if campos:
+        rows = await personas_service.listar_campos_async(campos, solo_activas=activo, search=search,
+                                                          after=after, limit=limit, ids=id_list)
+    else:
+        rows = await personas_service.listar_async(solo_activas=activo, search=search, after=after, limit=limit, ids=id_list)
+    if relaciones:
+        rows = await relaciones_service.incluir_async("personas", rows, relaciones)
+    return _page(response, rows, limit, bool(campos) or bool(relaciones))
 
 @app.get("/api/personas/{persona_id}", response_model=PersonaListItem, tags=["Personas"])
-def obtener_persona(
+async def obtener_persona(
     persona_id: int,
-    current_user: dict = Depends(get_current_user)
+    response: Response,
+    include: Optional[str] = _include_query("personas"),
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("personas")
 ):
     """Obtener una persona por ID"""
-    personas = personas_service.listar()
-    persona = next((p for p in personas if p.id == persona_id), None)
+    relaciones = _parse_include(include, "personas")
+    persona = await personas_service.obtener_async(persona_id)
     if not persona:
         raise HTTPException(status_code=404, detail="Persona no encontrada")
+    if relaciones:
+        [item] = await relaciones_service.incluir_async("personas", [persona], relaciones)
+        return ORJSONResponse(jsonable_encoder(item), headers=_validators(response))
     return persona
 
 # ==================== PROYECTOS ====================
 @app.get("/api/proyectos", response_model=List[ProyectoListItem], tags=["Proyectos"])
-def listar_proyectos(
+async def listar_proyectos(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     estado: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    ids: Optional[str] = _IDS_QUERY,
+    include: Optional[str] = _include_query("proyectos"),
+    formato: Optional[str] = _FORMAT_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("proyectos", "personas")
 ):
-    """Obtener lista de proyectos"""
-    return proyectos_service.listar(search, estado)
+    """Obtener lista de proyectos (format=ndjson|csv para streaming, include=sprints,asignaciones,anexos)"""
+    fmt = _stream_format(request, formato)
+    if fmt:
+        _no_stream_paging(fields, after, limit, ids, include)
+        # La primera fila (consulta) se lee fuera del event loop
+        return await run_in_threadpool(
+            _streaming_response, proyectos_service.iterar(estado=estado, search=search),
+            fmt, "proyectos", _validators(response))
+    id_list = _parse_ids(ids)
+    campos = _parse_fields(fields, ProyectoListItem)
+    relaciones = _parse_include(include, "proyectos")
+    if campos:
+        rows = await proyectos_service.listar_campos_async(campos, estado=estado, search=search,
+                                                           after=after, limit=limit, ids=id_list)
+    else:
+        rows = await proyectos_service.listar_async(estado=estado, search=search, after=after, limit=limit, ids=id_list)
+    if relaciones:
+        rows = await relaciones_service.incluir_async("proyectos", rows, relaciones)
+    return _page(response, rows, limit, bool(campos) or bool(relaciones))
 
 @app.get("/api/proyectos/{proyecto_id}", response_model=ProyectoListItem, tags=["Proyectos"])
-def obtener_proyecto(
+async def obtener_proyecto(
     proyecto_id: int,
-    current_user: dict = Depends(get_current_user)
+    response: Response,
+    include: Optional[str] = _include_query("proyectos"),
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("proyectos", "personas")
 ):
     """Obtener un proyecto por ID"""
-    proyectos = proyectos_service.listar()
-    proyecto = next((p for p in proyectos if p.id == proyecto_id), None)
+    relaciones = _parse_include(include, "proyectos")
+    proyecto = await proyectos_service.obtener_async(proyecto_id)
     if not proyecto:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    if relaciones:
+        [item] = await relaciones_service.incluir_async("proyectos", [proyecto], relaciones)
+        return ORJSONResponse(jsonable_encoder(item), headers=_validators(response))
     return proyecto
 
+# ==================== SAP ====================
+@app.get("/api/sap/conciliacion", tags=["SAP"])
+def conciliacion_sap(
+    anio: int = Query(..., ge=2000, le=2100, description="Año a conciliar"),
+    estado: Optional[str] = Query(None, description="Filtra el detalle: " + ", ".join(conciliacion_service.ESTADOS)),
+    persona_id: Optional[int] = None,
+    proyecto_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional(*conciliacion_service.ENTIDADES, extra=conciliacion_service.tolerancia)
+):
+    """
+    Horas reportadas en SAP vs. planificadas (asignaciones) por persona, proyecto
+    y mes, para los meses del año que ya tienen reporte SAP. `sin_match` lista
+    las horas SAP cuyo colaborador o proyecto no se pudo asociar.
+    El ETag incluye CONCILIACION_TOLERANCIA: cambiarla invalida las copias de los clientes.
+    """
+    if estado and estado not in conciliacion_service.ESTADOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Estado no válido: {estado}. Disponibles: {', '.join(conciliacion_service.ESTADOS)}",
+        )
+    return conciliacion_service.conciliar(anio, estado=estado, persona_id=persona_id, proyecto_id=proyecto_id)
+
 # ==================== SPRINTS ====================
 @app.get("/api/sprints", response_model=List[SprintListItem], tags=["Sprints"])
-def listar_sprints(
+async def listar_sprints(
+    response: Response,
     proyecto_id: Optional[int] = None,
     estado: Optional[str] = None,
     search: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    ids: Optional[str] = _IDS_QUERY,
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("sprints", "proyectos")
 ):
     """Obtener lista de sprints"""
-    return sprints_service.listar(proyecto_id, estado, search)
+    id_list = _parse_ids(ids)
+    campos = _parse_fields(fields, SprintListItem)
+    if campos:
+        rows = await sprints_service.listar_campos_async(campos, proyecto_id, estado, search, after=after, limit=limit, ids=id_list)
+    else:
+        rows = await sprints_service.listar_async(proyecto_id, estado, search, after=after, limit=limit, ids=id_list)
+    return _page(response, rows, limit, bool(campos))
 
 @app.get("/api/sprints/{sprint_id}", response_model=SprintListItem, tags=["Sprints"])
-def obtener_sprint(
+async def obtener_sprint(
     sprint_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    _v: None = _conditional("sprints", "proyectos")
 ):
     """Obtener un sprint por ID"""
-    sprints = sprints_service.listar()
-    sprint = next((s for s in sprints if s.id == sprint_id), None)
+    sprint = await sprints_service.obtener_async(sprint_id)
     if not sprint:
         raise HTTPException(status_code=404, detail="Sprint no encontrado")
     return sprint
 
 # ==================== USUARIOS ====================
 @app.get("/api/usuarios", response_model=List[UsuarioListItem], tags=["Usuarios"])
-def listar_usuarios(
+async def listar_usuarios(
+    response: Response,
+    limit: Optional[int] = _LIMIT_QUERY,
+    after: Optional[int] = _AFTER_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
     current_user: dict = Depends(get_current_user)
 ):
     """Obtener lista de usuarios (solo para admins)"""
     if current_user.get("rol_app", "").lower() != "admin":
         raise HTTPException(status_code=403, detail="No tienes permisos para ver usuarios")
-    return usuarios_service.listar()
+    campos = _parse_fields(fields, UsuarioListItem)
+    if campos:
+        rows = await usuarios_service.listar_campos_async(campos, after=after, limit=limit)
+    else:
+        rows = await usuarios_service.listar_async(after=after, limit=limit)
+    return _page(response, rows, limit, bool(campos))
 
 @app.get("/", tags=["Root"])
 def root():
@@ -395,6 +880,8 @@ def root():
         "description": "API de solo consulta. No permite crear, editar ni eliminar datos.",
         "docs": "/docs",
         "endpoints": {
+            "token": "/api/auth/token",
+            "cambios": "/api/changes?since={event_id}",
             "anexos": "/api/anexos",
             "anexos_por_proyecto": "/api/anexos/proyecto/{proyecto_id}",
             "asignaciones": "/api/asignaciones",
@@ -4,11 +4,12 @@ from datetime import date
 from typing import Optional
 from domain.schemas.asignaciones import AsignacionCreate, AsignacionUpdate, AsignacionEnd
 from domain.services import asignaciones_service
+from infra.db.connection import unit_of_work
 from infra.repositories.proyectos_repo import list_proyectos
 from infra.repositories.personas_repo import list_personas
 from infra.repositories.sprints_repo import list_sprints
 from infra.repositories.perfiles_repo import get_perfiles_para_asignacion
-from shared.utils.exports import export_csv
+from shared.utils.exports import export_rows, EXPORT_FORMATS, COMPRESSIBLE_FORMATS, COMPRESS_HELP
 from shared.auth.auth import is_admin, get_user_proyectos, can_edit
 
 def _personas_options():
@@ -98,11 +99,22 @@ def render():
     items = _assignments_table(persona_id, proyecto_id, solo_activas)
 
     # Export
-    if st.button(" Exportar CSV"):
-        # Preparar datos para exportar sin persona_id y proyecto_id
-        export_items = _clean_items_for_display(items)
-        path = export_csv(export_items, "asignaciones")
-        st.toast(f"Exportado a {path}", icon="?")
+    col_e1, col_e2, col_e3, _ = st.columns([1,1,1,1])
+    with col_e1:
+        fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="asignaciones_export_fmt", label_visibility="collapsed")
+    with col_e2:
+        comprimir = st.checkbox("Comprimir", key="asignaciones_export_gz", help=COMPRESS_HELP,
+                                disabled=EXPORT_FORMATS[fmt] not in COMPRESSIBLE_FORMATS)
+    with col_e3:
+        if st.button("📤 Exportar"):
+            # Mismo filtro de permisos que la tabla, aplicado en SQL
+            proyectos_permitidos = None if is_admin() else get_user_proyectos()
+            items_iter = asignaciones_service.iterar(persona_id, proyecto_id, solo_activas,
+                                                     list(proyectos_permitidos) if proyectos_permitidos else None)
+            # Exportar sin persona_id y proyecto_id, fila a fila
+            rows = (r for i in items_iter for r in _clean_items_for_display([i]))
+            path = export_rows(rows, "asignaciones", EXPORT_FORMATS[fmt], comprimir)
+            st.toast(f"Exportado a {path}", icon="✅")
 
     st.markdown("---")
     
@@ -194,25 +206,27 @@ def render():
                     try:
                         created_ids = []
                         last_info = None
-                        for rid in st.session_state.create_row_ids:
-                            fi = st.session_state[f"cr_fi_{rid}"]
-                            ff = st.session_state.get(f"cr_ff_{rid}")
-                            ded = st.session_state[f"cr_ded_{rid}"]
-                            tar = st.session_state[f"cr_tar_{rid}"]
-                            dto = AsignacionCreate(
-                                persona_id=p_opts[persona_sel_c],
-                                proyecto_id=pr_opts[proyecto_sel_c],
-                                sprint_id=sprint_opts[sprint_fk],
-                                perfil_id=perfil_opts[perfil_fk],
-                                dedicacion_horas=ded,
-                                tarifa=tar if tar > 0 else None,
-                                fecha_asignacion=fi,
-                                fecha_fin=ff
-                            )
-                            last_info = asignaciones_service.crear(dto)
-                            created_ids.append(last_info['asignacion_id'])
-                            if last_info.get("over_projects"):
-                                st.warning("La persona quedaría en más proyectos que el umbral configurado.")
+                        # Todas las líneas en una sola transacción: o se crean todas o ninguna
+                        with unit_of_work():
+                            for rid in st.session_state.create_row_ids:
+                                fi = st.session_state[f"cr_fi_{rid}"]
+                                ff = st.session_state.get(f"cr_ff_{rid}")
+                                ded = st.session_state[f"cr_ded_{rid}"]
+                                tar = st.session_state[f"cr_tar_{rid}"]
+                                dto = AsignacionCreate(
+                                    persona_id=p_opts[persona_sel_c],
+                                    proyecto_id=pr_opts[proyecto_sel_c],
+                                    sprint_id=sprint_opts[sprint_fk],
+                                    perfil_id=perfil_opts[perfil_fk],
+                                    dedicacion_horas=ded,
+                                    tarifa=tar if tar > 0 else None,
+                                    fecha_asignacion=fi,
+                                    fecha_fin=ff
+                                )
+                                last_info = asignaciones_service.crear(dto)
+                                created_ids.append(last_info['asignacion_id'])
+                                if last_info.get("over_projects"):
+                                    st.warning("La persona quedaría en más proyectos que el umbral configurado.")
 
                         st.success(f"Se crearon {len(created_ids)} asignación(es) — IDs: {created_ids}. Carga post: {last_info['total_horas_post']:.1f}h")
                         st.session_state.create_row_ids = [0]
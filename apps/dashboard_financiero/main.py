@@ -3,7 +3,9 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import date
+from domain.services import reporting_service
 from infra.db.connection import get_conn
+from infra.repositories import eventlog_repo
 from shared.auth.auth import is_admin, get_user_proyectos
 
 
@@ -36,18 +38,40 @@ def _query_anexos():
     """)
 
 
-def _query_colaboradores():
-    return _fetch_df("""
-        SELECT a.id, a.persona_id, per.nombre AS colaborador,
-               per.ROL_PRINCIPAL AS categoria, per.SENIORITY AS seniority,
-               a.proyecto_id, pr.NOMBRE AS proyecto, pr.cliente, pr.PAIS,
-               a.dedicacion_horas, a.tarifa, per.COSTO_RECURSO,
-               a.fecha_asignacion, a.fecha_fin
-        FROM asignaciones a
-        JOIN personas per ON per.id = a.persona_id
-        JOIN proyectos pr ON pr.id = a.proyecto_id
-        ORDER BY a.fecha_asignacion, pr.NOMBRE, per.nombre
-    """)
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_data(data_version: int):
+    """
+    Carga y tipa proyectos y anexos. Cacheado entre reruns y sesiones;
+    data_version (último id de event_log) cambia con cada write, así que
+    cualquier alta/edición en otra página invalida la caché.
+    """
+    df_proy = _query_proyectos()
+    df_anexos = _query_anexos()
+
+    # Convertir columnas numéricas (pymysql puede devolver strings)
+    df_proy["BUDGET"] = pd.to_numeric(df_proy["BUDGET"], errors="coerce").fillna(0)
+    df_proy["FECHA_INICIO"] = pd.to_datetime(df_proy["FECHA_INICIO"], errors="coerce")
+    if not df_anexos.empty:
+        df_anexos["valor"] = pd.to_numeric(df_anexos["valor"], errors="coerce").fillna(0)
+        df_anexos["iva"] = pd.to_numeric(df_anexos["iva"], errors="coerce").fillna(0)
+        df_anexos["fecha_documento"] = pd.to_datetime(df_anexos["fecha_documento"], errors="coerce")
+    return df_proy, df_anexos
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_costos(year: int, data_version: int):
+    """
+    Horas, costo y facturación planificados por proyecto, persona y mes del año,
+    ya agregados en fact_costos_mes (la tabla se actualiza en la misma
+    transacción que las asignaciones, que registran evento).
+    """
+    cols = ["proyecto_id", "proyecto", "cliente", "pais", "persona_id", "colaborador", "categoria",
+            "seniority", "mes", "trimestre", "horas", "costo", "factura"]
+    df = pd.DataFrame(reporting_service.costos_mensuales(year), columns=cols)
+    df = df.rename(columns={"costo": "costo_mes", "factura": "factura_mes"})
+    # Tarifa del mes (la de la asignación salvo que dos se solapen en el mismo mes)
+    df["tarifa"] = (df["factura_mes"] / df["horas"].where(df["horas"] > 0)).fillna(0.0).round(2)
+    return df
 
 
 # ─── Helpers ────────────────────────────────────────────────────────────────
@@ -57,50 +81,6 @@ def _quarter(d):
     return (d.month - 1) // 3 + 1
 
 
-def _expand_months(df_colab, year):
-    """Expande asignaciones a filas por mes dentro del año."""
-    rows = []
-    for _, r in df_colab.iterrows():
-        fi = r["fecha_asignacion"]
-        ff = r["fecha_fin"] if pd.notna(r["fecha_fin"]) else date(year, 12, 31)
-        if hasattr(fi, 'date') and callable(fi.date):
-            fi = fi.date()
-        if hasattr(ff, 'date') and callable(ff.date):
-            ff = ff.date()
-
-        start_m = max(fi.month, 1) if fi.year == year else (1 if fi.year < year else 13)
-        end_m = min(ff.month, 12) if ff.year == year else (12 if ff.year > year else 0)
-        if fi.year < year:
-            start_m = 1
-        if ff.year > year:
-            end_m = 12
-
-        for m in range(start_m, end_m + 1):
-            tarifa = float(r["tarifa"]) if pd.notna(r["tarifa"]) and float(r["tarifa"]) > 0 else 0
-            costo_recurso = float(r["COSTO_RECURSO"]) if pd.notna(r["COSTO_RECURSO"]) else 0
-            horas = float(r["dedicacion_horas"])
-            costo_mes = costo_recurso * horas
-            factura_mes = tarifa * horas
-            q = (m - 1) // 3 + 1
-            rows.append({
-                "mes": m,
-                "trimestre": q,
-                "proyecto_id": r["proyecto_id"],
-                "proyecto": r["proyecto"],
-                "cliente": r.get("cliente", ""),
-                "pais": r.get("PAIS", ""),
-                "colaborador": r["colaborador"],
-                "categoria": r["categoria"],
-                "seniority": r["seniority"] if pd.notna(r.get("seniority")) else "",
-                "horas": horas,
-                "tarifa": tarifa,
-                "costo_recurso": costo_recurso,
-                "costo_mes": costo_mes,
-                "factura_mes": factura_mes,
-            })
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
-
-
 def _fmt(val):
     """Formatea número como moneda con puntos de miles."""
     if val < 0:
@@ -141,31 +121,15 @@ def render():
 
     st.title("Proyectos")
 
-    # ── Cargar datos ──
-    df_proy = _query_proyectos()
-    df_anexos = _query_anexos()
-    df_colab_raw = _query_colaboradores()
-
-    # Convertir columnas numéricas (pymysql puede devolver strings)
-    df_proy["BUDGET"] = pd.to_numeric(df_proy["BUDGET"], errors="coerce").fillna(0)
-    df_proy["FECHA_INICIO"] = pd.to_datetime(df_proy["FECHA_INICIO"], errors="coerce")
-    if not df_anexos.empty:
-        df_anexos["valor"] = pd.to_numeric(df_anexos["valor"], errors="coerce").fillna(0)
-        df_anexos["iva"] = pd.to_numeric(df_anexos["iva"], errors="coerce").fillna(0)
-        df_anexos["fecha_documento"] = pd.to_datetime(df_anexos["fecha_documento"], errors="coerce")
-    if not df_colab_raw.empty:
-        df_colab_raw["dedicacion_horas"] = pd.to_numeric(df_colab_raw["dedicacion_horas"], errors="coerce").fillna(0)
-        df_colab_raw["tarifa"] = pd.to_numeric(df_colab_raw["tarifa"], errors="coerce").fillna(0)
-        df_colab_raw["COSTO_RECURSO"] = pd.to_numeric(df_colab_raw["COSTO_RECURSO"], errors="coerce").fillna(0)
-        df_colab_raw["fecha_asignacion"] = pd.to_datetime(df_colab_raw["fecha_asignacion"], errors="coerce")
-        df_colab_raw["fecha_fin"] = pd.to_datetime(df_colab_raw["fecha_fin"], errors="coerce")
+    # ── Cargar datos (cacheados por versión de datos) ──
+    data_version = eventlog_repo.max_event_id()
+    df_proy, df_anexos = _load_data(data_version)
 
     if not is_admin():
         pp = get_user_proyectos()
         if pp:
             df_proy = df_proy[df_proy["id"].isin(pp)]
             df_anexos = df_anexos[df_anexos["proyecto_id"].isin(pp)]
-            df_colab_raw = df_colab_raw[df_colab_raw["proyecto_id"].isin(pp)]
 
     # ── Filtros ──
     fc1, fc2, fc3, fc4, fc5 = st.columns([1, 1, 1, 0.7, 0.7])
@@ -203,17 +167,15 @@ def render():
 
     pids = set(df_f["id"].tolist())
     df_anx = df_anexos[df_anexos["proyecto_id"].isin(pids)].copy()
-    df_col = df_colab_raw[df_colab_raw["proyecto_id"].isin(pids)].copy()
-
-    # Filtrar colaboradores por rango de fechas (asignaciones que intersectan el rango)
-    if not df_col.empty:
-        df_col = df_col[
-            (df_col["fecha_asignacion"] <= ff_ts) &
-            (df_col["fecha_fin"].fillna(pd.Timestamp("2099-12-31")) >= fi_ts)
-        ]
 
-    # Expandir a meses
-    df_exp = _expand_months(df_col, sel_year)
+    # Meses planificados del año (fact_costos_mes, sin expandir asignaciones).
+    # Colaboradores con algún mes dentro del periodo; se muestran todos sus meses del año.
+    df_exp = _load_costos(sel_year, data_version)
+    df_exp = df_exp[df_exp["proyecto_id"].isin(pids)]
+    mes_hasta = fecha_fin.month if fecha_fin.year == sel_year else 12
+    en_rango = df_exp["mes"].between(fecha_inicio.month, mes_hasta)
+    pares = df_exp.loc[en_rango, ["proyecto_id", "persona_id"]].drop_duplicates()
+    df_exp = df_exp.merge(pares, on=["proyecto_id", "persona_id"])
 
     # ── KPIs ──
     budget = float(df_f["BUDGET"].fillna(0).sum())
@@ -1,15 +1,27 @@
 # apps/eventlog/main.py
+import os
 import streamlit as st
 import pandas as pd
 from infra.repositories import eventlog_repo
-from shared.utils.exports import export_csv
+from domain.services import jobs_service
+from shared.auth.auth import current_user
+from shared.utils.exports import EXPORT_FORMATS, COMPRESSIBLE_FORMATS, COMPRESS_HELP
+from shared.utils.jobs_ui import job_status
+
+def _render_export(job):
+    res = job["resultado"] or {}
+    path = res.get("path")
+    st.success(f"✅ {res.get('filas', 0):,} eventos exportados a {path}")
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            st.download_button("⬇️ Descargar", f, file_name=os.path.basename(path), key="eventlog_export_dl")
 
 def render():
     st.title("🧾 Bitácora de eventos")
 
     colf1, colf2, colf3 = st.columns([1,1,1])
     with colf1:
-        entidad = st.selectbox("Entidad", options=["(Todas)", "personas", "proyectos", "asignaciones", "usuarios"], index=0)
+        entidad = st.selectbox("Entidad", options=["(Todas)", "personas", "proyectos", "asignaciones", "documentos", "usuarios"], index=0)
         entidad_val = None if entidad=="(Todas)" else entidad
     with colf2:
         tipo = st.selectbox("Tipo", options=["(Todos)", "create", "update", "delete", "status_change", "end", "close", "login", "logout"], index=0)
@@ -19,11 +31,23 @@ def render():
 
     rows = eventlog_repo.list_events(entidad_val, tipo_val, int(limit))
 
-    cA, _ = st.columns([1,3])
+    cA, cB, cC, _ = st.columns([1,1,1,1])
     with cA:
-        if st.button("📤 Exportar CSV"):
-            path = export_csv(rows, "event_log")
-            st.toast(f"Exportado a {path}", icon="✅")
+        fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="eventlog_export_fmt", label_visibility="collapsed")
+    with cB:
+        comprimir = st.checkbox("Comprimir", key="eventlog_export_gz", help=COMPRESS_HELP,
+                                disabled=EXPORT_FORMATS[fmt] not in COMPRESSIBLE_FORMATS)
+    with cC:
+        # Exporta todos los eventos del filtro (sin el límite de la tabla), en el worker
+        if st.button("📤 Exportar"):
+            u = current_user()
+            st.session_state["eventlog_export_job"] = jobs_service.encolar(
+                "export_eventlog",
+                {"entidad": entidad_val, "tipo": tipo_val, "fmt": EXPORT_FORMATS[fmt], "comprimir": comprimir},
+                actor_id=u["id"] if u else None,
+            )
+
+    job_status("eventlog_export_job", _render_export)
 
     if rows:
         df = pd.DataFrame(rows)
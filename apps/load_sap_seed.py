@@ -1,26 +1,31 @@
 #!/usr/bin/env python3
 """Seed script: Carga datos SAP desde CSV."""
-import csv, sys, os
+import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from domain.services import sap_service
 
 CSV_PATH = os.path.join(os.path.dirname(__file__), "sap_seed.csv")
 
+def _print_chunk(info):
+    print(f"  bloque {info['bloque']}: {info['filas']} filas "
+          f"(lectura {info['lectura_s']:.3f}s, staging {info['staging_s']:.3f}s, "
+          f"{info['filas_s'] or 0:,} filas/s) - acumulado {info['acumulado']}")
+
 def main():
     if not os.path.exists(CSV_PATH):
         print(f"ERROR: No se encontró {CSV_PATH}")
         sys.exit(1)
     
-    with open(CSV_PATH, "r", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-    
-    print(f"Filas leidas del CSV: {len(rows)}")
-    parsed = sap_service.parse_csv_rows(rows, anio=2026)
-    print(f"Filas parseadas: {len(parsed)}")
+    with open(CSV_PATH, "r", encoding="utf-8-sig", newline="") as f:
+        res = sap_service.cargar_csv(f, anio=2026, on_chunk=_print_chunk)
     
-    count = sap_service.bulk_upsert(parsed)
-    print(f"Filas insertadas/actualizadas en BD: {count}")
+    print(f"Filas leidas del CSV: {res['filas']}")
+    print(f"Insertadas: {res['insertadas']} | Actualizadas: {res['actualizadas']}")
+    if res["rechazadas"]:
+        print(f"Rechazadas: {res['rechazadas']}")
+        for e in res["errores"][:20]:
+            print(f"  línea {e['linea']}: {e['motivo']}")
+    print(f"Merge: {res['merge_s']:.3f}s | Total: {res['total_s']:.3f}s")
     print("Done!")
 
 if __name__ == "__main__":
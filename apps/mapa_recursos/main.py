@@ -2,8 +2,11 @@
 import streamlit as st
 import calendar
 from datetime import date
-from collections import defaultdict
+import numpy as np
+import pandas as pd
 from infra.db.connection import get_conn
+from infra.repositories import eventlog_repo
+from shared.utils.dates import explode_months
 from shared.auth.auth import is_admin, get_user_proyectos
 
 # Paleta de colores distinguibles para proyectos
@@ -17,16 +20,44 @@ _COLORS = [
 MESES_ES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
             "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
 
+_HEADER = ("<tr><th>Persona</th><th>Rol</th>"
+           + "".join(f"<th>{m}</th>" for m in MESES_ES)
+           + "<th>Prom</th></tr>")
+
+_CSS = """
+<style>
+.rm-table { width:100%; border-collapse:collapse; font-family:'Source Sans Pro',sans-serif; font-size:13px; }
+.rm-table th { background:#1e1e2e; color:#cdd6f4; padding:6px 8px; text-align:center; position:sticky; top:0; z-index:2; font-weight:600; }
+.rm-table td { padding:4px 3px; text-align:center; vertical-align:middle; border-bottom:1px solid #313244; }
+.rm-table td.name-cell { text-align:left; white-space:nowrap; padding-left:8px; font-weight:500; min-width:220px; }
+.rm-table td.rol-cell { text-align:left; white-space:nowrap; color:#a6adc8; font-size:12px; min-width:100px; }
+.rm-table tr:hover { background:#313244; }
+.bubble { display:flex; align-items:center; justify-content:center; min-width:44px; height:34px;
+          border-radius:17px; margin:0 auto; font-size:11px; font-weight:700; color:#1e1e2e;
+          cursor:default; transition:transform 0.15s; }
+.bubble:hover { transform:scale(1.15); z-index:10; }
+.bubble-empty { background:#45475a; color:#585b70; min-width:44px; font-size:10px; }
+.bubble-multi { padding:0; overflow:hidden; gap:0; }
+.seg { display:flex; align-items:center; justify-content:center; height:100%;
+       font-size:10px; font-weight:700; color:#1e1e2e; padding:0 4px; }
+.rm-legend { padding:8px 0 12px 0; line-height:2; }
+.total-ok { color:#a6e3a1; font-weight:700; }
+.total-over { color:#f38ba8; font-weight:700; }
+.total-partial { color:#f9e2af; font-weight:700; }
+</style>
+"""
+
 
 def _get_all_assignments(year: int):
     """Obtiene todas las asignaciones que intersectan con el año dado."""
     sql = """
         SELECT a.id, a.persona_id, p.nombre AS persona, p.ROL_PRINCIPAL AS rol,
                a.proyecto_id, pr.nombre AS proyecto, a.dedicacion_horas,
-               a.fecha_asignacion, a.fecha_fin
+               a.fecha_asignacion, a.fecha_fin, l.nombre AS lider
         FROM asignaciones a
         JOIN personas p ON p.id = a.persona_id
         JOIN proyectos pr ON pr.id = a.proyecto_id
+        LEFT JOIN personas l ON l.id = p.LIDER_DIRECTO
         WHERE a.fecha_asignacion <= %s
           AND (a.fecha_fin IS NULL OR a.fecha_fin >= %s)
           AND p.activo = 1
@@ -39,68 +70,87 @@ def _get_all_assignments(year: int):
         return cur.fetchall()
 
 
-def _build_matrix(rows, year):
+def _build_occupancy(rows, year):
+    """
+    Estructura de ocupación del año, indexada por posición de persona (orden por nombre):
+      'persona_ids', 'nombres', 'roles', 'lideres': listas alineadas
+      'horas': ndarray (personas × 12) con horas totales por mes
+      'promedios': ndarray (personas,) con el promedio sobre los meses con horas
+      'detalle': por persona, { 1..12: [ { 'proyecto', 'horas', 'proyecto_id' } ] }
+                 (una entrada por proyecto, sumando asignaciones repetidas)
+      'proyectos': por persona, set de nombres de proyecto con horas en el año
     """
-    Construye un dict:
-      persona_key -> {
-        'nombre': str, 'rol': str, 'persona_id': int,
-        'meses': { 1..12: [ { 'proyecto': str, 'horas': float, 'proyecto_id': int } ] }
-      }
+    df = pd.DataFrame(rows, columns=["persona_id", "persona", "rol", "proyecto_id",
+                                     "proyecto", "dedicacion_horas",
+                                     "fecha_asignacion", "fecha_fin", "lider"])
+    df["horas"] = pd.to_numeric(df["dedicacion_horas"], errors="coerce").fillna(0.0)
+    df["rol"] = df["rol"].fillna("")
+    df["lider"] = df["lider"].fillna("Sin líder")
+
+    personas = (df.drop_duplicates("persona_id")
+                  .sort_values(["persona", "persona_id"], kind="stable")
+                  .reset_index(drop=True))
+    pos = pd.Series(personas.index, index=personas["persona_id"])
+
+    exp = explode_months(df, year)
+    horas = np.zeros((len(personas), 12))
+    detalle = [{m: [] for m in range(1, 13)} for _ in range(len(personas))]
+    proyectos = [set() for _ in range(len(personas))]
+
+    if not exp.empty:
+        exp["pos"] = pos.loc[exp["persona_id"]].to_numpy()
+        # Matriz de totales: suma dispersa por (persona, mes)
+        np.add.at(horas, (exp["pos"].to_numpy(), exp["mes"].to_numpy() - 1),
+                  exp["horas"].to_numpy())
+        # Desglose por proyecto, respetando el orden de aparición (fecha de asignación)
+        by_proj = (exp.groupby(["pos", "mes", "proyecto_id", "proyecto"], sort=False)["horas"]
+                      .sum().reset_index())
+        for i, m, prid, pr, h in by_proj.itertuples(index=False, name=None):
+            detalle[i][m].append({"proyecto": pr, "horas": float(h), "proyecto_id": prid})
+            proyectos[i].add(pr)
+
+    activos = (horas > 0).sum(axis=1)
+    promedios = np.divide(horas.sum(axis=1), activos, out=np.zeros(len(personas)),
+                          where=activos > 0)
+
+    return {
+        "persona_ids": personas["persona_id"].tolist(),
+        "nombres": personas["persona"].tolist(),
+        "roles": personas["rol"].tolist(),
+        "lideres": personas["lider"].tolist(),
+        "horas": horas,
+        "promedios": promedios,
+        "detalle": detalle,
+        "proyectos": proyectos,
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_occupancy(year: int, data_version: int, proyecto_ids=None):
     """
-    matrix = {}
-    for r in rows:
-        pid = r["persona_id"]
-        if pid not in matrix:
-            matrix[pid] = {
-                "nombre": r["persona"],
-                "rol": r["rol"] or "",
-                "persona_id": pid,
-                "meses": {m: [] for m in range(1, 13)},
-            }
-
-        fi = r["fecha_asignacion"]
-        ff = r["fecha_fin"] or date(year, 12, 31)
-
-        # Clamp al año
-        start_m = max(fi.month, 1) if fi.year == year else (1 if fi.year < year else 13)
-        end_m = min(ff.month, 12) if ff.year == year else (12 if ff.year > year else 0)
-
-        if fi.year < year:
-            start_m = 1
-        if ff.year > year:
-            end_m = 12
-
-        for m in range(start_m, end_m + 1):
-            matrix[pid]["meses"][m].append({
-                "proyecto": r["proyecto"],
-                "horas": float(r["dedicacion_horas"]),
-                "proyecto_id": r["proyecto_id"],
-            })
-
-    return matrix
-
-
-def _assign_colors(matrix):
+    Ocupación del año, cacheada entre reruns y sesiones. data_version (último id
+    de event_log) invalida con cada write; proyecto_ids (tupla) acota por permisos.
+    """
+    rows = _get_all_assignments(year)
+    if proyecto_ids is not None:
+        allowed = set(proyecto_ids)
+        rows = [r for r in rows if r["proyecto_id"] in allowed]
+    return _build_occupancy(rows, year)
+
+
+def _assign_colors(proyectos):
     """Asigna un color único a cada proyecto."""
-    all_projects = set()
-    for pdata in matrix.values():
-        for m in range(1, 13):
-            for entry in pdata["meses"][m]:
-                all_projects.add(entry["proyecto"])
-    sorted_projects = sorted(all_projects)
     color_map = {}
-    for i, proj in enumerate(sorted_projects):
+    for i, proj in enumerate(sorted(proyectos)):
         color_map[proj] = _COLORS[i % len(_COLORS)]
     return color_map
 
 
-def _render_bubble(entries, color_map):
-    """Genera HTML para un globo de mes."""
+def _render_bubble(entries, color_map, total):
+    """Genera HTML para un globo de mes; total viene precalculado de la matriz de horas."""
     if not entries:
         return '<div class="bubble bubble-empty">&nbsp;</div>'
 
-    total = sum(e["horas"] for e in entries)
-
     if len(entries) == 1:
         e = entries[0]
         c = color_map.get(e["proyecto"], "#666")
@@ -128,6 +178,66 @@ def _render_bubble(entries, color_map):
     )
 
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def _render_rows(year: int, data_version: int, proyecto_ids, indices, colors):
+    """
+    HTML de las filas `indices` (tupla de posiciones en la ocupación). Se cachea
+    por bloque: cambiar de página reutiliza lo ya serializado mientras no haya writes.
+    """
+    occ = _load_occupancy(year, data_version, proyecto_ids)
+    horas, color_map = occ["horas"], dict(colors)
+    body = ""
+    for i in indices:
+        body += f'<tr><td class="name-cell">{occ["nombres"][i]}</td>'
+        body += f'<td class="rol-cell">{occ["roles"][i]}</td>'
+
+        for m in range(1, 13):
+            body += f"<td>{_render_bubble(occ['detalle'][i][m], color_map, horas[i, m - 1])}</td>"
+
+        avg = occ["promedios"][i]
+        if avg == 0:
+            cls = ""
+        elif avg <= 160:
+            cls = "total-ok"
+        else:
+            cls = "total-over"
+        body += f'<td><span class="{cls}">{avg:.0f}h</span></td>'
+        body += "</tr>"
+    return body
+
+
+def _paginate(occ, visibles):
+    """
+    Controles de paginación: por bloques de personas, por rol o por líder.
+    Devuelve el subconjunto de `visibles` a renderizar.
+    """
+    if not visibles:
+        return visibles
+    col_modo, col_grupo, col_tam, col_pag = st.columns([0.25, 0.35, 0.15, 0.25])
+    with col_modo:
+        modo = st.selectbox("Agrupar por", ["Bloques", "Rol", "Líder"], key="mapa_modo")
+    if modo != "Bloques":
+        campo = occ["roles"] if modo == "Rol" else occ["lideres"]
+        grupos = sorted({campo[i] or "Sin rol" for i in visibles})
+        with col_grupo:
+            grupo = st.selectbox(modo, grupos, key=f"mapa_grupo_{modo}")
+        visibles = [i for i in visibles if (campo[i] or "Sin rol") == grupo]
+    with col_tam:
+        tam = st.selectbox("Filas", [25, 50, 100, 200], index=1, key="mapa_page_size")
+    paginas = max(1, -(-len(visibles) // tam))
+    # Si el grupo o el tamaño cambian, la página guardada puede quedar fuera de rango
+    if st.session_state.get("mapa_pagina", 1) > paginas:
+        st.session_state["mapa_pagina"] = 1
+    with col_pag:
+        # Sin value=: el valor (y el reinicio de arriba) va por session_state
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas,
+                                 step=1, key="mapa_pagina")
+    pagina = int(pagina)
+    st.caption(f"Mostrando {min((pagina - 1) * tam + 1, len(visibles))}–"
+               f"{min(pagina * tam, len(visibles))} de {len(visibles)} personas")
+    return visibles[(pagina - 1) * tam: pagina * tam]
+
+
 def render():
     st.title("📊 Mapa de Recursos")
     st.caption("Asignaciones por persona y mes — pasa el mouse sobre cada globo para ver el detalle.")
@@ -138,29 +248,30 @@ def render():
     with col_y:
         year = st.selectbox("Año", list(range(current_year - 1, current_year + 3)), index=1)
 
-    rows = _get_all_assignments(year)
-
     # Filtrar por permisos
+    proyecto_ids = None
     if not is_admin():
         proyectos_permitidos = get_user_proyectos()
         if proyectos_permitidos:
-            rows = [r for r in rows if r["proyecto_id"] in proyectos_permitidos]
+            proyecto_ids = tuple(sorted(proyectos_permitidos))
+
+    data_version = eventlog_repo.max_event_id()
+    occ = _load_occupancy(year, data_version, proyecto_ids)
+    horas = occ["horas"]
 
-    if not rows:
+    if not occ["persona_ids"]:
         st.info("No hay asignaciones para este año.")
         return
 
-    matrix_full = _build_matrix(rows, year)
-    color_map_full = _assign_colors(matrix_full)
+    all_projects = set().union(*occ["proyectos"])
 
     # --- Métricas resumen arriba ---
     current_month = date.today().month if year == current_year else 1
-    total_personas = len(matrix_full)
-    total_proyectos = len(color_map_full)
-    under = sum(1 for p in matrix_full.values()
-                if 0 < sum(e["horas"] for e in p["meses"][current_month]) < 160)
-    sin_asig = sum(1 for p in matrix_full.values()
-                   if sum(e["horas"] for e in p["meses"][current_month]) == 0)
+    mes_actual = horas[:, current_month - 1]
+    total_personas = len(occ["persona_ids"])
+    total_proyectos = len(all_projects)
+    under = int(((mes_actual > 0) & (mes_actual < 160)).sum())
+    sin_asig = int((mes_actual == 0).sum())
 
     m1, m2, m3, m4 = st.columns(4)
     m1.metric("Personas asignadas", total_personas)
@@ -173,112 +284,56 @@ def render():
     # --- Filtros persona y proyecto ---
     col_fp, col_fpr = st.columns(2)
     with col_fp:
-        personas_list = sorted(set(f"{v['nombre']} ({v['rol']})" for v in matrix_full.values()))
+        personas_list = sorted(set(f"{n} ({r})" for n, r in zip(occ["nombres"], occ["roles"])))
         filtro_persona = st.multiselect("Filtrar personas", personas_list, default=[], key="mapa_filter_persona")
     with col_fpr:
-        proyectos_list = sorted(color_map_full.keys())
+        proyectos_list = sorted(all_projects)
         filtro_proyecto = st.multiselect("Filtrar proyectos", proyectos_list, default=[], key="mapa_filter_proyecto")
 
-    # Aplicar filtro de persona
-    matrix = dict(matrix_full)
+    # Índices de las personas visibles (ya vienen ordenadas por nombre)
+    visibles = list(range(total_personas))
     if filtro_persona:
         filtro_nombres = {fp.split(" (")[0] for fp in filtro_persona}
-        matrix = {k: v for k, v in matrix.items() if v["nombre"] in filtro_nombres}
+        visibles = [i for i in visibles if occ["nombres"][i] in filtro_nombres]
 
-    # Aplicar filtro de proyecto: mostrar solo personas que tengan al menos 1 asignación en esos proyectos
+    # Filtro de proyecto: solo personas con al menos 1 asignación en esos proyectos
     if filtro_proyecto:
-        filtered = {}
-        for k, v in matrix.items():
-            has_project = False
-            for m in range(1, 13):
-                for e in v["meses"][m]:
-                    if e["proyecto"] in filtro_proyecto:
-                        has_project = True
-                        break
-                if has_project:
-                    break
-            if has_project:
-                filtered[k] = v
-        matrix = filtered
-
-    color_map = _assign_colors(matrix) if matrix else {}
-
-    # Leyenda de colores
+        filtro_set = set(filtro_proyecto)
+        visibles = [i for i in visibles if occ["proyectos"][i] & filtro_set]
+
+    if not visibles:
+        st.info("No hay personas que coincidan con los filtros seleccionados.")
+        return
+
+    # Colores sobre todo el conjunto filtrado: estables al cambiar de página
+    color_map = _assign_colors(set().union(*(occ["proyectos"][i] for i in visibles)))
+
+    pagina = _paginate(occ, visibles)
+    if not pagina:
+        st.info("No hay personas en este grupo.")
+        return
+
+    # Leyenda solo con los proyectos de la página
+    en_pagina = set().union(*(occ["proyectos"][i] for i in pagina))
     legend_items = " ".join(
         f'<span style="display:inline-flex;align-items:center;margin-right:14px;">'
         f'<span style="width:14px;height:14px;border-radius:50%;background:{c};display:inline-block;margin-right:4px;"></span>'
         f'<span style="font-size:12px;">{p}</span></span>'
-        for p, c in sorted(color_map.items())
+        for p, c in sorted(color_map.items()) if p in en_pagina
     )
 
-    # CSS
-    css = """
-    <style>
-    .rm-table { width:100%; border-collapse:collapse; font-family:'Source Sans Pro',sans-serif; font-size:13px; }
-    .rm-table th { background:#1e1e2e; color:#cdd6f4; padding:6px 8px; text-align:center; position:sticky; top:0; z-index:2; font-weight:600; }
-    .rm-table td { padding:4px 3px; text-align:center; vertical-align:middle; border-bottom:1px solid #313244; }
-    .rm-table td.name-cell { text-align:left; white-space:nowrap; padding-left:8px; font-weight:500; min-width:220px; }
-    .rm-table td.rol-cell { text-align:left; white-space:nowrap; color:#a6adc8; font-size:12px; min-width:100px; }
-    .rm-table tr:hover { background:#313244; }
-    .bubble { display:flex; align-items:center; justify-content:center; min-width:44px; height:34px;
-              border-radius:17px; margin:0 auto; font-size:11px; font-weight:700; color:#1e1e2e;
-              cursor:default; transition:transform 0.15s; }
-    .bubble:hover { transform:scale(1.15); z-index:10; }
-    .bubble-empty { background:#45475a; color:#585b70; min-width:44px; font-size:10px; }
-    .bubble-multi { padding:0; overflow:hidden; gap:0; }
-    .seg { display:flex; align-items:center; justify-content:center; height:100%;
-           font-size:10px; font-weight:700; color:#1e1e2e; padding:0 4px; }
-    .rm-legend { padding:8px 0 12px 0; line-height:2; }
-    .total-ok { color:#a6e3a1; font-weight:700; }
-    .total-over { color:#f38ba8; font-weight:700; }
-    .total-partial { color:#f9e2af; font-weight:700; }
-    </style>
-    """
-
-    # Construir tabla HTML
-    header = "<tr><th>Persona</th><th>Rol</th>"
-    for m in range(1, 13):
-        header += f"<th>{MESES_ES[m-1]}</th>"
-    header += "<th>Prom</th></tr>"
-
-    body = ""
-    sorted_people = sorted(matrix.values(), key=lambda x: x["nombre"])
-    for pdata in sorted_people:
-        body += f'<tr><td class="name-cell">{pdata["nombre"]}</td>'
-        body += f'<td class="rol-cell">{pdata["rol"]}</td>'
-
-        total_h = 0
-        active_months = 0
-        for m in range(1, 13):
-            entries = pdata["meses"][m]
-            body += f"<td>{_render_bubble(entries, color_map)}</td>"
-            month_total = sum(e["horas"] for e in entries)
-            if month_total > 0:
-                total_h += month_total
-                active_months += 1
-
-        avg = total_h / active_months if active_months > 0 else 0
-        if avg == 0:
-            cls = ""
-        elif avg <= 160:
-            cls = "total-ok"
-        else:
-            cls = "total-over"
-        body += f'<td><span class="{cls}">{avg:.0f}h</span></td>'
-        body += "</tr>"
+    # Solo se serializan las filas visibles, en bloques cacheados
+    body = _render_rows(year, data_version, proyecto_ids, tuple(pagina),
+                        tuple(sorted((p, color_map[p]) for p in en_pagina)))
 
     html = f"""
-    {css}
+    {_CSS}
     <div class="rm-legend">{legend_items}</div>
     <div style="overflow-x:auto;">
     <table class="rm-table">
-    <thead>{header}</thead>
+    <thead>{_HEADER}</thead>
     <tbody>{body}</tbody>
     </table>
     </div>
     """
-
-    if matrix:
-        st.html(html)
-    else:
-        st.info("No hay personas que coincidan con los filtros seleccionados.")
+    st.html(html)
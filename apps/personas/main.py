@@ -4,7 +4,7 @@ import streamlit as st
 from datetime import date
 from domain.schemas.personas import PersonaCreate, PersonaUpdate, get_roles_permitidos, SENIORITY_PERMITIDOS, TIPOS_DOCUMENTO_PERMITIDOS, PAISES_PERMITIDOS
 from domain.services import personas_service
-from shared.utils.exports import export_csv
+from shared.utils.exports import export_rows, EXPORT_FORMATS, COMPRESSIBLE_FORMATS, COMPRESS_HELP
 from shared.auth.auth import can_edit
 
 def render():
@@ -25,10 +25,16 @@ def render():
     items = personas_service.listar(rol=rol_filter_val, solo_activas=solo_activas, search=(search or None))
     st.success(f"Total: {len(items)} registro(s)")
 
-    col_a1, _ = st.columns([1,1])
+    col_a1, col_a2, col_a3, _ = st.columns([1,1,1,1])
     with col_a1:
-        if st.button("📤 Exportar CSV"):
-            path = export_csv([i.dict() for i in items], "personas")
+        fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="personas_export_fmt", label_visibility="collapsed")
+    with col_a2:
+        comprimir = st.checkbox("Comprimir", key="personas_export_gz", help=COMPRESS_HELP,
+                                disabled=EXPORT_FORMATS[fmt] not in COMPRESSIBLE_FORMATS)
+    with col_a3:
+        if st.button("📤 Exportar"):
+            rows = (i.dict() for i in personas_service.iterar(rol_filter_val, solo_activas, (search or None)))
+            path = export_rows(rows, "personas", EXPORT_FORMATS[fmt], comprimir)
             st.toast(f"Exportado a {path}", icon="✅")
 
     if items:
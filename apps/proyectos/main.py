@@ -3,7 +3,7 @@ import streamlit as st
 from datetime import date
 from domain.schemas.proyectos import ProyectoCreate, ProyectoUpdate, ProyectoClose, ESTADOS_PROY
 from domain.services import proyectos_service, personas_service
-from shared.utils.exports import export_csv
+from shared.utils.exports import export_rows, EXPORT_FORMATS, COMPRESSIBLE_FORMATS, COMPRESS_HELP
 from shared.auth.auth import is_admin, get_user_proyectos, can_edit
 
 def _header_resumen(items):
@@ -49,9 +49,19 @@ def render():
     _header_resumen(items)
 
     # Export
-    if st.button("📤 Exportar CSV"):
-        path = export_csv([i.dict() for i in items], "proyectos")
-        st.toast(f"Exportado a {path}", icon="✅")
+    col_e1, col_e2, col_e3, _ = st.columns([1,1,1,1])
+    with col_e1:
+        fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="proyectos_export_fmt", label_visibility="collapsed")
+    with col_e2:
+        comprimir = st.checkbox("Comprimir", key="proyectos_export_gz", help=COMPRESS_HELP,
+                                disabled=EXPORT_FORMATS[fmt] not in COMPRESSIBLE_FORMATS)
+    with col_e3:
+        if st.button("📤 Exportar"):
+            # Mismo filtro de permisos que la tabla, aplicado en SQL
+            ids = None if is_admin() else list(get_user_proyectos() or [])
+            rows = (i.dict() for i in proyectos_service.iterar(estado_val, cliente_val, (search or None), ids))
+            path = export_rows(rows, "proyectos", EXPORT_FORMATS[fmt], comprimir)
+            st.toast(f"Exportado a {path}", icon="✅")
 
     # Tabla (ocultar pm_id y renombrar lider_nombre)
     if items:
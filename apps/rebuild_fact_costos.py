@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""Reconstruye la tabla derivada fact_costos_mes desde asignaciones × personas."""
+import sys, os, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from infra.repositories import fact_costos_repo
+
+def main():
+    t0 = time.perf_counter()
+    n = fact_costos_repo.rebuild()
+    print(f"fact_costos_mes reconstruida: {n} filas en {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
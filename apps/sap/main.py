@@ -1,10 +1,10 @@
 # apps/sap/main.py
 import streamlit as st
 import pandas as pd
-import csv
-import io
 from datetime import date
-from domain.services import sap_service
+from domain.services import sap_service, jobs_service, conciliacion_service
+from shared.auth.auth import current_user
+from shared.utils.jobs_ui import job_status
 
 
 MES_ORDER = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
@@ -21,12 +21,17 @@ def render():
     st.title("SAP Report")
 
     # ── Tabs ──
-    tab_ver, tab_cargar, tab_gsheets = st.tabs(["📊 Ver Reporte", "📁 Cargar CSV", "🔗 Google Sheets"])
+    tab_ver, tab_conc, tab_cargar, tab_gsheets = st.tabs(
+        ["📊 Ver Reporte", "⚖️ Conciliación", "📁 Cargar CSV", "🔗 Google Sheets"])
 
     # ===================== TAB VER =====================
     with tab_ver:
         _render_view()
 
+    # ===================== TAB CONCILIACIÓN =====================
+    with tab_conc:
+        _render_conciliacion()
+
     # ===================== TAB CARGAR CSV =====================
     with tab_cargar:
         _render_csv_upload()
@@ -105,6 +110,72 @@ def _render_view():
         st.dataframe(resumen, use_container_width=True, hide_index=True)
 
 
+def _render_conciliacion():
+    st.markdown("#### Horas SAP vs. planificadas")
+    st.caption("Compara lo reportado en SAP con las asignaciones de cada persona y proyecto, "
+               "en los meses del año que ya tienen reporte cargado.")
+    anios = sap_service.get_anios()
+    if not anios:
+        st.info("No hay datos SAP cargados.")
+        return
+
+    cur_year = date.today().year
+    fc1, fc2, fc3 = st.columns([1, 2, 2])
+    with fc1:
+        sel_anio = st.selectbox("AÑO", anios, index=anios.index(cur_year) if cur_year in anios else 0,
+                                key="conc_anio")
+    with fc2:
+        sel_estado = st.multiselect("ESTADO", list(conciliacion_service.ESTADOS), default=[], key="conc_estado")
+    with fc3:
+        search = st.text_input("Buscar persona o proyecto", key="conc_search")
+
+    with st.spinner("Conciliando..."):
+        res = conciliacion_service.calcular(sel_anio)
+    tot = res["totales"].to_dict("records")[0]
+    por_mes = res["por_mes"]
+
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Horas planificadas", f"{por_mes['planificadas'].sum():,.0f}")
+    k2.metric("Horas reportadas", f"{por_mes['reportadas'].sum():,.0f}")
+    k3.metric("Diferencia", f"{por_mes['delta'].sum():+,.0f}")
+    k4.metric("Colaboradores asociados", f"{tot['colaboradores_match']}/{tot['colaboradores_sap']}")
+    k5.metric("Horas SAP sin asociar", f"{tot['horas_sin_match']:,.0f}")
+
+    if por_mes.empty:
+        st.info("Sin datos para el año seleccionado.")
+        return
+
+    st.markdown("##### Por mes")
+    disp_mes = por_mes[["mes_nombre", "planificadas", "reportadas", "delta", "sin_match_hrs"]].copy()
+    disp_mes.columns = ["MES", "PLANIFICADAS", "REPORTADAS", "DIFERENCIA", "SAP SIN ASOCIAR"]
+    st.dataframe(disp_mes, use_container_width=True, hide_index=True)
+
+    st.markdown("##### Detalle por persona y proyecto")
+    det = res["detalle"]
+    if sel_estado:
+        det = det[det["estado"].isin(sel_estado)]
+    if search:
+        det = det[det["persona"].str.contains(search, case=False, na=False)
+                  | det["proyecto"].str.contains(search, case=False, na=False)]
+    disp = det[["mes_nombre", "persona", "proyecto", "planificadas", "reportadas", "novedad_hrs",
+                "delta", "delta_pct", "estado"]].copy()
+    disp["delta_pct"] = disp["delta_pct"] * 100
+    disp.columns = ["MES", "PERSONA", "PROYECTO", "PLANIFICADAS", "REPORTADAS", "NOVEDADES (HRS)",
+                    "DIFERENCIA", "DIFERENCIA %", "ESTADO"]
+    st.dataframe(disp, use_container_width=True, hide_index=True, height=500,
+                 column_config={"DIFERENCIA %": st.column_config.NumberColumn(format="%.1f%%")})
+
+    sin_match = res["sin_match"]
+    if not sin_match.empty:
+        with st.expander(f"⚠️ {len(sin_match)} combinaciones SAP sin asociar "
+                         f"({sin_match['horas'].sum():,.0f} horas)"):
+            st.caption("Asociar agregando el ID SAP en un anexo del proyecto, o corrigiendo el nombre "
+                       "de la persona para que coincida con el de SAP.")
+            disp_sin = sin_match.copy()
+            disp_sin.columns = ["COLABORADOR", "ID SAP", "PROYECTO SAP", "MOTIVO", "HORAS", "MESES"]
+            st.dataframe(disp_sin, use_container_width=True, hide_index=True)
+
+
 def _render_csv_upload():
     st.markdown("#### Cargar datos desde archivo CSV")
     st.markdown("El CSV debe tener las columnas: `NRO`, `ID EMPLEADO SAP`, `COLABORADORES`, `ID SAP`, `PROYECTO SAP`, `HORAS MES`, `MES`, `TIPO NOVEDAD`, `TIEMPO NOVEDAD (HRS)`, `REPORTE SAP`")
@@ -118,28 +189,58 @@ def _render_csv_upload():
     uploaded = st.file_uploader("Seleccionar CSV", type=["csv"], key="csv_upload")
 
     if uploaded and st.button("Cargar datos", type="primary", key="csv_btn"):
-        try:
-            content = uploaded.read().decode("utf-8-sig")
-            reader = csv.DictReader(io.StringIO(content))
-            csv_rows = list(reader)
+        # La carga la hace el worker: el archivo queda en JOBS_DIR y la sesión solo consulta el estado
+        path = jobs_service.guardar_archivo(uploaded.getvalue(), suffix=".csv")
+        st.session_state["sap_csv_job"] = jobs_service.encolar(
+            "sap_csv", {"path": path, "anio": int(anio), "reemplazar": modo == "Reemplazar todo del año"},
+            actor_id=_actor_id(),
+        )
+
+    job_status("sap_csv_job", _render_csv_result)
 
-            if not csv_rows:
-                st.error("El CSV está vacío.")
-                return
 
-            parsed = sap_service.parse_csv_rows(csv_rows, anio=anio)
+def _render_csv_result(job: dict):
+    res = job["resultado"] or {}
+    if not res.get("filas") and not res.get("rechazadas"):
+        st.error("El CSV está vacío.")
+        return
+    if res.get("filas"):
+        st.success(f"✅ {res['filas']} registros procesados: {_resumen_cambios(res)} "
+                   f"({res['total_s']:.1f}s, merge {res['merge_s']:.2f}s)")
+        if res.get("bloques"):
+            st.dataframe(pd.DataFrame(res["bloques"]), use_container_width=True, hide_index=True)
+    else:
+        st.error("Ninguna fila del CSV es válida: no se cargó nada.")
+    _render_rechazadas(res)
 
-            if modo == "Reemplazar todo del año":
-                # Obtener meses únicos de los datos
-                meses_unicos = set(r["mes"] for r in parsed)
-                for m in meses_unicos:
-                    sap_service.eliminar_mes(anio, m)
 
-            count = sap_service.bulk_upsert(parsed)
-            st.success(f"✅ {len(parsed)} registros procesados ({count} filas afectadas en BD)")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Error al procesar CSV: {e}")
+def _render_rechazadas(res: dict):
+    if not res.get("rechazadas"):
+        return
+    st.warning(f"⚠️ {res['rechazadas']} filas rechazadas (no se cargaron)"
+               + (f"; se muestran las primeras {len(res['errores'])}" if len(res["errores"]) < res["rechazadas"] else ""))
+    st.dataframe(pd.DataFrame([{"LÍNEA": e["linea"], "MOTIVO": e["motivo"], **e["valores"]} for e in res["errores"]]),
+                 use_container_width=True, hide_index=True)
+
+
+def _actor_id():
+    u = current_user()
+    return u["id"] if u else None
+
+
+def _resumen_cambios(res: dict) -> str:
+    partes = [f"{res['insertadas']} nuevos", f"{res['actualizadas']} actualizados"]
+    if res["eliminadas"]:
+        partes.append(f"{res['eliminadas']} eliminados")
+    partes.append(f"{res['sin_cambios']} sin cambios")
+    return ", ".join(partes)
+
+
+def _render_gs_result(job: dict):
+    res = job["resultado"]
+    st.success(f"✅ {res['filas']} registros sincronizados desde Google Sheets: "
+               f"{_resumen_cambios(res)} ({res['total_s']:.1f}s)")
+    _render_rechazadas(res)
 
 
 def _render_gsheets():
@@ -174,21 +275,14 @@ def _render_gsheets():
         anio = st.number_input("Año", min_value=2020, max_value=2100, value=date.today().year, key="gs_anio")
 
         if st.button("🔄 Sincronizar ahora", type="primary", key="gs_sync"):
-            try:
-                rows = _fetch_google_sheet(cred_path, sheet_url, gid)
-                if rows:
-                    parsed = sap_service.parse_csv_rows(rows, anio=anio)
-                    # Eliminar meses existentes y recargar
-                    meses_unicos = set(r["mes"] for r in parsed)
-                    for m in meses_unicos:
-                        sap_service.eliminar_mes(anio, m)
-                    count = sap_service.bulk_upsert(parsed)
-                    st.success(f"✅ {len(parsed)} registros sincronizados desde Google Sheets ({count} filas)")
-                    st.rerun()
-                else:
-                    st.warning("No se obtuvieron datos del Sheet.")
-            except Exception as e:
-                st.error(f"Error al sincronizar: {e}")
+            # Diff contra lo guardado (solo se escriben las filas que cambiaron), en el worker
+            st.session_state["sap_gs_job"] = jobs_service.encolar(
+                "sap_gsheets",
+                {"cred_path": os.path.abspath(cred_path), "sheet_url": sheet_url, "gid": gid, "anio": int(anio)},
+                actor_id=_actor_id(),
+            )
+
+        job_status("sap_gs_job", _render_gs_result)
     else:
         st.warning("⚠️ No hay credenciales configuradas.")
         uploaded_cred = st.file_uploader("Subir JSON de Service Account", type=["json"], key="gs_cred")
@@ -200,40 +294,3 @@ def _render_gsheets():
 
     st.markdown("---")
     st.markdown("**Alternativa:** También puedes cargar datos usando la pestaña **Cargar CSV** exportando el Sheet como CSV.")
-
-
-def _fetch_google_sheet(cred_path: str, sheet_url: str, gid: str) -> list:
-    """Obtiene datos de Google Sheet usando Service Account."""
-    try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-    except ImportError:
-        st.error("Faltan dependencias. Ejecuta: `pip install gspread google-auth`")
-        return []
-
-    scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-    creds = Credentials.from_service_account_file(cred_path, scopes=scopes)
-    gc = gspread.authorize(creds)
-
-    # Extraer spreadsheet ID de la URL
-    import re
-    match = re.search(r"/d/([a-zA-Z0-9-_]+)", sheet_url)
-    if not match:
-        st.error("URL de Google Sheet inválida")
-        return []
-
-    spreadsheet_id = match.group(1)
-    sh = gc.open_by_key(spreadsheet_id)
-
-    # Buscar la hoja por GID
-    worksheet = None
-    for ws in sh.worksheets():
-        if str(ws.id) == str(gid):
-            worksheet = ws
-            break
-
-    if not worksheet:
-        worksheet = sh.sheet1  # fallback a primera hoja
-
-    records = worksheet.get_all_records()
-    return records
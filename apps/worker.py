@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Worker de trabajos en segundo plano (tabla jobs): sync SAP, cargas CSV y exportes."""
+import os, signal, socket, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from domain.services import jobs_service
+from infra.repositories import fact_costos_repo
+from shared.config import settings
+
+_detener = False
+
+def _on_signal(signum, frame):
+    # Termina el trabajo en curso y sale
+    global _detener
+    _detener = True
+    print(f"Señal {signum}: el worker se detiene al terminar el trabajo actual")
+
+def main():
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+    nombre = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {nombre} esperando trabajos (cada {settings.JOBS_POLL_INTERVAL}s)")
+
+    ultimo_barrido = 0.0
+    ultimo_rebuild = None
+    while not _detener:
+        try:
+            if time.monotonic() - ultimo_barrido > settings.JOBS_STALE_AFTER / 2:
+                n = jobs_service.recuperar_colgados()
+                if n:
+                    print(f"{n} trabajo(s) sin heartbeat reencolados")
+                ultimo_barrido = time.monotonic()
+            # Backfill al arrancar y reconstrucción periódica: las asignaciones sin
+            # fecha_fin se proyectan hasta diciembre del año siguiente al del rebuild
+            if settings.FACT_COSTOS_REBUILD_INTERVAL > 0 and (
+                    ultimo_rebuild is None
+                    or time.monotonic() - ultimo_rebuild > settings.FACT_COSTOS_REBUILD_INTERVAL):
+                t0 = time.perf_counter()
+                n = fact_costos_repo.rebuild()
+                ultimo_rebuild = time.monotonic()
+                print(f"fact_costos_mes reconstruida: {n} filas en {time.perf_counter() - t0:.2f}s")
+            job = jobs_service.tomar(nombre)
+        except Exception as e:
+            # Base caída o reiniciando: reintentar más tarde
+            print(f"Error consultando la cola: {e}")
+            time.sleep(settings.JOBS_POLL_INTERVAL * 5)
+            continue
+        if job is None:
+            time.sleep(settings.JOBS_POLL_INTERVAL)
+            continue
+        t0 = time.perf_counter()
+        print(f"Trabajo {job['id']} ({job['tipo']}) iniciado")
+        ok = jobs_service.ejecutar(job, nombre)
+        print(f"Trabajo {job['id']} {'terminado' if ok else 'con error'} en {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+'''Benchmark: endpoints sync (threadpool) vs. async (aiomysql) bajo concurrencia'''
+# benchmarks/bench_async_db.py
+#
+# Uso:  PYTHONPATH=. python benchmarks/bench_async_db.py [--requests N] [--concurrency 10,50,200]
+#                                                        [--simulate MS]
+#
+# Lanza N requests a GET /personas con distintos niveles de concurrencia contra
+# dos variantes del mismo listado: `def` + personas_service.listar (lo que
+# corría antes, en el threadpool de Starlette, 40 hilos por defecto) y
+# `async def` + personas_service.listar_async. Las requests van por ASGI en
+# proceso (httpx.ASGITransport), sin red, así que la diferencia es el modelo
+# de concurrencia.
+#
+# Por defecto consulta la base configurada en .env. Con --simulate MS no toca
+# la base: reemplaza la consulta por una espera de MS milisegundos (sleep en
+# el hilo para sync, asyncio.sleep para async), para medir solo el efecto del
+# límite de hilos frente a E/S no bloqueante.
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+
+import httpx
+from fastapi import FastAPI
+
+from domain.services import personas_service
+from infra.db.async_connection import async_enabled, close_async_pool
+from infra.repositories import personas_repo
+
+_FAKE_ROWS = [{
+    "id": i, "nombre": f"Persona {i}", "ROL_PRINCIPAL": "Technician I", "COSTO_RECURSO": 30.0,
+    "activo": 1, "NUMERO_DOCUMENTO": str(1000 + i), "numero_contacto": None, "correo": None,
+    "PAIS": "Colombia", "SENIORITY": "Senior", "LIDER_DIRECTO": None, "LIDER_NOMBRE": None,
+    "TIPO_DOCUMENTO": "CC", "vigencia": date(2026, 12, 31),
+} for i in range(1, 11)]
+
+
+def _simulate(ms: float) -> None:
+    delay = ms / 1000
+
+    def list_sync(*args, **kwargs):
+        time.sleep(delay)
+        return _FAKE_ROWS
+
+    async def list_async(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return _FAKE_ROWS
+
+    personas_repo.list_personas = list_sync
+    personas_repo.list_personas_async = list_async
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/personas")
+    def personas_sync():
+        return personas_service.listar(limit=10)
+
+    @app.get("/async/personas")
+    async def personas_async():
+        return await personas_service.listar_async(limit=10)
+
+    return app
+
+
+async def _run(client: httpx.AsyncClient, path: str, total: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            r = await client.get(path)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return total / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", default="10,50,200")
+    ap.add_argument("--simulate", type=float, default=None, help="latencia simulada de la consulta (ms)")
+    args = ap.parse_args()
+
+    if args.simulate is not None:
+        _simulate(args.simulate)
+        origen = f"latencia simulada {args.simulate:g} ms"
+    else:
+        origen = "base configurada (" + ("aiomysql" if async_enabled() else "async sin aiomysql: hilos") + ")"
+    print(f"requests={args.requests}  {origen}")
+    print(f"{'variante':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for conc in [int(c) for c in args.concurrency.split(",")]:
+            for variante in ("sync", "async"):
+                rps, p50, p95 = await _run(client, f"/{variante}/personas", args.requests, conc)
+                print(f"{variante:<8}{conc:>6}{rps:>10.0f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}")
+    await close_async_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+'''Benchmark: compresión de respuestas de la API (bytes y latencia)'''
+# benchmarks/bench_compression.py
+#
+# Uso:  PYTHONPATH=. python benchmarks/bench_compression.py [n_asignaciones]
+#
+# Mide, para un listado tipo /api/asignaciones (JSON completo y NDJSON en
+# streaming), el tamaño final y la latencia de cada codificación pasando por
+# CompressionMiddleware, con una app mínima (sin base de datos).
+import sys
+import time
+import numpy as np
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+import orjson
+
+from apps.api.compression import CompressionMiddleware, available_encodings
+
+
+def _synthetic(n, seed=7):
+    """Filas con la forma de AsignacionListItem."""
+    rng = np.random.default_rng(seed)
+    base = date(2024, 1, 1)
+    roles = ["Technician I", "Technician II", "Technician architect", "Project Manager"]
+    rows = []
+    for i in range(n):
+        fi = base + timedelta(days=int(rng.integers(0, 700)))
+        rows.append({
+            "id": i + 1,
+            "persona_id": int(rng.integers(1, 400)),
+            "persona_nombre": f"Persona {int(rng.integers(1, 400))} Apellido",
+            "proyecto_id": int(rng.integers(1, 300)),
+            "proyecto_nombre": f"Proyecto {int(rng.integers(1, 300))} - Implementación",
+            "rol": roles[int(rng.integers(0, len(roles)))],
+            "dedicacion_horas": float(rng.integers(10, 180)),
+            "fecha_asignacion": fi.isoformat(),
+            "fecha_fin": (fi + timedelta(days=int(rng.integers(30, 400)))).isoformat()
+                         if rng.random() > 0.3 else None,
+            "tarifa": round(float(rng.uniform(20, 90)), 2),
+            "estado": "activa",
+        })
+    return rows
+
+
+def _app(rows, encodings):
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/json")
+    def as_json():
+        return ORJSONResponse(rows)
+
+    @app.get("/ndjson")
+    def as_ndjson():
+        def chunks():
+            for i in range(0, len(rows), 500):
+                yield b"".join(orjson.dumps(r) + b"\n" for r in rows[i:i + 500])
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    if encodings:
+        app.add_middleware(CompressionMiddleware, encodings=encodings)
+    return app
+
+
+def _measure(client, path, accept, reps):
+    times = []
+    size = 0
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        # stream=True: medir los bytes tal como viajan, sin descomprimir
+        with client.stream("GET", path, headers={"Accept-Encoding": accept}) as r:
+            size = sum(len(c) for c in r.iter_raw())
+            enc = r.headers.get("content-encoding", "identity")
+        times.append(time.perf_counter() - t0)
+    return enc, size, sorted(times)[len(times) // 2]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    reps = 5
+    rows = _synthetic(n)
+    print(f"asignaciones={n}  codificaciones disponibles: {', '.join(available_encodings())}")
+    variantes = [("identity", None)] + [(e, [e]) for e in available_encodings()]
+    for path in ("/json", "/ndjson"):
+        print(f"\n{path}")
+        print(f"{'encoding':<10}{'bytes':>12}{'ratio':>8}{'p50 ms':>10}")
+        base = None
+        for accept, encodings in variantes:
+            client = TestClient(_app(rows, encodings))
+            enc, size, p50 = _measure(client, path, accept, reps)
+            base = base or size
+            print(f"{enc:<10}{size:>12,}{base / size:>8.1f}{p50 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''Benchmark: expansión mensual de asignaciones (iterrows vs. explode_months)'''
+# benchmarks/bench_expand_months.py
+#
+# Uso:  PYTHONPATH=. python benchmarks/bench_expand_months.py [n_asignaciones] [año]
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import date
+
+from shared.utils.dates import explode_months
+
+
+def _expand_months(df_colab, year):
+    """
+    Expansión vectorizada con explode_months, con las mismas columnas de costo y
+    facturación que la de referencia (el dashboard financiero ya lee fact_costos_mes;
+    explode_months lo sigue usando el mapa de recursos).
+    """
+    exp = explode_months(df_colab, year)
+    if exp.empty:
+        return pd.DataFrame()
+    tarifa = pd.to_numeric(exp["tarifa"], errors="coerce").fillna(0.0)
+    tarifa = tarifa.where(tarifa > 0, 0.0)
+    costo_recurso = pd.to_numeric(exp["COSTO_RECURSO"], errors="coerce").fillna(0.0)
+    horas = pd.to_numeric(exp["dedicacion_horas"], errors="coerce").astype(float)
+    return pd.DataFrame({
+        "mes": exp["mes"],
+        "trimestre": (exp["mes"] - 1) // 3 + 1,
+        "proyecto_id": exp["proyecto_id"],
+        "proyecto": exp["proyecto"],
+        "cliente": exp["cliente"],
+        "pais": exp["PAIS"],
+        "colaborador": exp["colaborador"],
+        "categoria": exp["categoria"],
+        "seniority": exp["seniority"].where(exp["seniority"].notna(), ""),
+        "horas": horas,
+        "tarifa": tarifa,
+        "costo_recurso": costo_recurso,
+        "costo_mes": costo_recurso * horas,
+        "factura_mes": tarifa * horas,
+    })
+
+
+def _expand_months_iterrows(df_colab, year):
+    """Implementación anterior (una fila Python por asignación y mes), como referencia."""
+    rows = []
+    for _, r in df_colab.iterrows():
+        fi = r["fecha_asignacion"]
+        ff = r["fecha_fin"] if pd.notna(r["fecha_fin"]) else date(year, 12, 31)
+        if hasattr(fi, 'date') and callable(fi.date):
+            fi = fi.date()
+        if hasattr(ff, 'date') and callable(ff.date):
+            ff = ff.date()
+
+        start_m = max(fi.month, 1) if fi.year == year else (1 if fi.year < year else 13)
+        end_m = min(ff.month, 12) if ff.year == year else (12 if ff.year > year else 0)
+        if fi.year < year:
+            start_m = 1
+        if ff.year > year:
+            end_m = 12
+
+        for m in range(start_m, end_m + 1):
+            tarifa = float(r["tarifa"]) if pd.notna(r["tarifa"]) and float(r["tarifa"]) > 0 else 0
+            costo_recurso = float(r["COSTO_RECURSO"]) if pd.notna(r["COSTO_RECURSO"]) else 0
+            horas = float(r["dedicacion_horas"])
+            rows.append({
+                "mes": m,
+                "trimestre": (m - 1) // 3 + 1,
+                "proyecto_id": r["proyecto_id"],
+                "proyecto": r["proyecto"],
+                "cliente": r.get("cliente", ""),
+                "pais": r.get("PAIS", ""),
+                "colaborador": r["colaborador"],
+                "categoria": r["categoria"],
+                "seniority": r["seniority"] if pd.notna(r.get("seniority")) else "",
+                "horas": horas,
+                "tarifa": tarifa,
+                "costo_recurso": costo_recurso,
+                "costo_mes": costo_recurso * horas,
+                "factura_mes": tarifa * horas,
+            })
+    return pd.DataFrame(rows) if rows else pd.DataFrame()
+
+
+def _synthetic(n, year, seed=7):
+    """Asignaciones sintéticas: inicios en año-2..año+1, 30% abiertas, algunas multi-año."""
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp(year - 2, 1, 1)
+    fi = base + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit="D")
+    ff = fi + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D")
+    ff = ff.where(rng.random(n) > 0.3, pd.NaT)
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "persona_id": rng.integers(1, 400, n),
+        "colaborador": [f"Persona {i % 400}" for i in range(n)],
+        "categoria": rng.choice(["Technician I", "Technician II", "Technician architect"], n),
+        "seniority": rng.choice(["Junior", "Senior", None], n),
+        "proyecto_id": rng.integers(1, 300, n),
+        "proyecto": [f"Proyecto {i % 300}" for i in range(n)],
+        "cliente": rng.choice(["ACME", "Globex", None], n),
+        "PAIS": rng.choice(["Colombia", "Perú"], n),
+        "dedicacion_horas": rng.integers(10, 180, n).astype(float),
+        "tarifa": np.where(rng.random(n) > 0.2, rng.uniform(20, 90, n).round(2), 0.0),
+        "COSTO_RECURSO": rng.uniform(10, 60, n).round(2),
+        "fecha_asignacion": fi,
+        "fecha_fin": ff,
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    year = int(sys.argv[2]) if len(sys.argv) > 2 else date.today().year
+    df = _synthetic(n, year)
+
+    t0 = time.perf_counter()
+    old = _expand_months_iterrows(df, year)
+    t1 = time.perf_counter()
+    new = _expand_months(df, year)
+    t2 = time.perf_counter()
+
+    keys = ["proyecto_id", "colaborador", "mes", "horas", "tarifa"]
+    a = old.sort_values(keys).reset_index(drop=True)
+    b = new[old.columns].sort_values(keys).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b, check_dtype=False)
+
+    print(f"asignaciones={n} año={year} filas_mes={len(new)}")
+    print(f"iterrows:    {t1 - t0:8.3f} s")
+    print(f"explode:     {t2 - t1:8.3f} s  (x{(t1 - t0) / max(t2 - t1, 1e-9):.0f})")
+
+
+if __name__ == "__main__":
+    main()
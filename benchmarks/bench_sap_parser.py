@@ -0,0 +1,118 @@
+'''Benchmark: parser del CSV SAP (fila a fila vs. columnar)'''
+# benchmarks/bench_sap_parser.py
+#
+# Uso:  PYTHONPATH=. python benchmarks/bench_sap_parser.py [n_filas] [chunk_size]
+#
+# Genera un CSV sintético con el layout SAP (1% de filas con valores
+# inválidos) y mide, leyéndolo desde memoria, hasta dejar las filas listas
+# para el staging de sap_repo.bulk_load (tuplas):
+# - antes: csv.DictReader + conversión por fila + sap_repo._values por fila;
+# - columnar: iter_csv_frames + parse_csv_frame por bloques (tuplas=True),
+#   y también con salida en dicts, como referencia. Sin base de datos.
+import csv
+import io
+import sys
+import time
+import numpy as np
+
+from domain.services.sap_service import MES_MAP, iter_csv_frames, parse_csv_frame
+from infra.repositories.sap_repo import _values
+
+_HEADER = ["NRO", "ID EMPLEADO SAP", "COLABORADORES", "ID SAP", "PROYECTO SAP", "HORAS MES", "MES",
+           "TIPO NOVEDAD", "TIEMPO NOVEDAD (HRS)", "REPORTE SAP"]
+
+
+def _parse_csv_rows_legacy(csv_rows, anio=2026):
+    """Implementación anterior (una conversión Python por fila), como referencia."""
+    parsed = []
+    for r in csv_rows:
+        horas = r.get("HORAS MES", "0")
+        try:
+            horas = float(str(horas).replace(",", ".").strip())
+        except (ValueError, TypeError):
+            horas = 0
+
+        tiempo_nov = r.get("TIEMPO NOVEDAD (HRS)", "")
+        try:
+            tiempo_nov = float(str(tiempo_nov).replace(",", ".").strip()) if tiempo_nov else None
+        except (ValueError, TypeError):
+            tiempo_nov = None
+
+        reporte = r.get("REPORTE SAP", "TRUE")
+        if isinstance(reporte, str):
+            reporte = reporte.strip().upper() == "TRUE"
+
+        parsed.append({
+            "nro": int(r["NRO"]) if r.get("NRO") and str(r["NRO"]).strip().isdigit() else None,
+            "id_empleado_sap": str(r.get("ID EMPLEADO SAP", "")).strip() or None,
+            "colaborador": str(r.get("COLABORADORES", "")).strip(),
+            "id_sap": str(r.get("ID SAP", "")).strip(),
+            "proyecto_sap": str(r.get("PROYECTO SAP", "")).strip(),
+            "horas_mes": horas,
+            "mes": str(r.get("MES", "")).strip(),
+            "anio": anio,
+            "tipo_novedad": str(r.get("TIPO NOVEDAD", "")).strip() or None,
+            "tiempo_novedad_hrs": tiempo_nov,
+            "reporte_sap": reporte,
+        })
+    return parsed
+
+
+def _synthetic_csv(n, seed=7):
+    rng = np.random.default_rng(seed)
+    meses = list(MES_MAP)
+    novedades = ["", "", "", "Vacaciones", "Incapacidad", "Licencia"]
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(_HEADER)
+    for i in range(n):
+        nov = novedades[int(rng.integers(0, len(novedades)))]
+        horas = f"{rng.uniform(0, 200):.2f}".replace(".", ",") if rng.random() < 0.5 else f"{rng.integers(0, 200)}"
+        row = [i + 1, f"E{int(rng.integers(1000, 9999))}", f"Colaborador {int(rng.integers(1, 3000))}",
+               f"P{int(rng.integers(100, 400))}", f"Proyecto {int(rng.integers(100, 400))} - Soporte",
+               horas, meses[int(rng.integers(0, 12))], nov, f"{rng.integers(1, 40)}" if nov else "",
+               "TRUE" if rng.random() < 0.9 else "FALSE"]
+        if rng.random() < 0.01:  # 1% inválidas
+            row[5] = "n/a"
+        w.writerow(row)
+    return buf.getvalue()
+
+
+def _legacy(text):
+    rows = _parse_csv_rows_legacy(csv.DictReader(io.StringIO(text)))
+    return len([_values(r) for r in rows]), 0
+
+
+def _columnar(text, chunk_size, tuplas):
+    ok = malas = 0
+    for df in iter_csv_frames(io.StringIO(text), chunk_size):
+        filas, errores = parse_csv_frame(df, tuplas=tuplas)
+        ok += len(filas)
+        malas += len(errores)
+    return ok, malas
+
+
+def _measure(fn, reps=3):
+    times = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return out, min(times)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    text = _synthetic_csv(n)
+    print(f"filas={n}  csv={len(text) / 1e6:.1f} MB  chunk={chunk}")
+    print(f"{'parser':<24}{'seg':>8}{'filas/s':>12}{'válidas':>10}{'rechazadas':>12}")
+    for nombre, fn in (("fila a fila (antes)", lambda: _legacy(text)),
+                       ("columnar -> tuplas", lambda: _columnar(text, chunk, True)),
+                       ("columnar -> dicts", lambda: _columnar(text, chunk, False))):
+        (ok, malas), t = _measure(fn)
+        print(f"{nombre:<24}{t:>8.3f}{n / t:>12,.0f}{ok:>10,}{malas:>12,}")
+
+
+if __name__ == "__main__":
+    main()
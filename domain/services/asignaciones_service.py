@@ -1,9 +1,10 @@
 '''Reglas de negocio Asignaciones (placeholder)'''
 # domain/services/asignaciones_service.py
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from datetime import date
 from domain.schemas.asignaciones import AsignacionCreate, AsignacionUpdate, AsignacionEnd, AsignacionListItem
 from infra.repositories import asignaciones_repo, parametros_repo
+from infra.db.connection import unit_of_work
 
 def _validar_entidades(dto: AsignacionCreate | AsignacionUpdate):
     if not asignaciones_repo.exists_persona(dto.persona_id):
@@ -31,18 +32,20 @@ def _validar_carga(persona_id: int, nueva_dedicacion: float) -> Dict[str, Any]:
     return res
 
 def crear(dto: AsignacionCreate) -> Dict[str, Any]:
-    _validar_entidades(dto)
-    info = _validar_carga(dto.persona_id, dto.dedicacion_horas)
-    aid = asignaciones_repo.create_asignacion(dto.dict())
-    info["asignacion_id"] = aid
-    return info
+    with unit_of_work():
+        _validar_entidades(dto)
+        info = _validar_carga(dto.persona_id, dto.dedicacion_horas)
+        aid = asignaciones_repo.create_asignacion(dto.dict())
+        info["asignacion_id"] = aid
+        return info
 
 def actualizar(dto: AsignacionUpdate) -> Dict[str, Any]:
-    _validar_entidades(dto)
-    # Para validar correctamente, restaríamos la dedicación previa si cambia persona; aquí simplificamos:
-    info = _validar_carga(dto.persona_id, dto.dedicacion_horas)
-    asignaciones_repo.update_asignacion(dto.id, dto.dict(exclude={"id"}))
-    return info
+    with unit_of_work():
+        _validar_entidades(dto)
+        # Para validar correctamente, restaríamos la dedicación previa si cambia persona; aquí simplificamos:
+        info = _validar_carga(dto.persona_id, dto.dedicacion_horas)
+        asignaciones_repo.update_asignacion(dto.id, dto.dict(exclude={"id"}))
+        return info
 
 def terminar(dto: AsignacionEnd) -> None:
     if dto.fecha_fin > date.today():
@@ -50,8 +53,52 @@ def terminar(dto: AsignacionEnd) -> None:
         pass
     asignaciones_repo.end_asignacion(dto.id, dto.fecha_fin)
 
-def listar(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None) -> List[AsignacionListItem]:
-    rows = asignaciones_repo.list_asignaciones(persona_id, proyecto_id, solo_activas)
+def listar(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None,
+           after: Optional[int] = None, limit: Optional[int] = None,
+           ids: Optional[List[int]] = None) -> List[AsignacionListItem]:
+    rows = asignaciones_repo.list_asignaciones(persona_id, proyecto_id, solo_activas, after=after, limit=limit, ids=ids)
+    return [AsignacionListItem(**r) for r in rows]
+
+def listar_campos(fields: List[str], persona_id: Optional[int] = None, proyecto_id: Optional[int] = None,
+                  solo_activas: Optional[bool] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return asignaciones_repo.list_asignaciones(persona_id, proyecto_id, solo_activas,
+                                               fields=fields, after=after, limit=limit, ids=ids)
+
+def iterar(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None,
+           proyecto_ids: Optional[List[int]] = None) -> Iterator[AsignacionListItem]:
+    """Como listar, pero en streaming (para exportes grandes)."""
+    rows = asignaciones_repo.iter_asignaciones(persona_id, proyecto_id, solo_activas, proyecto_ids)
+    return (AsignacionListItem(**r) for r in rows)
+
+def obtener(asignacion_id: int) -> Optional[AsignacionListItem]:
+    row = asignaciones_repo.get_asignacion_item(asignacion_id)
+    return AsignacionListItem(**row) if row else None
+
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None,
+                       ids: Optional[List[int]] = None) -> List[AsignacionListItem]:
+    rows = await asignaciones_repo.list_asignaciones_async(persona_id, proyecto_id, solo_activas, after=after, limit=limit, ids=ids)
+    return [AsignacionListItem(**r) for r in rows]
+
+async def listar_campos_async(fields: List[str], persona_id: Optional[int] = None, proyecto_id: Optional[int] = None,
+                              solo_activas: Optional[bool] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                              ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    return await asignaciones_repo.list_asignaciones_async(persona_id, proyecto_id, solo_activas,
+                                                           fields=fields, after=after, limit=limit, ids=ids)
+
+async def obtener_async(asignacion_id: int) -> Optional[AsignacionListItem]:
+    row = await asignaciones_repo.get_asignacion_item_async(asignacion_id)
+    return AsignacionListItem(**row) if row else None
+
+async def listar_por_proyectos_async(proyecto_ids: List[int]) -> List[AsignacionListItem]:
+    rows = await asignaciones_repo.list_asignaciones_by_proyectos_async(proyecto_ids)
+    return [AsignacionListItem(**r) for r in rows]
+
+async def listar_por_personas_async(persona_ids: List[int]) -> List[AsignacionListItem]:
+    rows = await asignaciones_repo.list_asignaciones_by_personas_async(persona_ids)
     return [AsignacionListItem(**r) for r in rows]
 
 def carga(persona_id: int) -> Dict[str, Any]:
@@ -1,6 +1,12 @@
 import bcrypt
-from typing import Optional, Dict, Any
-from infra.repositories import usuarios_repo
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from infra.repositories import eventlog_repo, usuarios_repo
+from shared.config import settings
 
 def verify_credentials(email: str, password: str) -> Optional[Dict[str, Any]]:
     user = usuarios_repo.get_by_email(email)
@@ -14,3 +20,102 @@ def verify_credentials(email: str, password: str) -> Optional[Dict[str, Any]]:
         usuarios_repo.set_last_login(user["id"])
         return user
     return None
+
+# ==================== CACHÉ DE VERIFICACIONES (API) ====================
+# Cada request de la API con Basic auth pagaría un bcrypt.checkpw completo.
+# Se guardan solo verificaciones exitosas, con clave HMAC(SECRET_KEY, email+password)
+# para no retener credenciales en claro. Cada entrada guarda la versión de usuarios
+# (último evento 'usuarios' de event_log) con la que se verificó; en cada hit se
+# compara con la actual, así que un cambio de contraseña, rol o activo hecho en
+# cualquier proceso (p.ej. Streamlit) invalida la caché en el siguiente request.
+
+_cache: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_last_login_written: Dict[int, float] = {}
+_activos: Dict[int, Tuple[float, int, Optional[Dict[str, Any]]]] = {}
+
+def _users_version() -> int:
+    """Versión de la tabla usuarios: un lookup por el índice (entidad, id) de event_log."""
+    return eventlog_repo.max_event_id("usuarios")
+
+def _cache_key(email: str, password: str) -> str:
+    msg = email.lower().encode() + b"\0" + password.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), msg, hashlib.sha256).hexdigest()
+
+def _touch_last_login(user_id: int) -> None:
+    """Escribe ultimo_login como mucho una vez cada LAST_LOGIN_MIN_INTERVAL segundos por usuario."""
+    now = time.monotonic()
+    with _cache_lock:
+        last = _last_login_written.get(user_id)
+        if last is not None and now - last < settings.LAST_LOGIN_MIN_INTERVAL:
+            return
+        _last_login_written[user_id] = now
+    usuarios_repo.set_last_login(user_id)
+
+def verify_credentials_cached(email: str, password: str) -> Optional[Dict[str, Any]]:
+    """Como verify_credentials, pero reutiliza verificaciones exitosas recientes."""
+    if settings.AUTH_CACHE_TTL <= 0:
+        return verify_credentials(email, password)
+    key = _cache_key(email, password)
+    now = time.monotonic()
+    # Se lee antes que el usuario: un cambio posterior deja la entrada vieja
+    version = _users_version()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now and hit[1] == version:
+            _cache.move_to_end(key)
+            user = dict(hit[2])
+        else:
+            user = None
+            if hit:
+                del _cache[key]
+    if user:
+        _touch_last_login(user["id"])
+        return user
+
+    user = usuarios_repo.get_by_email(email)
+    if not user or not user.get("hash_password"):
+        return None
+    if not bcrypt.checkpw(password.encode(), str(user["hash_password"]).strip().encode()):
+        return None
+    with _cache_lock:
+        _cache[key] = (now + settings.AUTH_CACHE_TTL, version, dict(user))
+        _cache.move_to_end(key)
+        while len(_cache) > settings.AUTH_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    _touch_last_login(user["id"])
+    return user
+
+def active_user_cached(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Usuario `user_id` si existe y sigue activo (None si no), para validar tokens
+    Bearer. Mismo TTL y versión de usuarios que las verificaciones Basic.
+    """
+    if settings.AUTH_CACHE_TTL <= 0:
+        user = usuarios_repo.get_by_id(user_id)
+        return user if user and user.get("activo") else None
+    now = time.monotonic()
+    version = _users_version()
+    with _cache_lock:
+        hit = _activos.get(user_id)
+        if hit and hit[0] > now and hit[1] == version:
+            return dict(hit[2]) if hit[2] else None
+    user = usuarios_repo.get_by_id(user_id)
+    if user and not user.get("activo"):
+        user = None
+    with _cache_lock:
+        _activos[user_id] = (now + settings.AUTH_CACHE_TTL, version, dict(user) if user else None)
+        if len(_activos) > settings.AUTH_CACHE_MAX_ENTRIES:
+            _activos.pop(next(iter(_activos)))
+    return user
+
+def invalidate_user(user_id: Optional[int] = None) -> None:
+    """Descarta las verificaciones cacheadas de un usuario (o todas si user_id es None)."""
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+            _activos.clear()
+            return
+        _activos.pop(user_id, None)
+        for key in [k for k, (_, _v, u) in _cache.items() if u.get("id") == user_id]:
+            del _cache[key]
@@ -0,0 +1,83 @@
+# domain/services/cambios_service.py
+from typing import Dict, Any, List, Optional
+from infra.repositories import eventlog_repo
+from shared.config import settings
+from domain.services import (
+    personas_service,
+    proyectos_service,
+    sprints_service,
+    asignaciones_service,
+    documentos_service,
+    perfiles_service,
+)
+
+# Entidades publicadas en el feed -> cómo obtener el estado actual de un id
+ENTIDADES = {
+    "personas": personas_service.obtener,
+    "proyectos": proyectos_service.obtener,
+    "sprints": sprints_service.obtener,
+    "asignaciones": asignaciones_service.obtener,
+    "documentos": documentos_service.obtener,
+    "perfiles": perfiles_service.obtener,
+}
+
+# Entidades con lookup en lote (un solo WHERE id IN) para armar el detalle
+_LOTE = {
+    "personas": personas_service.listar,
+    "proyectos": proyectos_service.listar,
+    "sprints": sprints_service.listar,
+    "asignaciones": asignaciones_service.listar,
+}
+
+MAX_EVENTOS = 5000
+
+def _actuales(entidad: str, ids: List[int]) -> Dict[int, Any]:
+    """Estado actual de `ids` ({id: objeto}); los que ya no existen no aparecen."""
+    if not ids:
+        return {}
+    if entidad in _LOTE:
+        return {obj.id: obj for obj in _LOTE[entidad](ids=ids)}
+    obtener = ENTIDADES[entidad]
+    return {i: obj for i in ids if (obj := obtener(i)) is not None}
+
+def cambios_desde(since: int, entidades: Optional[List[str]] = None, limit: int = 1000,
+                  detalle: bool = False) -> Dict[str, Any]:
+    """
+    Cambios registrados en event_log después del evento `since`, agrupados por entidad.
+    - actualizados: ids creados/modificados (o los objetos actuales si detalle=True)
+    - eliminados: ids cuyo último evento es un delete (o que ya no existen)
+    - hasta: high-water mark; el consumidor lo guarda y lo pasa como próximo since.
+      Solo cubre eventos con más de CHANGES_LAG_SECONDS de antigüedad, para no
+      saltearse ids menores de transacciones que todavía no hicieron commit.
+    - hay_mas: se cortó en `limit` eventos; repetir con since=hasta.
+    Un mismo id aparece una sola vez, según su último evento dentro del tramo.
+    """
+    entidades = [e for e in (entidades or ENTIDADES) if e in ENTIDADES]
+    limit = max(1, min(limit, MAX_EVENTOS))
+    eventos = eventlog_repo.events_since(since, entidades, limit, lag=settings.CHANGES_LAG_SECONDS)
+
+    ultimo: Dict[str, Dict[int, str]] = {e: {} for e in entidades}
+    for ev in eventos:
+        if ev["entidad_id"] is None:
+            continue
+        ultimo[ev["entidad"]][int(ev["entidad_id"])] = ev["tipo"]
+
+    cambios: Dict[str, Any] = {}
+    for entidad, por_id in ultimo.items():
+        if not por_id:
+            continue
+        vivos = [i for i, tipo in por_id.items() if tipo != "delete"]
+        eliminados = [i for i, tipo in por_id.items() if tipo == "delete"]
+        if detalle:
+            actuales = _actuales(entidad, vivos)
+            # Eliminado después del tramo
+            eliminados.extend(i for i in vivos if i not in actuales)
+            vivos = [actuales[i] for i in vivos if i in actuales]
+        cambios[entidad] = {"actualizados": vivos, "eliminados": sorted(eliminados)}
+
+    return {
+        "desde": since,
+        "hasta": eventos[-1]["id"] if eventos else since,
+        "hay_mas": len(eventos) == limit,
+        "cambios": cambios,
+    }
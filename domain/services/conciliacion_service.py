@@ -0,0 +1,208 @@
+# domain/services/conciliacion_service.py
+"""
+Conciliación de horas: lo reportado en SAP (sap_report.horas_mes) contra lo
+planificado en asignaciones (fact_costos_mes.horas), por persona, proyecto y mes.
+- colaborador SAP -> persona: nombre normalizado (sin tildes, mayúsculas,
+  espacios colapsados) y, si no hay match, mismas palabras en otro orden;
+- proyecto SAP -> proyecto: ID SAP de los anexos (documentos.id_sap) y, si no
+  hay, nombre normalizado igual al del proyecto.
+Solo se aceptan matches únicos; lo demás queda en `sin_match`.
+El año completo se calcula en una sola pasada con pandas y se cachea por
+versión de datos (último id de event_log) y tolerancia.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from domain.services.sap_service import MES_MAP
+from infra.repositories import (
+    documentos_repo,
+    eventlog_repo,
+    fact_costos_repo,
+    parametros_repo,
+    personas_repo,
+    proyectos_repo,
+    sap_repo,
+)
+
+MES_NOMBRE = {n: m for m, n in MES_MAP.items()}
+ESTADOS = ("OK", "Sobre plan", "Bajo plan", "Sin plan", "Sin reporte")
+
+# Entidades de las que depende el resultado (validadores de la API)
+ENTIDADES = ("sap_report", "asignaciones", "personas", "proyectos", "documentos", "fact_costos")
+
+_CACHE_MAX = 8
+_cache: "OrderedDict[Tuple[int, int, float], Dict[str, pd.DataFrame]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def tolerancia() -> float:
+    """Desvío relativo sobre lo planificado que todavía se considera conciliado."""
+    return parametros_repo.get_float("CONCILIACION_TOLERANCIA", 0.10)
+
+
+def _normalizar(s: pd.Series) -> pd.Series:
+    return (s.fillna("").astype(str)
+            .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.upper().str.replace(r"[^A-Z0-9]+", " ", regex=True).str.strip())
+
+
+def _tokens(s: pd.Series) -> pd.Series:
+    """Palabras ordenadas: 'PEREZ JUAN' y 'JUAN PEREZ' dan la misma clave."""
+    return s.str.split().map(lambda t: " ".join(sorted(t)))
+
+
+def _unicos(claves: pd.Series, ids: pd.Series) -> pd.Series:
+    """clave -> id, descartando las claves vacías o que apuntan a más de un id."""
+    df = pd.DataFrame({"clave": claves.to_numpy(), "id": ids.to_numpy()}).drop_duplicates()
+    df = df[(df["clave"] != "") & ~df["clave"].duplicated(keep=False)]
+    return df.set_index("clave")["id"]
+
+
+def _match_nombres(nombres: pd.Series, ref_nombres: pd.Series, ref_ids: pd.Series) -> pd.Series:
+    """id de referencia para cada nombre (NA si no hay match único)."""
+    norm, ref_norm = _normalizar(nombres), _normalizar(ref_nombres)
+    ids = norm.map(_unicos(ref_norm, ref_ids))
+    faltan = ids.isna()
+    if faltan.any():
+        ids[faltan] = _tokens(norm[faltan]).map(_unicos(_tokens(ref_norm), ref_ids))
+    return ids.astype("Int64")
+
+
+def _frame(rows: List[Dict[str, Any]], cols: List[str]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=cols)
+
+
+def _calcular(anio: int, tolerancia: float) -> Dict[str, pd.DataFrame]:
+    sap = _frame(sap_repo.list_horas_anio(anio),
+                 ["mes", "colaborador", "id_sap", "proyecto_sap", "horas_mes", "tiempo_novedad_hrs"])
+    plan = _frame(fact_costos_repo.list_mensual(anio),
+                  ["proyecto_id", "persona_id", "anio", "mes", "horas", "costo", "factura"])
+    personas = _frame(personas_repo.list_personas(fields=["nombre"]), ["id", "nombre"])
+    proyectos = _frame(proyectos_repo.list_proyectos(fields=["NOMBRE"]), ["id", "NOMBRE"])
+    anexos = _frame(documentos_repo.list_id_sap_proyectos(), ["id_sap", "proyecto_id"])
+
+    sap["mes"] = sap["mes"].map(MES_MAP).astype("Int64")
+    sap = sap[sap["mes"].notna()]
+    sap["horas_mes"] = pd.to_numeric(sap["horas_mes"], errors="coerce").fillna(0.0).astype(float)
+    sap["tiempo_novedad_hrs"] = pd.to_numeric(sap["tiempo_novedad_hrs"], errors="coerce").fillna(0.0).astype(float)
+
+    # Los matches se resuelven sobre valores únicos y se llevan a las filas con merge
+    colabs = pd.DataFrame({"colaborador": sap["colaborador"].unique()})
+    colabs["persona_id"] = _match_nombres(colabs["colaborador"], personas["nombre"], personas["id"])
+    proys = sap[["id_sap", "proyecto_sap"]].drop_duplicates().reset_index(drop=True)
+    por_id_sap = _unicos(anexos["id_sap"].astype(str).str.strip(), anexos["proyecto_id"])
+    proys["proyecto_id"] = proys["id_sap"].astype(str).str.strip().map(por_id_sap).astype("Int64")
+    faltan = proys["proyecto_id"].isna()
+    if faltan.any():
+        proys.loc[faltan, "proyecto_id"] = _match_nombres(
+            proys.loc[faltan, "proyecto_sap"], proyectos["NOMBRE"], proyectos["id"]).to_numpy()
+    sap = sap.merge(colabs, on="colaborador", how="left").merge(proys, on=["id_sap", "proyecto_sap"], how="left")
+
+    con_match = sap["persona_id"].notna() & sap["proyecto_id"].notna()
+    claves = ["persona_id", "proyecto_id", "mes"]
+    reportado = (sap[con_match].groupby(claves, as_index=False)
+                 .agg(reportadas=("horas_mes", "sum"), novedad_hrs=("tiempo_novedad_hrs", "sum")))
+
+    # Solo se comparan los meses que ya tienen reporte SAP cargado
+    meses = sorted(int(m) for m in sap["mes"].unique())
+    plan = plan[plan["mes"].astype(int).isin(meses)]
+    planificado = (plan.assign(horas=pd.to_numeric(plan["horas"]).astype(float))
+                   .astype({"persona_id": "Int64", "proyecto_id": "Int64", "mes": "Int64"})
+                   .groupby(claves, as_index=False).agg(planificadas=("horas", "sum")))
+
+    detalle = planificado.merge(reportado, on=claves, how="outer")
+    detalle[["planificadas", "reportadas", "novedad_hrs"]] = (
+        detalle[["planificadas", "reportadas", "novedad_hrs"]].fillna(0.0))
+    detalle["delta"] = detalle["reportadas"] - detalle["planificadas"]
+    plan_pos = detalle["planificadas"] > 0
+    detalle["delta_pct"] = (detalle["delta"] / detalle["planificadas"].where(plan_pos)).round(4)
+    fuera = detalle["delta"].abs() > tolerancia * detalle["planificadas"]
+    ok, sobre, bajo, sin_plan, sin_reporte = ESTADOS
+    detalle["estado"] = ok
+    detalle.loc[fuera & (detalle["delta"] > 0), "estado"] = sobre
+    detalle.loc[fuera & (detalle["delta"] < 0), "estado"] = bajo
+    detalle.loc[~plan_pos & (detalle["reportadas"] > 0), "estado"] = sin_plan
+    detalle.loc[plan_pos & (detalle["reportadas"] == 0), "estado"] = sin_reporte
+    detalle = (detalle
+               .merge(personas.rename(columns={"id": "persona_id", "nombre": "persona"})
+                      .astype({"persona_id": "Int64"}), on="persona_id", how="left")
+               .merge(proyectos.rename(columns={"id": "proyecto_id", "NOMBRE": "proyecto"})
+                      .astype({"proyecto_id": "Int64"}), on="proyecto_id", how="left"))
+    detalle["mes_nombre"] = detalle["mes"].map(MES_NOMBRE)
+    detalle = detalle.sort_values(["mes", "persona", "proyecto"], ignore_index=True)
+
+    sin = sap[~con_match].copy()
+    sin["motivo"] = "Colaborador y proyecto sin match"
+    sin.loc[sin["persona_id"].notna(), "motivo"] = "Proyecto SAP sin proyecto"
+    sin.loc[sin["proyecto_id"].notna(), "motivo"] = "Colaborador sin persona"
+    sin_match = (sin.groupby(["colaborador", "id_sap", "proyecto_sap", "motivo"], as_index=False)
+                 .agg(horas=("horas_mes", "sum"), meses=("mes", "nunique"))
+                 .sort_values("horas", ascending=False, ignore_index=True))
+
+    por_mes = (detalle.groupby("mes", as_index=False)[["planificadas", "reportadas", "delta"]].sum()
+               .merge(sin.groupby("mes", as_index=False).agg(sin_match_hrs=("horas_mes", "sum")),
+                      on="mes", how="outer")
+               .fillna(0.0))
+    por_mes["mes_nombre"] = por_mes["mes"].map(MES_NOMBRE)
+
+    return {
+        "detalle": detalle,
+        "sin_match": sin_match,
+        "por_mes": por_mes.sort_values("mes", ignore_index=True),
+        "totales": pd.DataFrame([{
+            "colaboradores_sap": len(colabs),
+            "colaboradores_match": int(colabs["persona_id"].notna().sum()),
+            "proyectos_sap": len(proys),
+            "proyectos_match": int(proys["proyecto_id"].notna().sum()),
+            "horas_sap": float(sap["horas_mes"].sum()),
+            "horas_sin_match": float(sin["horas_mes"].sum()),
+        }]),
+    }
+
+
+def calcular(anio: int) -> Dict[str, pd.DataFrame]:
+    """
+    DataFrames de la conciliación del año (detalle, sin_match, por_mes, totales),
+    cacheados por (anio, versión de datos, tolerancia). Son compartidos: no modificarlos.
+    """
+    key = (anio, eventlog_repo.max_event_id(), tolerancia())
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+    res = _calcular(anio, key[2])
+    with _cache_lock:
+        _cache[key] = res
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return res
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def conciliar(anio: int, estado: Optional[str] = None, persona_id: Optional[int] = None,
+              proyecto_id: Optional[int] = None) -> Dict[str, Any]:
+    """Conciliación del año como dicts (API), con filtros opcionales sobre el detalle."""
+    res = calcular(anio)
+    detalle = res["detalle"]
+    if estado:
+        detalle = detalle[detalle["estado"] == estado]
+    if persona_id is not None:
+        detalle = detalle[detalle["persona_id"] == persona_id]
+    if proyecto_id is not None:
+        detalle = detalle[detalle["proyecto_id"] == proyecto_id]
+    return {
+        "anio": anio,
+        "meses": [int(m) for m in res["por_mes"]["mes"]],
+        "totales": _records(res["totales"])[0],
+        "por_mes": _records(res["por_mes"]),
+        "detalle": _records(detalle),
+        "sin_match": _records(res["sin_match"]),
+    }
@@ -1,5 +1,5 @@
 # domain/services/documentos_service.py
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from domain.schemas.documentos import DocumentoCreate, DocumentoUpdate, DocumentoListItem
 from infra.repositories import documentos_repo
 import os
@@ -27,15 +27,39 @@ def eliminar(doc_id: int) -> None:
             pass  # Continuar aunque falle eliminar el archivo
     documentos_repo.delete_documento(doc_id)
 
-def listar(proyecto_id: Optional[int] = None, search: Optional[str] = None) -> List[DocumentoListItem]:
-    rows = documentos_repo.list_documentos(proyecto_id, search)
+def listar(proyecto_id: Optional[int] = None, search: Optional[str] = None,
+           after: Optional[int] = None, limit: Optional[int] = None) -> List[DocumentoListItem]:
+    rows = documentos_repo.list_documentos(proyecto_id, search, after=after, limit=limit)
     return [DocumentoListItem(**r) for r in rows]
 
+def listar_campos(fields: List[str], proyecto_id: Optional[int] = None, search: Optional[str] = None,
+                  after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return documentos_repo.list_documentos(proyecto_id, search, fields=fields, after=after, limit=limit)
+
 def obtener(doc_id: int) -> Optional[DocumentoListItem]:
     doc = documentos_repo.get_documento(doc_id)
     if doc:
         return DocumentoListItem(**doc)
     return None
 
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(proyecto_id: Optional[int] = None, search: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> List[DocumentoListItem]:
+    rows = await documentos_repo.list_documentos_async(proyecto_id, search, after=after, limit=limit)
+    return [DocumentoListItem(**r) for r in rows]
+
+async def listar_campos_async(fields: List[str], proyecto_id: Optional[int] = None, search: Optional[str] = None,
+                              after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await documentos_repo.list_documentos_async(proyecto_id, search, fields=fields, after=after, limit=limit)
+
+async def obtener_async(doc_id: int) -> Optional[DocumentoListItem]:
+    doc = await documentos_repo.get_documento_async(doc_id)
+    return DocumentoListItem(**doc) if doc else None
+
+async def listar_por_proyectos_async(proyecto_ids: List[int]) -> List[DocumentoListItem]:
+    rows = await documentos_repo.list_documentos_by_proyectos_async(proyecto_ids)
+    return [DocumentoListItem(**r) for r in rows]
+
 def contar_por_proyecto(proyecto_id: int) -> int:
     return documentos_repo.count_by_proyecto(proyecto_id)
@@ -0,0 +1,161 @@
+# domain/services/jobs_service.py
+"""
+Trabajos en segundo plano: la UI encola (encolar) y consulta el estado
+(obtener); apps/worker.py los toma de la tabla jobs y los ejecuta.
+Cada tipo de trabajo es una función handler(params, progreso) -> resultado.
+"""
+import os
+import threading
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from domain.services import sap_service
+from infra.repositories import eventlog_repo, jobs_repo
+from shared.config import settings
+from shared.utils.exports import export_rows
+
+Progreso = Callable[[Dict[str, Any]], None]
+
+_EXPORT_PROGRESO_CADA = 5000
+
+
+class TrabajoTomado(RuntimeError):
+    """El trabajo se reencoló (sin heartbeat) y ya no pertenece a este worker."""
+
+
+def _sap_csv(params: Dict[str, Any], progreso: Progreso) -> Dict[str, Any]:
+    def on_chunk(info):
+        progreso({"mensaje": f"Bloque {info['bloque']}: {info['acumulado']} filas cargadas "
+                             f"({info['filas_s'] or 0:,} filas/s)", **info})
+
+    path = params["path"]
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return sap_service.cargar_csv(f, anio=params["anio"], reemplazar=params.get("reemplazar", False),
+                                          on_chunk=on_chunk)
+    except TrabajoTomado:
+        path = None  # el archivo lo sigue leyendo el worker que tomó el trabajo
+        raise
+    finally:
+        # El archivo subido solo sirve para este trabajo
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def _sap_gsheets(params: Dict[str, Any], progreso: Progreso) -> Dict[str, Any]:
+    progreso({"mensaje": "Leyendo Google Sheet..."})
+    rows = sap_service.leer_google_sheet(params["cred_path"], params["sheet_url"], params["gid"])
+    if not rows:
+        raise ValueError("No se obtuvieron datos del Sheet.")
+    progreso({"mensaje": f"{len(rows)} filas leídas; sincronizando..."})
+    return sap_service.sincronizar(
+        rows, anio=params["anio"],
+        on_chunk=lambda info: progreso({"mensaje": f"{info['acumulado']}/{len(rows)} filas en staging", **info}),
+    )
+
+
+def _export_eventlog(params: Dict[str, Any], progreso: Progreso) -> Dict[str, Any]:
+    conteo = {"filas": 0}
+
+    def contar(rows):
+        for r in rows:
+            conteo["filas"] += 1
+            if conteo["filas"] % _EXPORT_PROGRESO_CADA == 0:
+                progreso({"mensaje": f"{conteo['filas']:,} eventos exportados", "filas": conteo["filas"]})
+            yield r
+
+    rows = eventlog_repo.iter_events(params.get("entidad"), params.get("tipo"))
+    path = export_rows(contar(rows), "event_log", params.get("fmt", "csv"), params.get("comprimir", False))
+    return {"path": path, "filas": conteo["filas"]}
+
+
+# tipo -> handler
+HANDLERS: Dict[str, Callable[[Dict[str, Any], Progreso], Dict[str, Any]]] = {
+    "sap_csv": _sap_csv,
+    "sap_gsheets": _sap_gsheets,
+    "export_eventlog": _export_eventlog,
+}
+
+
+def encolar(tipo: str, params: Dict[str, Any], actor_id: Optional[int] = None) -> int:
+    if tipo not in HANDLERS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    return jobs_repo.create_job(tipo, params, actor_id)
+
+
+def guardar_archivo(data: bytes, suffix: str = "") -> str:
+    """Guarda una entrada del trabajo (p. ej. un CSV subido) donde el worker la pueda leer."""
+    Path(settings.JOBS_DIR).mkdir(parents=True, exist_ok=True)
+    path = Path(settings.JOBS_DIR) / f"{uuid.uuid4().hex}{suffix}"
+    path.write_bytes(data)
+    return str(path)
+
+
+def obtener(job_id: int) -> Optional[Dict[str, Any]]:
+    return jobs_repo.get_job(job_id)
+
+
+def listar(tipo: Optional[str] = None, actor_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    return jobs_repo.list_jobs(tipo=tipo, actor_id=actor_id, limit=limit)
+
+
+def tomar(worker: str) -> Optional[Dict[str, Any]]:
+    return jobs_repo.claim_next(worker)
+
+
+def recuperar_colgados() -> int:
+    """Reencola los trabajos de workers que dejaron de dar señales."""
+    return jobs_repo.requeue_stale(settings.JOBS_STALE_AFTER, settings.JOBS_MAX_INTENTOS)
+
+
+def ejecutar(job: Dict[str, Any], worker: str) -> bool:
+    """
+    Corre el handler del trabajo ya reclamado por `worker` y guarda resultado o error.
+    Un hilo renueva el heartbeat mientras tanto, para que un paso largo sin
+    progreso (p. ej. el merge) no se confunda con un worker caído.
+    Si el trabajo se reencoló (p. ej. tras una pausa larga) y ya no es de `worker`,
+    se abandona en el siguiente avance, sin pisar el estado que escriba el otro worker.
+    """
+    job_id = job["id"]
+    fin = threading.Event()
+    tomado = threading.Event()
+
+    def latido():
+        while not fin.wait(settings.JOBS_HEARTBEAT):
+            try:
+                if not jobs_repo.update_progress(job_id, worker):
+                    tomado.set()
+                    return
+            except Exception:
+                pass
+
+    def progreso(p: Dict[str, Any]) -> None:
+        # La excepción corta el handler; las cargas SAP hacen rollback de su transacción
+        if tomado.is_set() or not jobs_repo.update_progress(job_id, worker, p):
+            tomado.set()
+            raise TrabajoTomado(f"Trabajo {job_id} reencolado; lo continúa otro worker")
+
+    hilo = threading.Thread(target=latido, name=f"job-{job_id}-heartbeat", daemon=True)
+    hilo.start()
+    try:
+        handler = HANDLERS.get(job["tipo"])
+        if handler is None:
+            raise ValueError(f"Tipo de trabajo desconocido: {job['tipo']}")
+        resultado = handler(job.get("params") or {}, progreso)
+    except TrabajoTomado as e:
+        print(e)
+        return False
+    except Exception as e:
+        traceback.print_exc()
+        if not jobs_repo.fail_job(job_id, worker, f"{type(e).__name__}: {e}"):
+            print(f"Trabajo {job_id} reencolado; no se registra el error")
+        return False
+    finally:
+        fin.set()
+        hilo.join()
+    if not jobs_repo.finish_job(job_id, worker, resultado):
+        print(f"Trabajo {job_id} reencolado; no se registra el resultado")
+        return False
+    return True
@@ -1,39 +1,62 @@
 '''Reglas de negocio Perfiles'''
 # domain/services/perfiles_service.py
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from domain.schemas.perfiles import PerfilCreate, PerfilUpdate, PerfilListItem
 from infra.repositories import perfiles_repo
+from infra.db.connection import unit_of_work
 
 def crear(dto: PerfilCreate) -> int:
     """Crea un nuevo perfil"""
-    # Validar que no exista el nombre
-    if perfiles_repo.exists_nombre(dto.nombre):
-        raise ValueError(f"Ya existe un perfil con el nombre '{dto.nombre}'")
-    
-    return perfiles_repo.create_perfil(dto.nombre, tarifa_sin_iva=dto.tarifa_sin_iva, vigencia=dto.vigencia)
+    with unit_of_work():
+        # Validar que no exista el nombre
+        if perfiles_repo.exists_nombre(dto.nombre):
+            raise ValueError(f"Ya existe un perfil con el nombre '{dto.nombre}'")
+        
+        return perfiles_repo.create_perfil(dto.nombre, tarifa_sin_iva=dto.tarifa_sin_iva, vigencia=dto.vigencia)
 
 def actualizar(dto: PerfilUpdate) -> None:
     """Actualiza un perfil existente"""
-    # Validar que no exista otro perfil con el mismo nombre
-    if perfiles_repo.exists_nombre(dto.nombre, exclude_id=dto.id):
-        raise ValueError(f"Ya existe otro perfil con el nombre '{dto.nombre}'")
-    
-    perfiles_repo.update_perfil(dto.id, dto.nombre, dto.activo, tarifa_sin_iva=dto.tarifa_sin_iva, vigencia=dto.vigencia)
+    with unit_of_work():
+        # Validar que no exista otro perfil con el mismo nombre
+        if perfiles_repo.exists_nombre(dto.nombre, exclude_id=dto.id):
+            raise ValueError(f"Ya existe otro perfil con el nombre '{dto.nombre}'")
+        
+        perfiles_repo.update_perfil(dto.id, dto.nombre, dto.activo, tarifa_sin_iva=dto.tarifa_sin_iva, vigencia=dto.vigencia)
 
 def eliminar(perfil_id: int) -> None:
     """Elimina un perfil"""
     perfiles_repo.delete_perfil(perfil_id)
 
-def listar(solo_activos: Optional[bool] = None, search: Optional[str] = None) -> List[PerfilListItem]:
+def listar(solo_activos: Optional[bool] = None, search: Optional[str] = None,
+           after: Optional[int] = None, limit: Optional[int] = None) -> List[PerfilListItem]:
     """Lista perfiles con filtros"""
-    rows = perfiles_repo.list_perfiles(solo_activos, search)
+    rows = perfiles_repo.list_perfiles(solo_activos, search, after=after, limit=limit)
     return [PerfilListItem(**r) for r in rows]
 
+def listar_campos(fields: List[str], solo_activos: Optional[bool] = None, search: Optional[str] = None,
+                  after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)"""
+    return perfiles_repo.list_perfiles(solo_activos, search, fields=fields, after=after, limit=limit)
+
 def obtener(perfil_id: int) -> Optional[PerfilListItem]:
     """Obtiene un perfil por ID"""
     row = perfiles_repo.get_perfil(perfil_id)
     return PerfilListItem(**row) if row else None
 
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(solo_activos: Optional[bool] = None, search: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> List[PerfilListItem]:
+    rows = await perfiles_repo.list_perfiles_async(solo_activos, search, after=after, limit=limit)
+    return [PerfilListItem(**r) for r in rows]
+
+async def listar_campos_async(fields: List[str], solo_activos: Optional[bool] = None, search: Optional[str] = None,
+                              after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await perfiles_repo.list_perfiles_async(solo_activos, search, fields=fields, after=after, limit=limit)
+
+async def obtener_async(perfil_id: int) -> Optional[PerfilListItem]:
+    row = await perfiles_repo.get_perfil_async(perfil_id)
+    return PerfilListItem(**row) if row else None
+
 def cambiar_estado(perfil_id: int, activo: bool) -> None:
     """Activa o desactiva un perfil"""
     perfiles_repo.set_activo(perfil_id, activo)
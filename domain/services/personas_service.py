@@ -1,33 +1,35 @@
 '''Reglas de negocio Personas (placeholder)'''
 # domain/services/personas_service.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from domain.schemas.personas import PersonaCreate, PersonaUpdate, PersonaListItem
 from infra.repositories import personas_repo
+from infra.db.connection import unit_of_work
 
 def crear(dto: PersonaCreate) -> int:
-    if personas_repo.exists_nombre(dto.nombre):
-        raise ValueError("Ya existe una persona con ese nombre.")
-    return personas_repo.create_persona(
-        dto.nombre, dto.ROL_PRINCIPAL, dto.COSTO_RECURSO, 
-        dto.NUMERO_DOCUMENTO, dto.numero_contacto, dto.correo,
-        dto.PAIS, dto.SENIORITY, dto.LIDER_DIRECTO, dto.TIPO_DOCUMENTO, True, dto.vigencia
-    )
+    with unit_of_work():
+        if personas_repo.exists_nombre(dto.nombre):
+            raise ValueError("Ya existe una persona con ese nombre.")
+        return personas_repo.create_persona(
+            dto.nombre, dto.ROL_PRINCIPAL, dto.COSTO_RECURSO, 
+            dto.NUMERO_DOCUMENTO, dto.numero_contacto, dto.correo,
+            dto.PAIS, dto.SENIORITY, dto.LIDER_DIRECTO, dto.TIPO_DOCUMENTO, True, dto.vigencia
+        )
 
 def actualizar(dto: PersonaUpdate) -> None:
-    if personas_repo.exists_nombre(dto.nombre, exclude_id=dto.id):
-        raise ValueError("Ya existe otra persona con ese nombre.")
-    personas_repo.update_persona(
-        dto.id, dto.nombre, dto.ROL_PRINCIPAL, dto.COSTO_RECURSO,
-        dto.NUMERO_DOCUMENTO, dto.numero_contacto, dto.correo,
-        dto.PAIS, dto.SENIORITY, dto.LIDER_DIRECTO, dto.TIPO_DOCUMENTO, dto.activo, dto.vigencia
-    )
+    with unit_of_work():
+        if personas_repo.exists_nombre(dto.nombre, exclude_id=dto.id):
+            raise ValueError("Ya existe otra persona con ese nombre.")
+        personas_repo.update_persona(
+            dto.id, dto.nombre, dto.ROL_PRINCIPAL, dto.COSTO_RECURSO,
+            dto.NUMERO_DOCUMENTO, dto.numero_contacto, dto.correo,
+            dto.PAIS, dto.SENIORITY, dto.LIDER_DIRECTO, dto.TIPO_DOCUMENTO, dto.activo, dto.vigencia
+        )
 
 def cambiar_estado(persona_id: int, activo: bool) -> None:
     personas_repo.set_activo(persona_id, activo)
 
-def listar(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None) -> List[PersonaListItem]:
-    rows = personas_repo.list_personas(rol, solo_activas, search)
-    return [PersonaListItem(**{
+def _to_item(r: Dict[str, Any]) -> PersonaListItem:
+    return PersonaListItem(**{
         "id": r["id"],
         "nombre": r["nombre"],
         "ROL_PRINCIPAL": r["ROL_PRINCIPAL"],
@@ -42,15 +44,52 @@ def listar(rol: Optional[str] = None, solo_activas: Optional[bool] = None, searc
         "LIDER_NOMBRE": r.get("LIDER_NOMBRE"),
         "TIPO_DOCUMENTO": r.get("TIPO_DOCUMENTO"),
         "vigencia": r.get("vigencia"),
-    }) for r in rows]
+    })
+
+def listar(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None,
+           after: Optional[int] = None, limit: Optional[int] = None,
+           ids: Optional[List[int]] = None) -> List[PersonaListItem]:
+    rows = personas_repo.list_personas(rol, solo_activas, search, after=after, limit=limit, ids=ids)
+    return [_to_item(r) for r in rows]
+
+def listar_campos(fields: List[str], rol: Optional[str] = None, solo_activas: Optional[bool] = None,
+                  search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return personas_repo.list_personas(rol, solo_activas, search, fields=fields, after=after, limit=limit, ids=ids)
+
+def iterar(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None) -> Iterator[PersonaListItem]:
+    """Como listar, pero en streaming (para exportes grandes)."""
+    return (_to_item(r) for r in personas_repo.iter_personas(rol, solo_activas, search))
+
+def obtener(persona_id: int) -> Optional[PersonaListItem]:
+    row = personas_repo.get_persona_item(persona_id)
+    return _to_item(row) if row else None
+
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None,
+                       ids: Optional[List[int]] = None) -> List[PersonaListItem]:
+    rows = await personas_repo.list_personas_async(rol, solo_activas, search, after=after, limit=limit, ids=ids)
+    return [_to_item(r) for r in rows]
+
+async def listar_campos_async(fields: List[str], rol: Optional[str] = None, solo_activas: Optional[bool] = None,
+                              search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                              ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    return await personas_repo.list_personas_async(rol, solo_activas, search, fields=fields, after=after, limit=limit, ids=ids)
+
+async def obtener_async(persona_id: int) -> Optional[PersonaListItem]:
+    row = await personas_repo.get_persona_item_async(persona_id)
+    return _to_item(row) if row else None
 
 def get_personas_para_lider() -> List[Dict[str, Any]]:
     """Obtiene lista de personas que pueden ser líderes"""
     return personas_repo.get_personas_para_lider()
 
 def eliminar(persona_id: int) -> None:
-    # Verificar si tiene asignaciones o usuarios vinculados
-    persona = personas_repo.get_persona(persona_id)
-    if not persona:
-        raise ValueError("Persona no encontrada.")
-    personas_repo.delete_persona(persona_id)
+    with unit_of_work():
+        # Verificar si tiene asignaciones o usuarios vinculados
+        persona = personas_repo.get_persona(persona_id)
+        if not persona:
+            raise ValueError("Persona no encontrada.")
+        personas_repo.delete_persona(persona_id)
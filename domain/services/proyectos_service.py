@@ -1,26 +1,62 @@
 '''Reglas de negocio Proyectos (placeholder)'''
 # domain/services/proyectos_service.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from domain.schemas.proyectos import ProyectoCreate, ProyectoUpdate, ProyectoClose, ProyectoListItem, ESTADOS_PROY
 from infra.repositories import proyectos_repo, personas_repo
+from infra.db.connection import unit_of_work
 
 def crear(dto: ProyectoCreate) -> int:
-    if proyectos_repo.exists_nombre(dto.NOMBRE):
-        raise ValueError("Ya existe un proyecto con ese nombre.")
-    return proyectos_repo.create_proyecto(dto.dict())
+    with unit_of_work():
+        if proyectos_repo.exists_nombre(dto.NOMBRE):
+            raise ValueError("Ya existe un proyecto con ese nombre.")
+        return proyectos_repo.create_proyecto(dto.dict())
 
 def actualizar(dto: ProyectoUpdate) -> None:
-    if proyectos_repo.exists_nombre(dto.NOMBRE, exclude_id=dto.id):
-        raise ValueError("Ya existe otro proyecto con ese nombre.")
-    proyectos_repo.update_proyecto(dto.id, dto.dict(exclude={"id"}))
+    with unit_of_work():
+        if proyectos_repo.exists_nombre(dto.NOMBRE, exclude_id=dto.id):
+            raise ValueError("Ya existe otro proyecto con ese nombre.")
+        proyectos_repo.update_proyecto(dto.id, dto.dict(exclude={"id"}))
 
 def cerrar(dto: ProyectoClose) -> None:
     proyectos_repo.close_proyecto(dto.id, dto.COSTO_REAL_TOTAL)
 
-def listar(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None) -> List[ProyectoListItem]:
-    rows = proyectos_repo.list_proyectos(estado, cliente, search)
+def listar(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+           after: Optional[int] = None, limit: Optional[int] = None,
+           ids: Optional[List[int]] = None) -> List[ProyectoListItem]:
+    rows = proyectos_repo.list_proyectos(estado, cliente, search, after=after, limit=limit, ids=ids)
     return [ProyectoListItem(**r) for r in rows]
 
+def listar_campos(fields: List[str], estado: Optional[str] = None, cliente: Optional[str] = None,
+                  search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return proyectos_repo.list_proyectos(estado, cliente, search, fields=fields, after=after, limit=limit, ids=ids)
+
+def iterar(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+           ids: Optional[List[int]] = None) -> Iterator[ProyectoListItem]:
+    """Como listar, pero en streaming (para exportes grandes)."""
+    return (ProyectoListItem(**r) for r in proyectos_repo.iter_proyectos(estado, cliente, search, ids))
+
+def obtener(proyecto_id: int) -> Optional[ProyectoListItem]:
+    row = proyectos_repo.get_proyecto_item(proyecto_id)
+    return ProyectoListItem(**row) if row else None
+
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None,
+                       ids: Optional[List[int]] = None) -> List[ProyectoListItem]:
+    rows = await proyectos_repo.list_proyectos_async(estado, cliente, search, after=after, limit=limit, ids=ids)
+    return [ProyectoListItem(**r) for r in rows]
+
+async def listar_campos_async(fields: List[str], estado: Optional[str] = None, cliente: Optional[str] = None,
+                              search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                              ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    return await proyectos_repo.list_proyectos_async(estado, cliente, search, fields=fields, after=after, limit=limit, ids=ids)
+
+async def obtener_async(proyecto_id: int) -> Optional[ProyectoListItem]:
+    row = await proyectos_repo.get_proyecto_item_async(proyecto_id)
+    return ProyectoListItem(**row) if row else None
+
 def clientes() -> List[str]:
     return proyectos_repo.list_distinct_clientes()
 
@@ -30,7 +66,8 @@ def pms_activos() -> Dict[int, str]:
     return {p["id"]: p["nombre"] for p in pms}
 
 def eliminar(proyecto_id: int) -> None:
-    proyecto = proyectos_repo.get_proyecto(proyecto_id)
-    if not proyecto:
-        raise ValueError("Proyecto no encontrado.")
-    proyectos_repo.delete_proyecto(proyecto_id)
+    with unit_of_work():
+        proyecto = proyectos_repo.get_proyecto(proyecto_id)
+        if not proyecto:
+            raise ValueError("Proyecto no encontrado.")
+        proyectos_repo.delete_proyecto(proyecto_id)
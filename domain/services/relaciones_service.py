@@ -0,0 +1,45 @@
+# domain/services/relaciones_service.py
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List
+from domain.services import asignaciones_service, documentos_service, sprints_service
+
+# Relaciones embebibles con include=: nombre -> (cargador en lote por ids del padre, clave foránea)
+RELACIONES = {
+    "proyectos": {
+        "sprints": (sprints_service.listar_por_proyectos_async, "proyecto_id"),
+        "asignaciones": (asignaciones_service.listar_por_proyectos_async, "proyecto_id"),
+        "anexos": (documentos_service.listar_por_proyectos_async, "proyecto_id"),
+    },
+    "personas": {
+        "asignaciones": (asignaciones_service.listar_por_personas_async, "persona_id"),
+    },
+}
+
+# Entidades de event_log de las que depende cada relación (validadores ETag)
+ENTIDADES_RELACION = {
+    "sprints": ("sprints",),
+    "asignaciones": ("asignaciones", "personas", "proyectos", "sprints", "perfiles"),
+    "anexos": ("documentos",),
+}
+
+async def incluir_async(entidad: str, rows: List[Any], include: List[str]) -> List[Dict[str, Any]]:
+    """
+    Devuelve `rows` (modelos o dicts con 'id') como dicts con cada relación de
+    `include` anidada como lista. Una consulta por relación para todos los
+    padres (WHERE fk IN ...), no una por fila; las relaciones van en paralelo.
+    """
+    out = [dict(r) if isinstance(r, dict) else r.model_dump() for r in rows]
+    if not out or not include:
+        return out
+    ids = [r["id"] for r in out]
+    rels = RELACIONES[entidad]
+    cargados = await asyncio.gather(*(rels[nombre][0](ids) for nombre in include))
+    for nombre, items in zip(include, cargados):
+        fk = rels[nombre][1]
+        por_padre: Dict[int, list] = defaultdict(list)
+        for item in items:
+            por_padre[getattr(item, fk)].append(item)
+        for r in out:
+            r[nombre] = por_padre.get(r["id"], [])
+    return out
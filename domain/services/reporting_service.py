@@ -1,6 +1,6 @@
 # domain/services/reporting_service.py
 from typing import Dict, Any, List, Tuple, Optional
-from infra.repositories import proyectos_repo, asignaciones_repo, parametros_repo
+from infra.repositories import proyectos_repo, asignaciones_repo, parametros_repo, fact_costos_repo
 from shared.utils.kpis import safe_pct, desviacion_pct, desviacion_band
 
 def _thresholds() -> Tuple[float, float]:
@@ -66,20 +66,30 @@ def cost_table(proyecto_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]
 
 def top_carga_personas(limit: int = 10, proyecto_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
     """
-    Top personas por % de carga activa. Para simplicidad, traemos IDs desde asignaciones y agregamos.
+    Top personas por carga activa (horas), entre las que tienen asignaciones activas
+    (en proyecto_ids si se especifica). Una sola consulta agregada en asignaciones_repo.
     """
-    # No tenemos una vista agregada; iteramos sobre personas con asignaciones activas
-    # Consultamos IDs únicos de persona desde asignaciones activas
-    active = asignaciones_repo.list_asignaciones(persona_id=None, proyecto_id=None, solo_activas=True)
-    
-    # Filtrar por proyectos permitidos si se especifica
-    if proyecto_ids:
-        active = [r for r in active if r["proyecto_id"] in proyecto_ids]
-    
-    persona_ids = sorted({r["persona_id"] for r in active})
-    res: List[Dict[str, Any]] = []
-    for pid in persona_ids:
-        total_pct, n_proj = asignaciones_repo.carga_persona(pid)
-        res.append({"persona_id": pid, "total_pct": total_pct, "proyectos_activos": n_proj})
-    res.sort(key=lambda x: x["total_pct"], reverse=True)
-    return res[:limit]
+    rows = asignaciones_repo.carga_personas(proyecto_ids=proyecto_ids or None, limit=limit)
+    return [{"persona_id": r["persona_id"], "total_pct": r["total_horas"], "proyectos_activos": r["n_proj"]}
+            for r in rows]
+
+def costos_mensuales(anio: int, proyecto_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Horas, costo y facturación planificados por proyecto, persona y mes del año,
+    leídos de la tabla derivada fact_costos_mes (sin expandir asignaciones).
+    """
+    return [{
+        "proyecto_id": r["proyecto_id"],
+        "proyecto": r["proyecto"],
+        "cliente": r["cliente"],
+        "pais": r["PAIS"],
+        "persona_id": r["persona_id"],
+        "colaborador": r["colaborador"],
+        "categoria": r["categoria"],
+        "seniority": r["seniority"] or "",
+        "mes": int(r["mes"]),
+        "trimestre": (int(r["mes"]) - 1) // 3 + 1,
+        "horas": float(r["horas"] or 0),
+        "costo": float(r["costo"] or 0),
+        "factura": float(r["factura"] or 0),
+    } for r in fact_costos_repo.list_mensual_detalle(anio, proyecto_ids or None)]
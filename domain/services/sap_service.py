@@ -1,7 +1,10 @@
 # domain/services/sap_service.py
-from typing import List, Optional, Dict, Any
+import re
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, TextIO, Tuple
+import pandas as pd
 from domain.schemas.sap import SapReportItem
 from infra.repositories import sap_repo
+from shared.config import settings
 
 
 def listar(anio: Optional[int] = None, mes: Optional[str] = None,
@@ -50,37 +53,200 @@ MES_MAP = {
 }
 
 
-def parse_csv_rows(csv_rows: List[Dict[str, str]], anio: int = 2026) -> List[Dict[str, Any]]:
-    """Convierte filas CSV al formato esperado por bulk_upsert."""
-    parsed = []
-    for r in csv_rows:
-        horas = r.get("HORAS MES", "0")
-        try:
-            horas = float(str(horas).replace(",", ".").strip())
-        except (ValueError, TypeError):
-            horas = 0
-
-        tiempo_nov = r.get("TIEMPO NOVEDAD (HRS)", "")
-        try:
-            tiempo_nov = float(str(tiempo_nov).replace(",", ".").strip()) if tiempo_nov else None
-        except (ValueError, TypeError):
-            tiempo_nov = None
-
-        reporte = r.get("REPORTE SAP", "TRUE")
-        if isinstance(reporte, str):
-            reporte = reporte.strip().upper() == "TRUE"
-
-        parsed.append({
-            "nro": int(r["NRO"]) if r.get("NRO") and str(r["NRO"]).strip().isdigit() else None,
-            "id_empleado_sap": str(r.get("ID EMPLEADO SAP", "")).strip() or None,
-            "colaborador": str(r.get("COLABORADORES", "")).strip(),
-            "id_sap": str(r.get("ID SAP", "")).strip(),
-            "proyecto_sap": str(r.get("PROYECTO SAP", "")).strip(),
-            "horas_mes": horas,
-            "mes": str(r.get("MES", "")).strip(),
-            "anio": anio,
-            "tipo_novedad": str(r.get("TIPO NOVEDAD", "")).strip() or None,
-            "tiempo_novedad_hrs": tiempo_nov,
-            "reporte_sap": reporte,
-        })
-    return parsed
+# Encabezado del CSV/Sheet -> columna de sap_report
+CSV_COLUMNAS = {
+    "NRO": "nro", "ID EMPLEADO SAP": "id_empleado_sap", "COLABORADORES": "colaborador",
+    "ID SAP": "id_sap", "PROYECTO SAP": "proyecto_sap", "HORAS MES": "horas_mes", "MES": "mes",
+    "TIPO NOVEDAD": "tipo_novedad", "TIEMPO NOVEDAD (HRS)": "tiempo_novedad_hrs", "REPORTE SAP": "reporte_sap",
+}
+_OBLIGATORIAS = ("COLABORADORES", "ID SAP", "PROYECTO SAP")
+_LARGO_MAX = {"ID EMPLEADO SAP": 50, "COLABORADORES": 200, "ID SAP": 50, "PROYECTO SAP": 300, "TIPO NOVEDAD": 100}
+_REPORTE_SI = ("TRUE", "VERDADERO", "SI", "SÍ", "1", "")  # vacío = reportado (default de la tabla)
+_REPORTE_NO = ("FALSE", "FALSO", "NO", "0")
+_MES_NORMAL = {m.upper(): m for m in MES_MAP}
+_RE_DECIMAL = r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)"
+MAX_ERRORES_DETALLE = 500
+
+
+class FilasRechazadas(ValueError):
+    """La sincronización no se aplicó porque hay filas inválidas (borraría datos buenos)."""
+
+    def __init__(self, errores: List[Dict[str, Any]], total: int):
+        self.errores = errores
+        detalle = "; ".join(f"línea {e['linea']}: {e['motivo']}" for e in errores[:5])
+        super().__init__(f"{total} filas con errores ({detalle}{'...' if total > 5 else ''})")
+
+
+def _texto(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].fillna("").astype(str).str.strip()
+
+
+def _numero(txt: pd.Series) -> pd.Series:
+    """Decimal con coma o punto; NaN si no es un número (se valida con regex, sin excepciones por fila)."""
+    txt = txt.str.replace(",", ".", regex=False)
+    return txt.where(txt.str.fullmatch(_RE_DECIMAL)).astype(float)
+
+
+def _lista(col: pd.Series) -> list:
+    """Columna -> lista de valores Python nativos con None en los faltantes."""
+    vals = col.to_numpy(dtype=object, copy=True)
+    if col.hasnans:
+        vals[col.isna().to_numpy()] = None
+    return vals.tolist()
+
+
+def parse_csv_frame(df: pd.DataFrame, anio: int = 2026, tuplas: bool = False) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Parser columnar del layout SAP: convierte columnas enteras de una vez.
+    Retorna (filas válidas, rechazadas). Las filas son dicts, o tuplas en el
+    orden de sap_repo.COLUMNAS con tuplas=True (lo que usa la carga masiva,
+    sin armar un dict por fila). Cada rechazo trae linea (fila del archivo,
+    encabezado = 1, según el índice de df), motivo y los valores originales;
+    nada se convierte en 0/None en silencio.
+    """
+    df = df.rename(columns=lambda c: str(c).strip().upper())
+    t = {h: _texto(df, h) for h in CSV_COLUMNAS}
+    motivo = pd.Series("", index=df.index, dtype=object)
+
+    def rechazar(mask: pd.Series, texto: str, valor: Optional[pd.Series] = None) -> None:
+        # El mensaje se arma solo para las filas rechazadas
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        if mask.any():
+            extra = texto + ": '" + valor[mask] + "'" if valor is not None else texto
+            motivo[mask] = motivo[mask] + extra + "; "
+
+    horas = _numero(t["HORAS MES"]).mask(t["HORAS MES"] == "", 0.0)
+    rechazar(horas.isna(), "HORAS MES no numérico", t["HORAS MES"])
+    rechazar(horas < 0, "HORAS MES negativo", t["HORAS MES"])
+
+    tiempo = _numero(t["TIEMPO NOVEDAD (HRS)"])
+    rechazar(tiempo.isna() & (t["TIEMPO NOVEDAD (HRS)"] != ""),
+             "TIEMPO NOVEDAD (HRS) no numérico", t["TIEMPO NOVEDAD (HRS)"])
+
+    nro_ok = t["NRO"].str.fullmatch(r"\d+")
+    nro = t["NRO"].where(nro_ok).astype("Int64")
+    rechazar((t["NRO"] != "") & ~nro_ok, "NRO no entero", t["NRO"])
+
+    reporte = t["REPORTE SAP"].str.upper()
+    rechazar(~reporte.isin(_REPORTE_SI + _REPORTE_NO), "REPORTE SAP inválido", t["REPORTE SAP"])
+
+    mes = t["MES"].str.upper().map(_MES_NORMAL)
+    rechazar(mes.isna(), "MES inválido", t["MES"])
+
+    for h in _OBLIGATORIAS:
+        rechazar(t[h] == "", f"{h} vacío")
+    for h, n in _LARGO_MAX.items():
+        rechazar(t[h].str.len() > n, f"{h} supera {n} caracteres")
+
+    ok = (motivo == "").to_numpy()
+    # Columna por columna a listas y zip: mucho más rápido que DataFrame.to_dict("records")
+    cols = {
+        "nro": _lista(nro[ok]),
+        "id_empleado_sap": _lista(t["ID EMPLEADO SAP"][ok].replace("", None)),
+        "colaborador": _lista(t["COLABORADORES"][ok]),
+        "id_sap": _lista(t["ID SAP"][ok]),
+        "proyecto_sap": _lista(t["PROYECTO SAP"][ok]),
+        "horas_mes": _lista(horas[ok]),
+        "mes": _lista(mes[ok]),
+        "anio": [anio] * int(ok.sum()),
+        "tipo_novedad": _lista(t["TIPO NOVEDAD"][ok].replace("", None)),
+        "tiempo_novedad_hrs": _lista(tiempo[ok]),
+        "reporte_sap": _lista(reporte[ok].isin(_REPORTE_SI).astype(int)),  # TINYINT 1/0
+    }
+    if tuplas:
+        filas = list(zip(*(cols[c] for c in sap_repo.COLUMNAS)))
+    else:
+        filas = [dict(zip(cols, v)) for v in zip(*cols.values())]
+
+    malas = ~ok
+    errores = [
+        {"linea": int(i) + 2, "motivo": m.rstrip("; "), "valores": v}
+        for i, m, v in zip(df.index[malas], motivo[malas], df[malas].fillna("").astype(str).to_dict("records"))
+    ]
+    return filas, errores
+
+
+def parse_csv_rows(csv_rows: List[Dict[str, Any]], anio: int = 2026) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """parse_csv_frame para filas ya leídas como dicts (DictReader, Google Sheets)."""
+    return parse_csv_frame(pd.DataFrame(csv_rows, dtype=object), anio=anio)
+
+
+def iter_csv_frames(f: TextIO, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Lee el CSV en bloques de `chunk_size` filas como texto (sin inferir tipos)."""
+    try:
+        yield from pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=chunk_size or settings.SAP_LOAD_CHUNK_SIZE)
+    except pd.errors.EmptyDataError:
+        return
+
+
+def _parsear_bloques(frames: Iterable[pd.DataFrame], anio: int,
+                     errores: List[Dict[str, Any]], conteo: Dict[str, int]) -> Iterator[List[Dict[str, Any]]]:
+    for df in frames:
+        filas, malas = parse_csv_frame(df, anio=anio, tuplas=True)
+        conteo["rechazadas"] += len(malas)
+        errores.extend(malas[:MAX_ERRORES_DETALLE - len(errores)])
+        yield filas
+
+
+def _cargar(frames: Iterable[pd.DataFrame], anio: int, sync: bool,
+            on_chunk: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+    errores: List[Dict[str, Any]] = []
+    conteo = {"rechazadas": 0}
+
+    def validar():
+        # En modo sync una fila rechazada se leería como "ya no existe" y se borraría
+        if sync and conteo["rechazadas"]:
+            raise FilasRechazadas(errores, conteo["rechazadas"])
+
+    res = sap_repo.bulk_load(_parsear_bloques(frames, anio, errores, conteo), sync_months=sync,
+                             use_load_data=settings.SAP_LOAD_DATA_LOCAL, on_chunk=on_chunk, before_merge=validar)
+    res["rechazadas"] = conteo["rechazadas"]
+    res["errores"] = errores
+    return res
+
+
+def cargar_csv(f: TextIO, anio: int = 2026, reemplazar: bool = False, chunk_size: Optional[int] = None,
+               on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Carga un CSV SAP (archivo de texto abierto) por bloques con staging + merge.
+    Las filas inválidas no se cargan: vuelven en `rechazadas`/`errores`.
+    reemplazar=True deja los meses del archivo idénticos a él (diff: solo
+    inserta, actualiza o borra lo que cambió); con filas inválidas no aplica
+    nada y lanza FilasRechazadas.
+    """
+    return _cargar(iter_csv_frames(f, chunk_size), anio, reemplazar, on_chunk)
+
+
+def sincronizar(rows: List[Dict[str, Any]], anio: int = 2026, chunk_size: Optional[int] = None,
+                on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Sincroniza filas con el formato del CSV (p. ej. Google Sheets) contra
+    sap_report: los meses presentes quedan iguales a `rows` aplicando solo el diff.
+    """
+    chunk_size = chunk_size or settings.SAP_LOAD_CHUNK_SIZE
+    df = pd.DataFrame(rows, dtype=object)
+    frames = (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
+    return _cargar(frames, anio, True, on_chunk)
+
+
+def leer_google_sheet(cred_path: str, sheet_url: str, gid: str) -> List[Dict[str, Any]]:
+    """Filas de la hoja `gid` (o la primera) del Google Sheet, vía Service Account."""
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+    except ImportError as e:
+        raise RuntimeError("Faltan dependencias. Ejecuta: `pip install gspread google-auth`") from e
+
+    match = re.search(r"/d/([a-zA-Z0-9-_]+)", sheet_url)
+    if not match:
+        raise ValueError("URL de Google Sheet inválida")
+
+    scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+    creds = Credentials.from_service_account_file(cred_path, scopes=scopes)
+    sh = gspread.authorize(creds).open_by_key(match.group(1))
+
+    # Buscar la hoja por GID; si no está, la primera
+    worksheet = next((ws for ws in sh.worksheets() if str(ws.id) == str(gid)), None) or sh.sheet1
+    return worksheet.get_all_records()
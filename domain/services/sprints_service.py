@@ -1,28 +1,64 @@
 '''Reglas de negocio Sprints (placeholder)'''
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from domain.schemas.sprints import SprintCreate, SprintUpdate, SprintClose, SprintListItem
 from infra.repositories import sprints_repo, proyectos_repo
+from infra.db.connection import unit_of_work
 
 def crear(dto: SprintCreate) -> int:
-    pr = proyectos_repo.get_proyecto(dto.proyecto_id)
-    if not pr: raise ValueError("Proyecto no existe.")
-    if pr["estado"] == "Cerrado": raise ValueError("No puedes crear sprints en un proyecto cerrado.")
-    return sprints_repo.create_sprint(dto.dict())
+    with unit_of_work():
+        pr = proyectos_repo.get_proyecto(dto.proyecto_id)
+        if not pr: raise ValueError("Proyecto no existe.")
+        if pr["estado"] == "Cerrado": raise ValueError("No puedes crear sprints en un proyecto cerrado.")
+        return sprints_repo.create_sprint(dto.dict())
 
 def actualizar(dto: SprintUpdate) -> None:
-    pr = proyectos_repo.get_proyecto(dto.proyecto_id)
-    if not pr: raise ValueError("Proyecto no existe.")
-    sprints_repo.update_sprint(dto.id, dto.dict(exclude={"id"}))
+    with unit_of_work():
+        pr = proyectos_repo.get_proyecto(dto.proyecto_id)
+        if not pr: raise ValueError("Proyecto no existe.")
+        sprints_repo.update_sprint(dto.id, dto.dict(exclude={"id"}))
 
 def cerrar(dto: SprintClose) -> None:
     sprints_repo.close_sprint(dto.id, dto.costo_real)
 
-def listar(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None) -> List[SprintListItem]:
-    rows = sprints_repo.list_sprints(proyecto_id, estado, search)
+def listar(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None,
+           after: Optional[int] = None, limit: Optional[int] = None,
+           ids: Optional[List[int]] = None) -> List[SprintListItem]:
+    rows = sprints_repo.list_sprints(proyecto_id, estado, search, after=after, limit=limit, ids=ids)
+    return [SprintListItem(**r) for r in rows]
+
+def listar_campos(fields: List[str], proyecto_id: Optional[int] = None, estado: Optional[str] = None,
+                  search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return sprints_repo.list_sprints(proyecto_id, estado, search, fields=fields, after=after, limit=limit, ids=ids)
+
+def obtener(sprint_id: int) -> Optional[SprintListItem]:
+    row = sprints_repo.get_sprint_item(sprint_id)
+    return SprintListItem(**row) if row else None
+
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None,
+                       ids: Optional[List[int]] = None) -> List[SprintListItem]:
+    rows = await sprints_repo.list_sprints_async(proyecto_id, estado, search, after=after, limit=limit, ids=ids)
+    return [SprintListItem(**r) for r in rows]
+
+async def listar_campos_async(fields: List[str], proyecto_id: Optional[int] = None, estado: Optional[str] = None,
+                              search: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                              ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    return await sprints_repo.list_sprints_async(proyecto_id, estado, search, fields=fields, after=after, limit=limit, ids=ids)
+
+async def obtener_async(sprint_id: int) -> Optional[SprintListItem]:
+    row = await sprints_repo.get_sprint_item_async(sprint_id)
+    return SprintListItem(**row) if row else None
+
+async def listar_por_proyectos_async(proyecto_ids: List[int]) -> List[SprintListItem]:
+    rows = await sprints_repo.list_sprints_by_proyectos_async(proyecto_ids)
     return [SprintListItem(**r) for r in rows]
 
 def eliminar(sprint_id: int) -> None:
-    sprint = sprints_repo.get_sprint(sprint_id)
-    if not sprint:
-        raise ValueError("Sprint no encontrado.")
-    sprints_repo.delete_sprint(sprint_id)
+    with unit_of_work():
+        sprint = sprints_repo.get_sprint(sprint_id)
+        if not sprint:
+            raise ValueError("Sprint no encontrado.")
+        sprints_repo.delete_sprint(sprint_id)
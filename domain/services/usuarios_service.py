@@ -1,44 +1,68 @@
 # domain/services/usuarios_service.py
 import bcrypt
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from domain.schemas.usuarios import UsuarioCreate, UsuarioUpdate, UsuarioListItem
 from infra.repositories import usuarios_repo
+from infra.db.connection import unit_of_work
+from domain.services import auth_service
 
 def _hash(p: str) -> str:
     return bcrypt.hashpw(p.encode(), bcrypt.gensalt()).decode()
 
 def crear(dto: UsuarioCreate) -> int:
-    if usuarios_repo.get_by_email(dto.email):
-        raise ValueError("Ya existe un usuario con ese email.")
-    return usuarios_repo.create_user(dto.email, _hash(dto.password_plain), dto.rol_app, dto.persona_id, True)
+    with unit_of_work():
+        if usuarios_repo.get_by_email(dto.email):
+            raise ValueError("Ya existe un usuario con ese email.")
+        return usuarios_repo.create_user(dto.email, _hash(dto.password_plain), dto.rol_app, dto.persona_id, True)
 
 def actualizar(dto: UsuarioUpdate) -> None:
-    current = usuarios_repo.get_by_id(dto.id)
-    if not current:
-        raise ValueError("Usuario no existe.")
-    # si cambia email, validar que no exista duplicado
-    if dto.email != current["email"]:
-        if usuarios_repo.get_by_email(dto.email):
-            raise ValueError("Ya existe otro usuario con ese email.")
-    usuarios_repo.update_user(dto.id, dto.email, dto.rol_app, dto.persona_id, dto.activo)
+    with unit_of_work():
+        current = usuarios_repo.get_by_id(dto.id)
+        if not current:
+            raise ValueError("Usuario no existe.")
+        # si cambia email, validar que no exista duplicado
+        if dto.email != current["email"]:
+            if usuarios_repo.get_by_email(dto.email):
+                raise ValueError("Ya existe otro usuario con ese email.")
+        usuarios_repo.update_user(dto.id, dto.email, dto.rol_app, dto.persona_id, dto.activo)
+    auth_service.invalidate_user(dto.id)
 
 def reset_password(user_id: int, new_plain: str) -> None:
-    if not usuarios_repo.get_by_id(user_id):
-        raise ValueError("Usuario no existe.")
-    usuarios_repo.update_password(user_id, _hash(new_plain))
+    with unit_of_work():
+        if not usuarios_repo.get_by_id(user_id):
+            raise ValueError("Usuario no existe.")
+        usuarios_repo.update_password(user_id, _hash(new_plain))
+    auth_service.invalidate_user(user_id)
 
-def listar() -> List[UsuarioListItem]:
-    rows = usuarios_repo.list_users()
-    return [UsuarioListItem(
+def _to_item(r: Dict[str, Any]) -> UsuarioListItem:
+    return UsuarioListItem(
         id=r["id"], email=r["email"], rol_app=r["rol_app"],
         persona_id=r.get("persona_id"), activo=bool(r["activo"])
-    ) for r in rows]
+    )
+
+def listar(after: Optional[int] = None, limit: Optional[int] = None) -> List[UsuarioListItem]:
+    rows = usuarios_repo.list_users(after=after, limit=limit)
+    return [_to_item(r) for r in rows]
+
+def listar_campos(fields: List[str], after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Como listar, pero solo con las columnas `fields` (proyección en SQL)."""
+    return usuarios_repo.list_users(fields=fields, after=after, limit=limit)
+
+# Variantes async (endpoints de la API): misma consulta, sin bloquear el event loop
+async def listar_async(after: Optional[int] = None, limit: Optional[int] = None) -> List[UsuarioListItem]:
+    rows = await usuarios_repo.list_users_async(after=after, limit=limit)
+    return [_to_item(r) for r in rows]
+
+async def listar_campos_async(fields: List[str], after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await usuarios_repo.list_users_async(fields=fields, after=after, limit=limit)
 
 def eliminar(user_id: int) -> None:
-    usuario = usuarios_repo.get_by_id(user_id)
-    if not usuario:
-        raise ValueError("Usuario no encontrado.")
-    usuarios_repo.delete_user(user_id)
+    with unit_of_work():
+        usuario = usuarios_repo.get_by_id(user_id)
+        if not usuario:
+            raise ValueError("Usuario no encontrado.")
+        usuarios_repo.delete_user(user_id)
+    auth_service.invalidate_user(user_id)
 
 # ==================== GESTIÓN DE PROYECTOS POR USUARIO ====================
 
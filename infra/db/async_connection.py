@@ -0,0 +1,113 @@
+# infra/db/async_connection.py
+"""
+Acceso asíncrono (solo lectura) para los endpoints async de la API.
+Usa aiomysql con un pool propio por event loop, separado del pool sync que
+sigue usando Streamlit. Sin aiomysql (o con DB_ASYNC=false) las consultas
+corren con el pool sync en un hilo, así que los llamadores no cambian.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from anyio import to_thread
+
+from infra.db.connection import get_conn, PoolTimeout
+from shared.config import settings
+
+try:
+    import aiomysql
+except ImportError:  # opcional
+    aiomysql = None
+
+_pool_task: Optional[asyncio.Task] = None
+_pool_loop = None
+
+
+def async_enabled() -> bool:
+    return settings.DB_ASYNC and aiomysql is not None
+
+
+async def _create_pool():
+    return await aiomysql.create_pool(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+        charset="utf8mb4",
+        cursorclass=aiomysql.DictCursor,
+        autocommit=True,
+        minsize=1,
+        maxsize=settings.DB_ASYNC_POOL_SIZE,
+        pool_recycle=settings.DB_POOL_MAX_LIFETIME or -1,
+    )
+
+
+async def get_async_pool():
+    """Pool aiomysql del event loop actual (se crea una vez, sin carreras entre corrutinas)."""
+    global _pool_task, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool_task is None or _pool_loop is not loop:
+        _pool_loop = loop
+        _pool_task = loop.create_task(_create_pool())
+    task = _pool_task
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        # No dejar cacheado un pool que falló al crearse
+        if _pool_task is task:
+            _pool_task = None
+        raise
+
+
+async def close_async_pool() -> None:
+    global _pool_task
+    task, _pool_task = _pool_task, None
+    if task is None or not task.done() or task.exception() is not None:
+        return
+    pool = task.result()
+    pool.close()
+    await pool.wait_closed()
+
+
+def async_pool_stats() -> Dict[str, Any]:
+    """Métricas del pool async: tamaño, libres y en uso (vacío si no se creó)."""
+    if not async_enabled():
+        return {"enabled": False}
+    if _pool_task is None or not _pool_task.done() or _pool_task.exception() is not None:
+        return {"enabled": True, "size": 0, "free": 0, "maxsize": settings.DB_ASYNC_POOL_SIZE}
+    pool = _pool_task.result()
+    return {"enabled": True, "size": pool.size, "free": pool.freesize, "maxsize": pool.maxsize}
+
+
+def _run_sync(sql: str, params: Sequence[Any], one: bool):
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return cur.fetchone() if one else cur.fetchall()
+
+
+async def _run(sql: str, params: Optional[Sequence[Any]], one: bool):
+    params = tuple(params or ())
+    if not async_enabled():
+        return await to_thread.run_sync(_run_sync, sql, params, one)
+    pool = await get_async_pool()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), settings.DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PoolTimeout(
+            f"Sin conexiones libres en el pool async (size={pool.maxsize}) tras {settings.DB_POOL_TIMEOUT}s"
+        ) from None
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return await (cur.fetchone() if one else cur.fetchall())
+    finally:
+        pool.release(conn)
+
+
+async def fetchall_async(sql: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    rows = await _run(sql, params, one=False)
+    return list(rows)
+
+
+async def fetchone_async(sql: str, params: Optional[Sequence[Any]] = None) -> Optional[Dict[str, Any]]:
+    return await _run(sql, params, one=True)
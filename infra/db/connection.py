@@ -1,10 +1,15 @@
 # infra/db/connection.py
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, Sequence
 import pymysql
 from contextlib import contextmanager
 from shared.config import settings
 
-def _conn():
-    return pymysql.connect(
+def _conn(**overrides):
+    opts = dict(
         host=settings.DB_HOST,
         port=settings.DB_PORT,
         user=settings.DB_USER,
@@ -14,15 +19,221 @@ def _conn():
         cursorclass=pymysql.cursors.DictCursor,
         autocommit=False,
     )
+    opts.update(overrides)
+    return pymysql.connect(**opts)
+
+class PoolTimeout(RuntimeError):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera."""
+
+class _Pool:
+    """
+    Pool de conexiones thread-safe (hilos de Streamlit y threadpool de FastAPI).
+    - size: máximo de conexiones abiertas (prestadas + ociosas).
+    - max_lifetime: segundos antes de reciclar una conexión (0 = sin límite).
+    - timeout: segundos máximos esperando una conexión libre.
+    Al prestar una conexión se hace ping; si está caída se reabre.
+    """
+
+    def __init__(self, size: int, max_lifetime: int, timeout: float):
+        self.size = max(1, size)
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._created_at: Dict[int, float] = {}
+        self._checked_out = 0
+        self._stats = {"created": 0, "recycled": 0, "reconnects": 0, "discarded": 0,
+                       "checkouts": 0, "waits": 0, "wait_time_total": 0.0, "wait_time_max": 0.0}
+
+    def _open(self):
+        conn = _conn()
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _close(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn) -> bool:
+        if self.max_lifetime <= 0:
+            return False
+        created = self._created_at.get(id(conn), 0.0)
+        return time.monotonic() - created > self.max_lifetime
+
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while not self._idle and self._checked_out >= self.size:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise PoolTimeout(f"Sin conexiones libres en el pool (size={self.size}) tras {self.timeout}s")
+                self._cond.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            self._checked_out += 1
+            self._stats["checkouts"] += 1
+            if waited:
+                elapsed = time.monotonic() - start
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += elapsed
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], elapsed)
+        # La E/S de red se hace fuera del lock
+        try:
+            if conn is not None and self._expired(conn):
+                self._close(conn)
+                conn = None
+                with self._cond:
+                    self._stats["recycled"] += 1
+            if conn is not None:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._close(conn)
+                    conn = None
+                    with self._cond:
+                        self._stats["reconnects"] += 1
+            return conn if conn is not None else self._open()
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard: bool = False) -> None:
+        if discard or self._expired(conn):
+            self._close(conn)
+        with self._cond:
+            self._checked_out -= 1
+            if discard:
+                self._stats["discarded"] += 1
+            elif id(conn) not in self._created_at:
+                self._stats["recycled"] += 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            data = dict(self._stats)
+            data.update({"size": self.size, "checked_out": self._checked_out, "idle": len(self._idle)})
+        return data
+
+    def close_all(self) -> None:
+        with self._cond:
+            while self._idle:
+                self._close(self._idle.pop())
+
+_pool: _Pool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> _Pool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _Pool(settings.DB_POOL_SIZE, settings.DB_POOL_MAX_LIFETIME, settings.DB_POOL_TIMEOUT)
+    return _pool
+
+def pool_stats() -> Dict[str, Any]:
+    """Métricas del pool: prestadas, ociosas, esperas y conexiones creadas/recicladas."""
+    return get_pool().stats()
+
+# Conexión de la unidad de trabajo activa en el hilo/contexto actual
+_uow_conn: ContextVar = ContextVar("_uow_conn", default=None)
+
+@contextmanager
+def _transaction():
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        # BaseException: st.rerun()/st.stop() no heredan de Exception y la
+        # conexión no debe volver al pool con una transacción abierta.
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        raise
+    finally:
+        pool.release(conn, discard=broken)
+
+@contextmanager
+def unit_of_work():
+    """
+    Agrupa varias llamadas a repositorios en una sola conexión y transacción.
+    Todo get_conn() dentro del bloque reutiliza la misma conexión; se hace
+    commit una vez al salir y rollback si el bloque termina con excepción.
+    Las unidades anidadas se unen a la externa.
+
+        with unit_of_work():
+            asignaciones_repo.exists_persona(pid)
+            asignaciones_repo.create_asignacion(data)
+    """
+    active = _uow_conn.get()
+    if active is not None:
+        yield active
+        return
+    with _transaction() as conn:
+        token = _uow_conn.set(conn)
+        try:
+            yield conn
+        finally:
+            _uow_conn.reset(token)
+
+def in_unit_of_work() -> bool:
+    return _uow_conn.get() is not None
 
 @contextmanager
 def get_conn():
-    conn = _conn()
+    active = _uow_conn.get()
+    if active is not None:
+        # Dentro de una unidad de trabajo: commit/rollback los hace unit_of_work()
+        yield active
+        return
+    with _transaction() as conn:
+        yield conn
+
+def stream_query(sql: str, params: Optional[Sequence[Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Itera filas de una consulta de solo lectura con cursor de servidor
+    (SSDictCursor): las filas llegan del servidor a medida que se consumen,
+    con memoria constante. Usa una conexión propia fuera del pool, porque un
+    resultado sin leer del todo bloquea la conexión.
+    """
+    conn = _conn(cursorclass=pymysql.cursors.SSDictCursor, autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, tuple(params or ()))
+            for row in cur:
+                yield row
+    finally:
+        conn.close()
+
+@contextmanager
+def dedicated_conn(**overrides):
+    """
+    Conexión propia fuera del pool, para cargas masivas que necesitan opciones
+    de cliente distintas (p. ej. local_infile=True para LOAD DATA LOCAL INFILE).
+    Commit al salir, rollback si hay excepción; siempre se cierra.
+    """
+    conn = _conn(**overrides)
     try:
         yield conn
         conn.commit()
-    except Exception:
-        conn.rollback()
+    except BaseException:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
         raise
     finally:
         conn.close()
@@ -0,0 +1,42 @@
+-- 0021_fact_costos_mes.sql
+-- Tabla derivada: horas, costo y facturación mensual por proyecto y persona.
+-- Se mantiene de forma incremental desde los repositorios de asignaciones/personas,
+-- el worker la reconstruye al arrancar y cada FACT_COSTOS_REBUILD_INTERVAL segundos,
+-- y se puede reconstruir a mano con: python apps/rebuild_fact_costos.py
+CREATE TABLE IF NOT EXISTS fact_costos_mes (
+    proyecto_id BIGINT NOT NULL,
+    persona_id BIGINT NOT NULL,
+    anio SMALLINT NOT NULL,
+    mes TINYINT NOT NULL,
+    horas DECIMAL(12,2) NOT NULL DEFAULT 0,
+    costo DECIMAL(16,2) NOT NULL DEFAULT 0,
+    factura DECIMAL(16,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (proyecto_id, persona_id, anio, mes),
+    INDEX idx_fact_persona (persona_id),
+    INDEX idx_fact_anio_mes (anio, mes)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Carga inicial (mismo cálculo que fact_costos_repo.rebuild); re-ejecutable.
+DELETE FROM fact_costos_mes;
+INSERT INTO fact_costos_mes (proyecto_id, persona_id, anio, mes, horas, costo, factura)
+WITH RECURSIVE rango AS (
+    SELECT a.proyecto_id, a.persona_id, a.dedicacion_horas AS horas,
+           COALESCE(p.COSTO_RECURSO, 0) AS costo_h,
+           IF(a.tarifa > 0, a.tarifa, 0) AS tarifa_h,
+           a.fecha_asignacion - INTERVAL (DAYOFMONTH(a.fecha_asignacion) - 1) DAY AS mes_ini,
+           COALESCE(a.fecha_fin - INTERVAL (DAYOFMONTH(a.fecha_fin) - 1) DAY,
+                    MAKEDATE(GREATEST(YEAR(CURDATE()) + 1, YEAR(a.fecha_asignacion)), 1) + INTERVAL 11 MONTH) AS mes_fin
+    FROM asignaciones a
+    JOIN personas p ON p.id = a.persona_id
+), meses AS (
+    SELECT proyecto_id, persona_id, horas, costo_h, tarifa_h, mes_ini AS m, mes_fin
+    FROM rango WHERE mes_ini <= mes_fin
+    UNION ALL
+    SELECT proyecto_id, persona_id, horas, costo_h, tarifa_h, m + INTERVAL 1 MONTH, mes_fin
+    FROM meses WHERE m < mes_fin
+)
+SELECT proyecto_id, persona_id, YEAR(m), MONTH(m),
+       SUM(horas), SUM(horas * costo_h), SUM(horas * tarifa_h)
+FROM meses
+GROUP BY proyecto_id, persona_id, YEAR(m), MONTH(m);
@@ -0,0 +1,4 @@
+-- 0022_event_log_entidad_idx.sql
+-- Índice para high-water marks por entidad (validadores ETag de la API):
+-- SELECT MAX(id) FROM event_log WHERE entidad = ? se resuelve sin escanear la tabla.
+CREATE INDEX idx_event_log_entidad_id ON event_log (entidad, id);
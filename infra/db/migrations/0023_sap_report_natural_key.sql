@@ -0,0 +1,12 @@
+-- 0023_sap_report_natural_key.sql
+-- Clave natural de sap_report: (anio, mes, id_sap, colaborador).
+-- Sin ella el ON DUPLICATE KEY de las cargas nunca coincidía y recargar un
+-- CSV duplicaba filas. Antes de crear el índice se deja solo la fila más
+-- reciente (id mayor) de cada clave.
+DELETE t FROM sap_report t
+JOIN sap_report n
+  ON n.anio = t.anio AND n.mes = t.mes AND n.id_sap = t.id_sap
+ AND n.colaborador = t.colaborador AND n.id > t.id;
+
+ALTER TABLE sap_report
+  ADD UNIQUE KEY uq_sap_report_natural (anio, mes, id_sap, colaborador);
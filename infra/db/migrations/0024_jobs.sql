@@ -0,0 +1,22 @@
+-- 0024_jobs.sql
+-- Cola de trabajos en segundo plano (sync SAP, cargas CSV, exportes).
+-- La UI encola y consulta el estado; los ejecuta el worker:
+--   python apps/worker.py   (servicio "worker" en docker-compose)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    params JSON NULL,
+    estado ENUM('pendiente','ejecutando','ok','error') NOT NULL DEFAULT 'pendiente',
+    progreso JSON NULL,
+    resultado JSON NULL,
+    error TEXT NULL,
+    intentos INT NOT NULL DEFAULT 0,
+    actor_id BIGINT NULL,
+    worker VARCHAR(100) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    heartbeat_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    INDEX idx_jobs_estado (estado, id),
+    INDEX idx_jobs_tipo (tipo, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,47 @@
+# infra/db/paging.py
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+MAX_PAGE_SIZE = 5000
+
+
+def select_clause(field_sql: Dict[str, str], fields: Optional[Sequence[str]], default: str) -> str:
+    """
+    SELECT con solo las columnas pedidas (claves de field_sql, que actúa como
+    lista blanca). 'id' siempre va incluido porque es el cursor de paginación.
+    Sin fields devuelve `default`. Campos desconocidos -> ValueError.
+    """
+    if not fields:
+        return default
+    unknown = [f for f in fields if f not in field_sql]
+    if unknown:
+        raise ValueError(f"Campos no válidos: {', '.join(unknown)}")
+    wanted = ["id"] + [f for f in dict.fromkeys(fields) if f != "id"]
+    return "SELECT " + ", ".join(f"{field_sql[f]} AS `{f}`" for f in wanted)
+
+
+def in_clause(col: str, ids: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """`col IN (%s, ...)` con sus parámetros; sin ids devuelve una condición siempre falsa."""
+    if not ids:
+        return "1=0", []
+    return f"{col} IN (" + ",".join(["%s"] * len(ids)) + ")", list(ids)
+
+
+def keyset(sql: str, where: List[str], params: List[Any], id_col: str, order_by: str,
+           after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """
+    Agrega WHERE/ORDER/LIMIT. Con after o limit pagina por keyset sobre id_col
+    (orden id ASC, `id_col > after`), estable aunque haya altas entre páginas;
+    sin ellos conserva el orden habitual del listado (`order_by`).
+    """
+    where, params = list(where), list(params)
+    paged = after is not None or limit is not None
+    if after is not None:
+        where.append(f"{id_col} > %s")
+        params.append(after)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {id_col} ASC" if paged else f" ORDER BY {order_by}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(max(1, min(int(limit), MAX_PAGE_SIZE)))
+    return sql, params
@@ -1,8 +1,11 @@
 '''Acceso MySQL Asignaciones (placeholder)'''
 # infra/repositories/asignaciones_repo.py
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 import json
-from infra.db.connection import get_conn
+from infra.db.connection import get_conn, stream_query
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset, in_clause
+from infra.repositories import fact_costos_repo
 
 def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
     if detalle is None: return None
@@ -50,37 +53,74 @@ def create_asignacion(data: Dict[str, Any]) -> int:
              data["dedicacion_horas"], data.get("tarifa"), data["fecha_asignacion"], data.get("fecha_fin"))
         )
         aid = cur.lastrowid
+        fact_costos_repo.refresh(conn, persona_id=data["persona_id"], proyecto_id=data["proyecto_id"])
         _log_event(conn, "create", aid, {"persona_id": data["persona_id"], "proyecto_id": data["proyecto_id"], "perfil_id": data.get("perfil_id"), "dedicacion_horas": data["dedicacion_horas"], "tarifa": data.get("tarifa")})
         return aid
 
 def update_asignacion(aid: int, data: Dict[str, Any]) -> None:
     with get_conn() as conn, conn.cursor() as cur:
+        prev = fact_costos_repo.pairs_for(conn, "id=%s", (aid,))
         cur.execute(
             "UPDATE asignaciones SET persona_id=%s, proyecto_id=%s, sprint_id=%s, perfil_id=%s, dedicacion_horas=%s, tarifa=%s, fecha_asignacion=%s, fecha_fin=%s WHERE id=%s",
             (data["persona_id"], data["proyecto_id"], data.get("sprint_id"), data.get("perfil_id"),
              data["dedicacion_horas"], data.get("tarifa"), data["fecha_asignacion"], data.get("fecha_fin"), aid)
         )
+        fact_costos_repo.refresh_pairs(conn, prev + [(data["persona_id"], data["proyecto_id"])])
         _log_event(conn, "update", aid, {"perfil_id": data.get("perfil_id"), "dedicacion_horas": data["dedicacion_horas"], "tarifa": data.get("tarifa")})
 
 def end_asignacion(aid: int, fecha_fin) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("UPDATE asignaciones SET fecha_fin=%s WHERE id=%s", (fecha_fin, aid))
+        fact_costos_repo.refresh_pairs(conn, fact_costos_repo.pairs_for(conn, "id=%s", (aid,)))
         _log_event(conn, "end", aid, {"fecha_fin": str(fecha_fin)})
 
 def delete_asignacion(aid: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
+        prev = fact_costos_repo.pairs_for(conn, "id=%s", (aid,))
         cur.execute("DELETE FROM asignaciones WHERE id=%s", (aid,))
+        fact_costos_repo.refresh_pairs(conn, prev)
         _log_event(conn, "delete", aid, None)
 
 # ---- Listados ----
-def list_asignaciones(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None) -> List[Dict[str, Any]]:
-    sql = ( "SELECT a.*, p.nombre AS persona_nombre, pr.nombre AS proyecto_nombre, s.nombre AS sprint_nombre, pf.nombre AS perfil_nombre "
-            "FROM asignaciones a "
-            "JOIN personas p ON p.id=a.persona_id "
-            "JOIN proyectos pr ON pr.id=a.proyecto_id "
-            "LEFT JOIN sprints s ON s.id=a.sprint_id "
-            "LEFT JOIN perfiles pf ON pf.id=a.perfil_id " )
+_LIST_SELECT = "SELECT a.*, p.nombre AS persona_nombre, pr.nombre AS proyecto_nombre, s.nombre AS sprint_nombre, pf.nombre AS perfil_nombre "
+_LIST_FROM = ( " FROM asignaciones a "
+              "JOIN personas p ON p.id=a.persona_id "
+              "JOIN proyectos pr ON pr.id=a.proyecto_id "
+              "LEFT JOIN sprints s ON s.id=a.sprint_id "
+              "LEFT JOIN perfiles pf ON pf.id=a.perfil_id " )
+_LIST_SQL = _LIST_SELECT + _LIST_FROM
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f"a.{f}" for f in (
+    "id", "persona_id", "proyecto_id", "sprint_id", "perfil_id", "dedicacion_horas", "tarifa",
+    "fecha_asignacion", "fecha_fin")}
+_LIST_FIELDS.update({"persona_nombre": "p.nombre", "proyecto_nombre": "pr.nombre",
+                     "sprint_nombre": "s.nombre", "perfil_nombre": "pf.nombre"})
+
+def get_asignacion_item(aid: int) -> Optional[Dict[str, Any]]:
+    """Misma forma que list_asignaciones (con nombres de persona/proyecto/sprint/perfil)."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(_LIST_SQL + " WHERE a.id=%s", (aid,))
+        return cur.fetchone()
+
+async def get_asignacion_item_async(aid: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async(_LIST_SQL + " WHERE a.id=%s", (aid,))
+
+def _list_query(persona_id: Optional[int], proyecto_id: Optional[int], solo_activas: Optional[bool],
+                proyecto_ids: Optional[List[int]] = None,
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                ids: Optional[List[int]] = None, persona_ids: Optional[List[int]] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, _LIST_SELECT) + _LIST_FROM
     where, params = [], []
+    if proyecto_ids is not None:
+        cond, ids_params = in_clause("a.proyecto_id", proyecto_ids)
+        where.append(cond); params.extend(ids_params)
+    if ids is not None:
+        cond, ids_params = in_clause("a.id", ids)
+        where.append(cond); params.extend(ids_params)
+    if persona_ids is not None:
+        cond, ids_params = in_clause("a.persona_id", persona_ids)
+        where.append(cond); params.extend(ids_params)
     if persona_id:
         where.append("a.persona_id=%s"); params.append(persona_id)
     if proyecto_id:
@@ -90,13 +130,42 @@ def list_asignaciones(persona_id: Optional[int] = None, proyecto_id: Optional[in
             where.append("(a.fecha_fin IS NULL OR a.fecha_fin >= CURDATE())")
         else:
             where.append("(a.fecha_fin IS NOT NULL AND a.fecha_fin < CURDATE())")
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY a.fecha_asignacion DESC, a.id DESC"
+    return keyset(sql, where, params, "a.id", "a.fecha_asignacion DESC, a.id DESC", after, limit)
+
+def list_asignaciones(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None,
+                      fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                      ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id; ids: lookup en lote (IN)."""
+    sql, params = _list_query(persona_id, proyecto_id, solo_activas, None, fields, after, limit, ids)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_asignaciones_async(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None, solo_activas: Optional[bool] = None,
+                                  fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como list_asignaciones, para los endpoints async de la API."""
+    sql, params = _list_query(persona_id, proyecto_id, solo_activas, None, fields, after, limit, ids)
+    return await fetchall_async(sql, params)
+
+async def list_asignaciones_by_proyectos_async(proyecto_ids: List[int]) -> List[Dict[str, Any]]:
+    """Asignaciones de varios proyectos en una sola consulta (include= de la API)."""
+    sql, params = _list_query(None, None, None, proyecto_ids)
+    return await fetchall_async(sql, params)
+
+async def list_asignaciones_by_personas_async(persona_ids: List[int]) -> List[Dict[str, Any]]:
+    """Asignaciones de varias personas en una sola consulta (include= de la API)."""
+    sql, params = _list_query(None, None, None, persona_ids=persona_ids)
+    return await fetchall_async(sql, params)
+
+def iter_asignaciones(persona_id: Optional[int] = None, proyecto_id: Optional[int] = None,
+                      solo_activas: Optional[bool] = None,
+                      proyecto_ids: Optional[List[int]] = None,
+                      fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Como list_asignaciones, pero en streaming; proyecto_ids acota por permisos."""
+    sql, params = _list_query(persona_id, proyecto_id, solo_activas, proyecto_ids, fields, after, limit)
+    return stream_query(sql, params)
+
 # ---- Métricas de carga ----
 def carga_persona(persona_id: int) -> Tuple[float, int]:
     """
@@ -115,3 +184,39 @@ def carga_persona(persona_id: int) -> Tuple[float, int]:
         )
         row = cur.fetchone()
         return float(row["total_horas"]), int(row["n_proj"])
+
+def carga_personas(persona_ids: Optional[List[int]] = None, proyecto_ids: Optional[List[int]] = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Versión por lotes de carga_persona: una sola consulta para todas las personas
+    con asignaciones activas (o solo persona_ids). Devuelve filas
+    {persona_id, total_horas, n_proj} ordenadas por total_horas DESC.
+    Si se pasa proyecto_ids, solo entran personas con alguna asignación activa en
+    esos proyectos, pero su carga se calcula sobre todas sus asignaciones activas.
+    """
+    sql = """SELECT a.persona_id,
+                    COALESCE(SUM(CASE WHEN pr.estado <> 'Cerrado' THEN a.dedicacion_horas END),0) AS total_horas,
+                    COUNT(DISTINCT CASE WHEN pr.estado <> 'Cerrado' THEN a.proyecto_id END) AS n_proj
+             FROM asignaciones a
+             JOIN personas p ON p.id = a.persona_id
+             JOIN proyectos pr ON pr.id = a.proyecto_id
+             WHERE (a.fecha_fin IS NULL OR a.fecha_fin >= CURDATE())"""
+    params: List[Any] = []
+    if persona_ids is not None:
+        if not persona_ids:
+            return []
+        sql += " AND a.persona_id IN (" + ",".join(["%s"] * len(persona_ids)) + ")"
+        params.extend(persona_ids)
+    if proyecto_ids:
+        sql += (" AND a.persona_id IN (SELECT f.persona_id FROM asignaciones f"
+                " WHERE (f.fecha_fin IS NULL OR f.fecha_fin >= CURDATE())"
+                " AND f.proyecto_id IN (" + ",".join(["%s"] * len(proyecto_ids)) + "))")
+        params.extend(proyecto_ids)
+    sql += " GROUP BY a.persona_id ORDER BY total_horas DESC, a.persona_id ASC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return [{"persona_id": r["persona_id"], "total_horas": float(r["total_horas"]), "n_proj": int(r["n_proj"])}
+                for r in cur.fetchall()]
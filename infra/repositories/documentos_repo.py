@@ -1,7 +1,33 @@
 # infra/repositories/documentos_repo.py
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import date
+import json
 from infra.db.connection import get_conn
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset, in_clause
+
+def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
+    if detalle is None: return None
+    try:
+        return json.dumps(detalle, ensure_ascii=False, default=str)
+    except Exception:
+        return json.dumps({"raw": str(detalle)}, ensure_ascii=False)
+
+def _log_event(conn, tipo: str, entidad_id: int, detalle: Dict[str, Any] | None = None, actor_id: int | None = None):
+    payload = _prepare_json_payload(detalle)
+    with conn.cursor() as cur:
+        try:
+            cur.execute(
+                "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+                "VALUES (%s,%s,%s,%s,CAST(%s AS JSON))",
+                (actor_id, tipo, "documentos", entidad_id, payload)
+            )
+        except Exception:
+            cur.execute(
+                "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+                "VALUES (%s,%s,%s,%s,NULL)",
+                (actor_id, tipo, "documentos", entidad_id)
+            )
 
 def create_documento(proyecto_id: int, nombre_archivo: str, ruta_archivo: Optional[str] = None, 
                      descripcion: Optional[str] = None, tamanio_bytes: Optional[int] = None,
@@ -15,7 +41,9 @@ def create_documento(proyecto_id: int, nombre_archivo: str, ruta_archivo: Option
                VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s, %s, %s, %s)""",
             (proyecto_id, nombre_archivo, descripcion, ruta_archivo, tamanio_bytes, tipo_mime, valor, iva, fecha_documento, id_sap)
         )
-        return cur.lastrowid
+        doc_id = cur.lastrowid
+        _log_event(conn, "create", doc_id, {"proyecto_id": proyecto_id, "nombre_archivo": nombre_archivo, "valor": valor})
+        return doc_id
 
 def update_documento(doc_id: int, nombre_archivo: str, descripcion: Optional[str] = None,
                      valor: Optional[float] = None, iva: Optional[float] = None,
@@ -25,22 +53,40 @@ def update_documento(doc_id: int, nombre_archivo: str, descripcion: Optional[str
             "UPDATE documentos SET nombre_archivo=%s, descripcion=%s, valor=%s, iva=%s, fecha_documento=%s, id_sap=%s WHERE id=%s",
             (nombre_archivo, descripcion, valor, iva, fecha_documento, id_sap, doc_id)
         )
+        _log_event(conn, "update", doc_id, {"nombre_archivo": nombre_archivo, "valor": valor, "iva": iva})
 
 def delete_documento(doc_id: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("DELETE FROM documentos WHERE id=%s", (doc_id,))
+        _log_event(conn, "delete", doc_id)
 
 def get_documento(doc_id: int) -> Optional[Dict[str, Any]]:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("SELECT * FROM documentos WHERE id=%s", (doc_id,))
         return cur.fetchone()
 
-def list_documentos(proyecto_id: Optional[int] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
-    sql = """SELECT d.*, p.NOMBRE as proyecto_nombre, per.nombre as persona_nombre
+async def get_documento_async(doc_id: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async("SELECT * FROM documentos WHERE id=%s", (doc_id,))
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f"d.{f}" for f in (
+    "id", "proyecto_id", "nombre_archivo", "descripcion", "ruta_archivo", "tamanio_bytes", "tipo_mime",
+    "fecha_carga", "valor", "iva", "fecha_documento", "id_sap")}
+_LIST_FIELDS.update({"proyecto_nombre": "p.NOMBRE", "persona_nombre": "per.nombre"})
+
+def _list_query(proyecto_id: Optional[int], search: Optional[str],
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                proyecto_ids: Optional[List[int]] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, "SELECT d.*, p.NOMBRE as proyecto_nombre, per.nombre as persona_nombre")
+    sql += """
              FROM documentos d
              LEFT JOIN proyectos p ON d.proyecto_id = p.id
              LEFT JOIN personas per ON p.pm_id = per.id"""
     where, params = [], []
+    if proyecto_ids is not None:
+        cond, ids_params = in_clause("d.proyecto_id", proyecto_ids)
+        where.append(cond)
+        params.extend(ids_params)
     if proyecto_id:
         where.append("d.proyecto_id=%s")
         params.append(proyecto_id)
@@ -48,15 +94,34 @@ def list_documentos(proyecto_id: Optional[int] = None, search: Optional[str] = N
         where.append("(d.nombre_archivo LIKE %s OR d.descripcion LIKE %s)")
         like = f"%{search}%"
         params.extend([like, like])
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY d.fecha_carga DESC"
+    return keyset(sql, where, params, "d.id", "d.fecha_carga DESC", after, limit)
+
+def list_documentos(proyecto_id: Optional[int] = None, search: Optional[str] = None,
+                    fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id."""
+    sql, params = _list_query(proyecto_id, search, fields, after, limit)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_documentos_async(proyecto_id: Optional[int] = None, search: Optional[str] = None,
+                                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    sql, params = _list_query(proyecto_id, search, fields, after, limit)
+    return await fetchall_async(sql, params)
+
+async def list_documentos_by_proyectos_async(proyecto_ids: List[int]) -> List[Dict[str, Any]]:
+    """Documentos de varios proyectos en una sola consulta (include= de la API)."""
+    sql, params = _list_query(None, None, proyecto_ids=proyecto_ids)
+    return await fetchall_async(sql, params)
+
 def count_by_proyecto(proyecto_id: int) -> int:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("SELECT COUNT(*) as total FROM documentos WHERE proyecto_id=%s", (proyecto_id,))
         result = cur.fetchone()
         return result["total"] if result else 0
+
+def list_id_sap_proyectos() -> List[Dict[str, Any]]:
+    """Pares distintos (id_sap, proyecto_id) de los anexos con ID SAP."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT id_sap, proyecto_id FROM documentos WHERE id_sap IS NOT NULL AND id_sap<>''")
+        return cur.fetchall()
@@ -1,8 +1,10 @@
 # infra/repositories/eventlog_repo.py
-from typing import Optional, List, Dict, Any, Tuple
-from infra.db.connection import get_conn
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+import json
+from infra.db.connection import get_conn, stream_query
+from infra.db.async_connection import fetchall_async
 
-def list_events(entidad: Optional[str] = None, tipo: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+def _events_query(entidad: Optional[str], tipo: Optional[str], limit: Optional[int]) -> Tuple[str, List[Any]]:
     sql = "SELECT id, actor_id, tipo, entidad, entidad_id, detalle, ts FROM event_log"
     where, params = [], []
     if entidad: 
@@ -12,8 +14,102 @@ def list_events(entidad: Optional[str] = None, tipo: Optional[str] = None, limit
         where.append("tipo=%s")
         params.append(tipo)
     if where: sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY id DESC LIMIT %s"
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+def list_events(entidad: Optional[str] = None, tipo: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    sql, params = _events_query(entidad, tipo, limit)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return list(cur.fetchall())
+
+def iter_events(entidad: Optional[str] = None, tipo: Optional[str] = None,
+                limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Como list_events, pero en streaming y sin límite por defecto (exportes)."""
+    sql, params = _events_query(entidad, tipo, limit)
+    return stream_query(sql, params)
+
+def max_event_id(entidad: Optional[str] = None) -> int:
+    """
+    Último id de event_log (de `entidad`, si se indica; índice (entidad, id)).
+    Todo write de los repos registra un evento, así que sirve como versión
+    barata de los datos para invalidar cachés.
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        if entidad:
+            cur.execute("SELECT COALESCE(MAX(id), 0) AS v FROM event_log WHERE entidad=%s", (entidad,))
+        else:
+            cur.execute("SELECT COALESCE(MAX(id), 0) AS v FROM event_log")
+        return int(cur.fetchone()["v"])
+
+def log_deletes(conn, entidad: str, ids: List[int], detalle: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Un evento delete por id, en la transacción de `conn`. Para las filas que se
+    borran en cascada (a mano o por FK), que no pasan por el repo de su entidad.
+    """
+    if not ids:
+        return
+    payload = json.dumps(detalle, ensure_ascii=False) if detalle is not None else None
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+            "VALUES (NULL,'delete',%s,%s,CAST(%s AS JSON))",
+            [(entidad, i, payload) for i in ids]
+        )
+
+def events_since(since: int, entidades: Optional[List[str]] = None, limit: int = 1000,
+                 lag: int = 0) -> List[Dict[str, Any]]:
+    """
+    Eventos con id > since en orden de id (recorre el PK, sin escanear la tabla).
+    Solo columnas necesarias para el feed de cambios.
+    lag: segundos; se omiten los eventos más recientes que eso. Los ids de
+    AUTO_INCREMENT se asignan al insertar, no al commit: un evento recién visible
+    puede tener un id menor que otro ya devuelto si su transacción seguía abierta.
+    """
+    sql = "SELECT id, tipo, entidad, entidad_id FROM event_log WHERE id > %s"
+    params: List[Any] = [since]
+    if lag > 0:
+        sql += " AND ts <= NOW() - INTERVAL %s SECOND"
+        params.append(lag)
+    if entidades:
+        sql += " AND entidad IN (" + ",".join(["%s"] * len(entidades)) + ")"
+        params.extend(entidades)
+    sql += " ORDER BY id ASC LIMIT %s"
     params.append(limit)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return list(cur.fetchall())
+
+def _versions_sql(entidades: List[str]) -> str:
+    return (
+        "SELECT e.entidad, e.v, UNIX_TIMESTAMP(l.ts) AS t "
+        "FROM (SELECT entidad, MAX(id) AS v FROM event_log "
+        "      WHERE entidad IN (" + ",".join(["%s"] * len(entidades)) + ") GROUP BY entidad) e "
+        "JOIN event_log l ON l.id = e.v"
+    )
+
+def _versions(rows: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Optional[float]]:
+    versiones = {r["entidad"]: int(r["v"]) for r in rows}
+    ts = max((float(r["t"]) for r in rows if r["t"] is not None), default=None)
+    return versiones, ts
+
+def entity_versions(entidades: List[str]) -> Tuple[Dict[str, int], Optional[float]]:
+    """
+    High-water mark de event_log por entidad ({entidad: max id}) y epoch del
+    evento más reciente entre ellas. Con el índice (entidad, id) es un lookup
+    por entidad; sirve de validador (ETag/Last-Modified) para respuestas de la API.
+    """
+    if not entidades:
+        return {}, None
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(_versions_sql(entidades), tuple(entidades))
+        rows = cur.fetchall()
+    return _versions(rows)
+
+async def entity_versions_async(entidades: List[str]) -> Tuple[Dict[str, int], Optional[float]]:
+    if not entidades:
+        return {}, None
+    return _versions(await fetchall_async(_versions_sql(entidades), entidades))
@@ -0,0 +1,117 @@
+# infra/repositories/fact_costos_repo.py
+"""
+Tabla derivada fact_costos_mes (proyecto, persona, año, mes) → horas, costo, factura.
+  costo   = dedicacion_horas × personas.COSTO_RECURSO
+  factura = dedicacion_horas × asignaciones.tarifa (0 si no hay tarifa)
+Las asignaciones sin fecha_fin se proyectan hasta diciembre del año siguiente al
+actual (o del año de inicio si es posterior); rebuild() periódico extiende ese horizonte.
+"""
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+import json
+from infra.db.connection import get_conn
+
+_INSERT_SQL = """
+INSERT INTO fact_costos_mes (proyecto_id, persona_id, anio, mes, horas, costo, factura)
+WITH RECURSIVE rango AS (
+    SELECT a.proyecto_id, a.persona_id, a.dedicacion_horas AS horas,
+           COALESCE(p.COSTO_RECURSO, 0) AS costo_h,
+           IF(a.tarifa > 0, a.tarifa, 0) AS tarifa_h,
+           a.fecha_asignacion - INTERVAL (DAYOFMONTH(a.fecha_asignacion) - 1) DAY AS mes_ini,
+           COALESCE(a.fecha_fin - INTERVAL (DAYOFMONTH(a.fecha_fin) - 1) DAY,
+                    MAKEDATE(GREATEST(YEAR(CURDATE()) + 1, YEAR(a.fecha_asignacion)), 1) + INTERVAL 11 MONTH) AS mes_fin
+    FROM asignaciones a
+    JOIN personas p ON p.id = a.persona_id
+    {where}
+), meses AS (
+    SELECT proyecto_id, persona_id, horas, costo_h, tarifa_h, mes_ini AS m, mes_fin
+    FROM rango WHERE mes_ini <= mes_fin
+    UNION ALL
+    SELECT proyecto_id, persona_id, horas, costo_h, tarifa_h, m + INTERVAL 1 MONTH, mes_fin
+    FROM meses WHERE m < mes_fin
+)
+SELECT proyecto_id, persona_id, YEAR(m), MONTH(m),
+       SUM(horas), SUM(horas * costo_h), SUM(horas * tarifa_h)
+FROM meses
+GROUP BY proyecto_id, persona_id, YEAR(m), MONTH(m)
+"""
+
+def _filter(persona_id: Optional[int], proyecto_id: Optional[int], alias: str = "") -> Tuple[str, List[Any]]:
+    where, params = [], []
+    if persona_id is not None:
+        where.append(f"{alias}persona_id=%s"); params.append(persona_id)
+    if proyecto_id is not None:
+        where.append(f"{alias}proyecto_id=%s"); params.append(proyecto_id)
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+def refresh(conn, persona_id: Optional[int] = None, proyecto_id: Optional[int] = None) -> None:
+    """
+    Recalcula las filas de una persona, de un proyecto o de un par (persona, proyecto)
+    dentro de la transacción de `conn`. Sin filtros recalcula todo.
+    """
+    where, params = _filter(persona_id, proyecto_id)
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM fact_costos_mes" + where, tuple(params))
+        a_where, a_params = _filter(persona_id, proyecto_id, alias="a.")
+        cur.execute(_INSERT_SQL.format(where=a_where), tuple(a_params))
+
+def refresh_pairs(conn, pairs: Iterable[Tuple[int, int]]) -> None:
+    """Recalcula los pares (persona_id, proyecto_id) indicados."""
+    for persona_id, proyecto_id in set(pairs):
+        refresh(conn, persona_id=persona_id, proyecto_id=proyecto_id)
+
+def pairs_for(conn, where: str, params: tuple) -> List[Tuple[int, int]]:
+    """Pares (persona_id, proyecto_id) de las asignaciones que cumplen `where` (antes de modificarlas)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT persona_id, proyecto_id FROM asignaciones WHERE " + where, params)
+        return [(r["persona_id"], r["proyecto_id"]) for r in cur.fetchall()]
+
+def rebuild() -> int:
+    """
+    Reconstrucción completa. Devuelve el número de filas generadas.
+    Deja un evento 'fact_costos' en event_log: puede cambiar la tabla sin que
+    cambien las asignaciones (horizonte), y las cachés/ETags se versionan por evento.
+    """
+    with get_conn() as conn:
+        refresh(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS n FROM fact_costos_mes")
+            filas = int(cur.fetchone()["n"])
+            cur.execute(
+                "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+                "VALUES (NULL,'rebuild','fact_costos',NULL,CAST(%s AS JSON))",
+                (json.dumps({"filas": filas}),)
+            )
+        return filas
+
+def list_mensual(anio: int, proyecto_ids: Optional[List[int]] = None,
+                 persona_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    sql = "SELECT proyecto_id, persona_id, anio, mes, horas, costo, factura FROM fact_costos_mes WHERE anio=%s"
+    params: List[Any] = [anio]
+    if proyecto_ids:
+        sql += " AND proyecto_id IN (" + ",".join(["%s"] * len(proyecto_ids)) + ")"
+        params.extend(proyecto_ids)
+    if persona_ids:
+        sql += " AND persona_id IN (" + ",".join(["%s"] * len(persona_ids)) + ")"
+        params.extend(persona_ids)
+    sql += " ORDER BY proyecto_id, persona_id, mes"
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return cur.fetchall()
+
+def list_mensual_detalle(anio: int, proyecto_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Filas del año con los datos de proyecto y persona que muestran los dashboards."""
+    sql = ("SELECT f.proyecto_id, pr.NOMBRE AS proyecto, pr.cliente, pr.PAIS, "
+           "f.persona_id, per.nombre AS colaborador, per.ROL_PRINCIPAL AS categoria, per.SENIORITY AS seniority, "
+           "f.mes, f.horas, f.costo, f.factura "
+           "FROM fact_costos_mes f "
+           "JOIN proyectos pr ON pr.id = f.proyecto_id "
+           "JOIN personas per ON per.id = f.persona_id "
+           "WHERE f.anio=%s")
+    params: List[Any] = [anio]
+    if proyecto_ids:
+        sql += " AND f.proyecto_id IN (" + ",".join(["%s"] * len(proyecto_ids)) + ")"
+        params.extend(proyecto_ids)
+    sql += " ORDER BY f.proyecto_id, f.persona_id, f.mes"
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return cur.fetchall()
@@ -0,0 +1,128 @@
+# infra/repositories/jobs_repo.py
+import json
+from typing import Optional, List, Dict, Any
+from infra.db.connection import get_conn
+
+_JSON_COLS = ("params", "progreso", "resultado")
+
+
+def _dumps(data: Any) -> Optional[str]:
+    if data is None:
+        return None
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _row(r: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if r is None:
+        return None
+    for c in _JSON_COLS:
+        if isinstance(r.get(c), (str, bytes)):
+            r[c] = json.loads(r[c])
+    return r
+
+
+def create_job(tipo: str, params: Dict[str, Any], actor_id: Optional[int] = None) -> int:
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO jobs (tipo, params, actor_id) VALUES (%s, CAST(%s AS JSON), %s)",
+            (tipo, _dumps(params), actor_id),
+        )
+        return cur.lastrowid
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT * FROM jobs WHERE id=%s", (job_id,))
+        return _row(cur.fetchone())
+
+
+def list_jobs(tipo: Optional[str] = None, actor_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    sql = "SELECT * FROM jobs"
+    where, params = [], []
+    if tipo:
+        where.append("tipo=%s")
+        params.append(tipo)
+    if actor_id:
+        where.append("actor_id=%s")
+        params.append(actor_id)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT %s"
+    params.append(limit)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return [_row(r) for r in cur.fetchall()]
+
+
+def claim_next(worker: str) -> Optional[Dict[str, Any]]:
+    """
+    Toma el trabajo pendiente más antiguo y lo marca 'ejecutando'.
+    SKIP LOCKED: varios workers pueden reclamar a la vez sin bloquearse
+    ni tomar el mismo trabajo.
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT id FROM jobs WHERE estado='pendiente' ORDER BY id LIMIT 1 FOR UPDATE SKIP LOCKED")
+        row = cur.fetchone()
+        if not row:
+            return None
+        cur.execute(
+            "UPDATE jobs SET estado='ejecutando', worker=%s, intentos=intentos+1, progreso=NULL, error=NULL, "
+            "started_at=NOW(), heartbeat_at=NOW() WHERE id=%s",
+            (worker, row["id"]),
+        )
+        cur.execute("SELECT * FROM jobs WHERE id=%s", (row["id"],))
+        return _row(cur.fetchone())
+
+
+def _update_owned(cur, set_sql: str, params: tuple, job_id: int, worker: str) -> bool:
+    """
+    UPDATE del trabajo solo si sigue 'ejecutando' a nombre de `worker`. False si
+    requeue_stale lo reencoló (y quizá otro worker lo tomó): no se pisa su estado.
+    """
+    cur.execute(f"UPDATE jobs SET {set_sql} WHERE id=%s AND worker=%s AND estado='ejecutando'",
+                (*params, job_id, worker))
+    if cur.rowcount:
+        return True
+    # rowcount = filas modificadas: 0 también si el heartbeat cayó en el mismo segundo
+    cur.execute("SELECT 1 FROM jobs WHERE id=%s AND worker=%s AND estado='ejecutando'", (job_id, worker))
+    return cur.fetchone() is not None
+
+
+def update_progress(job_id: int, worker: str, progreso: Optional[Dict[str, Any]] = None) -> bool:
+    """Guarda el avance (si se pasa) y renueva el heartbeat. False si el trabajo ya no es de `worker`."""
+    with get_conn() as conn, conn.cursor() as cur:
+        if progreso is None:
+            return _update_owned(cur, "heartbeat_at=NOW()", (), job_id, worker)
+        return _update_owned(cur, "progreso=CAST(%s AS JSON), heartbeat_at=NOW()", (_dumps(progreso),),
+                             job_id, worker)
+
+
+def finish_job(job_id: int, worker: str, resultado: Optional[Dict[str, Any]]) -> bool:
+    with get_conn() as conn, conn.cursor() as cur:
+        return _update_owned(cur, "estado='ok', resultado=CAST(%s AS JSON), finished_at=NOW()",
+                             (_dumps(resultado),), job_id, worker)
+
+
+def fail_job(job_id: int, worker: str, error: str) -> bool:
+    with get_conn() as conn, conn.cursor() as cur:
+        return _update_owned(cur, "estado='error', error=%s, finished_at=NOW()", (error,), job_id, worker)
+
+
+def requeue_stale(stale_after: int, max_intentos: int) -> int:
+    """
+    Trabajos 'ejecutando' sin heartbeat en `stale_after` segundos (worker caído):
+    vuelven a 'pendiente', o pasan a 'error' si ya agotaron los intentos.
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "UPDATE jobs SET estado='error', error='Worker sin respuesta; se agotaron los intentos', "
+            "finished_at=NOW() "
+            "WHERE estado='ejecutando' AND heartbeat_at < NOW() - INTERVAL %s SECOND AND intentos >= %s",
+            (stale_after, max_intentos),
+        )
+        cur.execute(
+            "UPDATE jobs SET estado='pendiente', worker=NULL "
+            "WHERE estado='ejecutando' AND heartbeat_at < NOW() - INTERVAL %s SECOND",
+            (stale_after,),
+        )
+        return cur.rowcount
@@ -1,7 +1,9 @@
 # infra/repositories/perfiles_repo.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import json
 from infra.db.connection import get_conn
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset
 
 def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
     if detalle is None:
@@ -74,9 +76,15 @@ def get_perfil(perfil_id: int) -> Optional[Dict[str, Any]]:
         cur.execute("SELECT * FROM perfiles WHERE id=%s", (perfil_id,))
         return cur.fetchone()
 
-def list_perfiles(solo_activos: Optional[bool] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Lista todos los perfiles con filtros opcionales"""
-    sql = "SELECT * FROM perfiles"
+async def get_perfil_async(perfil_id: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async("SELECT * FROM perfiles WHERE id=%s", (perfil_id,))
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f for f in ("id", "nombre", "tarifa_sin_iva", "vigencia", "activo")}
+
+def _list_query(solo_activos: Optional[bool], search: Optional[str],
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, "SELECT *") + " FROM perfiles"
     where = []
     params: List[Any] = []
     
@@ -87,14 +95,21 @@ def list_perfiles(solo_activos: Optional[bool] = None, search: Optional[str] = N
         where.append("nombre LIKE %s")
         params.append(f"%{search}%")
     
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY nombre ASC"
-    
+    return keyset(sql, where, params, "id", "nombre ASC", after, limit)
+
+def list_perfiles(solo_activos: Optional[bool] = None, search: Optional[str] = None,
+                  fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Lista todos los perfiles con filtros opcionales (fields/after/limit: proyección y keyset por id)"""
+    sql, params = _list_query(solo_activos, search, fields, after, limit)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_perfiles_async(solo_activos: Optional[bool] = None, search: Optional[str] = None,
+                              fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    sql, params = _list_query(solo_activos, search, fields, after, limit)
+    return await fetchall_async(sql, params)
+
 def exists_nombre(nombre: str, exclude_id: Optional[int] = None) -> bool:
     """Verifica si ya existe un perfil con el nombre dado"""
     sql = "SELECT id FROM perfiles WHERE nombre=%s"
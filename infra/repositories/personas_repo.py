@@ -1,8 +1,11 @@
 # infra/repositories/personas_repo.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from datetime import date
 import json
-from infra.db.connection import get_conn
+from infra.db.connection import get_conn, stream_query
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset, in_clause
+from infra.repositories import fact_costos_repo
 
 def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
     """
@@ -70,6 +73,8 @@ def update_persona(persona_id: int, nombre: str, ROL_PRINCIPAL: str, COSTO_RECUR
             (nombre, ROL_PRINCIPAL, COSTO_RECURSO, NUMERO_DOCUMENTO, numero_contacto, correo,
              PAIS, SENIORITY, LIDER_DIRECTO, TIPO_DOCUMENTO, 1 if activo else 0, vigencia, persona_id)
         )
+        # COSTO_RECURSO puede haber cambiado: recalcular el costo mensual de la persona
+        fact_costos_repo.refresh(conn, persona_id=persona_id)
         _log_event(conn, "update", "personas", persona_id, {"nombre": nombre, "ROL_PRINCIPAL": ROL_PRINCIPAL, "activo": activo, "vigencia": str(vigencia) if vigencia else None})
 
 def set_activo(persona_id: int, activo: bool) -> None:
@@ -82,12 +87,37 @@ def get_persona(persona_id: int) -> Optional[Dict[str, Any]]:
         cur.execute("SELECT * FROM personas WHERE id=%s", (persona_id,))
         return cur.fetchone()
 
-def list_personas(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
-    sql = """SELECT p.*, l.nombre as LIDER_NOMBRE 
+_LIST_SELECT = "SELECT p.*, l.nombre as LIDER_NOMBRE"
+_LIST_FROM = """ 
              FROM personas p 
              LEFT JOIN personas l ON p.LIDER_DIRECTO = l.id"""
+_LIST_SQL = _LIST_SELECT + _LIST_FROM
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f"p.{f}" for f in (
+    "id", "nombre", "ROL_PRINCIPAL", "COSTO_RECURSO", "activo", "NUMERO_DOCUMENTO",
+    "numero_contacto", "correo", "PAIS", "SENIORITY", "LIDER_DIRECTO", "TIPO_DOCUMENTO", "vigencia")}
+_LIST_FIELDS["LIDER_NOMBRE"] = "l.nombre"
+
+def get_persona_item(persona_id: int) -> Optional[Dict[str, Any]]:
+    """Misma forma que list_personas (incluye LIDER_NOMBRE) para una sola persona."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(_LIST_SQL + " WHERE p.id=%s", (persona_id,))
+        return cur.fetchone()
+
+async def get_persona_item_async(persona_id: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async(_LIST_SQL + " WHERE p.id=%s", (persona_id,))
+
+def _list_query(rol: Optional[str], solo_activas: Optional[bool], search: Optional[str],
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                ids: Optional[List[int]] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, _LIST_SELECT) + _LIST_FROM
     where = []
     params: List[Any] = []
+    if ids is not None:
+        cond, ids_params = in_clause("p.id", ids)
+        where.append(cond)
+        params.extend(ids_params)
     if rol:
         where.append("p.ROL_PRINCIPAL = %s")
         params.append(rol)
@@ -98,14 +128,31 @@ def list_personas(rol: Optional[str] = None, solo_activas: Optional[bool] = None
         where.append("(p.nombre LIKE %s OR p.ROL_PRINCIPAL LIKE %s)")
         like = f"%{search}%"
         params.extend([like, like])
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY p.created_at DESC, p.nombre ASC"
+    return keyset(sql, where, params, "p.id", "p.created_at DESC, p.nombre ASC", after, limit)
+
+def list_personas(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None,
+                  fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                  ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id; ids: lookup en lote (IN)."""
+    sql, params = _list_query(rol, solo_activas, search, fields, after, limit, ids)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         rows = cur.fetchall()
     return rows
 
+async def list_personas_async(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None,
+                              fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                              ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como list_personas, para los endpoints async de la API."""
+    sql, params = _list_query(rol, solo_activas, search, fields, after, limit, ids)
+    return await fetchall_async(sql, params)
+
+def iter_personas(rol: Optional[str] = None, solo_activas: Optional[bool] = None, search: Optional[str] = None,
+                  fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Como list_personas, pero en streaming (cursor de servidor) para exportes."""
+    sql, params = _list_query(rol, solo_activas, search, fields, after, limit)
+    return stream_query(sql, params)
+
 def exists_nombre(nombre: str, exclude_id: Optional[int] = None) -> bool:
     sql = "SELECT id FROM personas WHERE nombre=%s"
     params: List[Any] = [nombre]
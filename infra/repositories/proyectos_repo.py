@@ -1,8 +1,11 @@
 '''Acceso MySQL Proyectos (placeholder)'''
 # infra/repositories/proyectos_repo.py
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 import json
-from infra.db.connection import get_conn
+from infra.db.connection import get_conn, stream_query
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset, in_clause
+from infra.repositories import eventlog_repo, fact_costos_repo
 
 def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
     if detalle is None: return None
@@ -19,13 +22,13 @@ def _log_event(conn, tipo: str, entidad: str, entidad_id: int,
             cur.execute(
                 "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
                 "VALUES (%s,%s,%s,%s,CAST(%s AS JSON))",
-                (actor_id, tipo, "proyectos", entidad_id, payload)
+                (actor_id, tipo, entidad, entidad_id, payload)
             )
         except Exception:
             cur.execute(
                 "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
                 "VALUES (%s,%s,%s,%s,NULL)",
-                (actor_id, tipo, "proyectos", entidad_id)
+                (actor_id, tipo, entidad, entidad_id)
             )
 
 def exists_nombre(nombre: str, exclude_id: Optional[int] = None) -> bool:
@@ -85,36 +88,94 @@ def get_proyecto(pid: int) -> Optional[Dict[str, Any]]:
 
 def delete_proyecto(pid: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
+        # Ids de lo que se borra en cascada, para registrar su evento delete
+        cur.execute("SELECT id FROM sprints WHERE proyecto_id=%s", (pid,))
+        sprint_ids = [row["id"] for row in cur.fetchall()]
+        cur.execute(
+            "SELECT id FROM asignaciones WHERE proyecto_id=%s "
+            "OR sprint_id IN (SELECT id FROM sprints WHERE proyecto_id=%s)", (pid, pid)
+        )
+        asignacion_ids = [row["id"] for row in cur.fetchall()]
+        # documentos se borran por FK (ON DELETE CASCADE)
+        cur.execute("SELECT id FROM documentos WHERE proyecto_id=%s", (pid,))
+        documento_ids = [row["id"] for row in cur.fetchall()]
+
         # Eliminar asignaciones relacionadas
         cur.execute("DELETE FROM asignaciones WHERE proyecto_id=%s", (pid,))
         
-        # Eliminar sprints relacionados (que a su vez eliminará asignaciones de esos sprints)
-        cur.execute("SELECT id FROM sprints WHERE proyecto_id=%s", (pid,))
-        sprint_ids = [row["id"] for row in cur.fetchall()]
+        # Eliminar sprints relacionados (y las asignaciones de esos sprints)
         for sid in sprint_ids:
             cur.execute("DELETE FROM asignaciones WHERE sprint_id=%s", (sid,))
         cur.execute("DELETE FROM sprints WHERE proyecto_id=%s", (pid,))
         
         # Eliminar el proyecto
         cur.execute("DELETE FROM proyectos WHERE id=%s", (pid,))
+        fact_costos_repo.refresh(conn, proyecto_id=pid)
+        cascada = {"proyecto_id": pid}
+        eventlog_repo.log_deletes(conn, "asignaciones", asignacion_ids, cascada)
+        eventlog_repo.log_deletes(conn, "sprints", sprint_ids, cascada)
+        eventlog_repo.log_deletes(conn, "documentos", documento_ids, cascada)
         _log_event(conn, "delete", "proyectos", pid, {"sprints_eliminados": len(sprint_ids)})
 
-def list_proyectos(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
-    sql = """SELECT p.*, per.nombre as lider_nombre 
+_LIST_SELECT = "SELECT p.*, per.nombre as lider_nombre"
+_LIST_FROM = """ 
              FROM proyectos p 
              LEFT JOIN personas per ON p.pm_id = per.id"""
+_LIST_SQL = _LIST_SELECT + _LIST_FROM
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f"p.{f}" for f in (
+    "id", "NOMBRE", "cliente", "pm_id", "FECHA_INICIO", "FECHA_FIN_ESTIMADA", "ESTADO", "BUDGET",
+    "COSTO_REAL_TOTAL", "PAIS", "CATEGORIA", "LIDER_BLUETAB", "LIDER_CLIENTE", "FECHA_FIN", "MANAGER_BLUETAB")}
+_LIST_FIELDS["lider_nombre"] = "per.nombre"
+
+def get_proyecto_item(pid: int) -> Optional[Dict[str, Any]]:
+    """Misma forma que list_proyectos (incluye lider_nombre) para un solo proyecto."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(_LIST_SQL + " WHERE p.id=%s", (pid,))
+        return cur.fetchone()
+
+async def get_proyecto_item_async(pid: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async(_LIST_SQL + " WHERE p.id=%s", (pid,))
+
+def _list_query(estado: Optional[str], cliente: Optional[str], search: Optional[str],
+                ids: Optional[List[int]] = None,
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, _LIST_SELECT) + _LIST_FROM
     where, params = [], []
+    if ids is not None:
+        cond, ids_params = in_clause("p.id", ids)
+        where.append(cond); params.extend(ids_params)
     if estado: where.append("p.ESTADO=%s"); params.append(estado)
     if cliente: where.append("p.cliente=%s"); params.append(cliente)
     if search:
         where.append("(p.NOMBRE LIKE %s OR p.cliente LIKE %s)")
         like = f"%{search}%"; params.extend([like, like])
-    if where: sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY p.created_at DESC, p.NOMBRE ASC"
+    return keyset(sql, where, params, "p.id", "p.created_at DESC, p.NOMBRE ASC", after, limit)
+
+def list_proyectos(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+                   fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                   ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id; ids: lookup en lote (IN)."""
+    sql, params = _list_query(estado, cliente, search, ids, fields, after, limit)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_proyectos_async(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+                               fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                               ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Como list_proyectos, para los endpoints async de la API."""
+    sql, params = _list_query(estado, cliente, search, ids, fields, after, limit)
+    return await fetchall_async(sql, params)
+
+def iter_proyectos(estado: Optional[str] = None, cliente: Optional[str] = None, search: Optional[str] = None,
+                   ids: Optional[List[int]] = None,
+                   fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Como list_proyectos, pero en streaming; ids acota a esos proyectos (permisos)."""
+    sql, params = _list_query(estado, cliente, search, ids, fields, after, limit)
+    return stream_query(sql, params)
+
 def list_distinct_clientes() -> List[str]:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("SELECT DISTINCT cliente FROM proyectos WHERE cliente IS NOT NULL AND cliente<>'' ORDER BY cliente ASC")
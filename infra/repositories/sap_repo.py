@@ -1,6 +1,41 @@
 # infra/repositories/sap_repo.py
-from typing import Optional, List, Dict, Any
-from infra.db.connection import get_conn
+import json
+import os
+import tempfile
+import time
+from typing import Optional, List, Dict, Any, Callable, Iterable
+from infra.db.connection import get_conn, dedicated_conn
+
+
+def _prepare_json_payload(detalle: Dict[str, Any] | None) -> Optional[str]:
+    if detalle is None: return None
+    try:
+        return json.dumps(detalle, ensure_ascii=False, default=str)
+    except Exception:
+        return json.dumps({"raw": str(detalle)}, ensure_ascii=False)
+
+
+def _log_event(conn, tipo: str, entidad_id: Optional[int], detalle: Dict[str, Any] | None = None,
+               actor_id: int | None = None):
+    """
+    Registra el write en event_log (entidad 'sap_report'). Las cargas masivas
+    dejan un solo evento sin entidad_id con el resumen; sirve de versión de
+    datos para las cachés que dependen de sap_report (p. ej. la conciliación).
+    """
+    payload = _prepare_json_payload(detalle)
+    with conn.cursor() as cur:
+        try:
+            cur.execute(
+                "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+                "VALUES (%s,%s,%s,%s,CAST(%s AS JSON))",
+                (actor_id, tipo, "sap_report", entidad_id, payload)
+            )
+        except Exception:
+            cur.execute(
+                "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+                "VALUES (%s,%s,%s,%s,NULL)",
+                (actor_id, tipo, "sap_report", entidad_id)
+            )
 
 
 def list_sap_report(anio: Optional[int] = None, mes: Optional[str] = None,
@@ -28,6 +63,16 @@ def list_sap_report(anio: Optional[int] = None, mes: Optional[str] = None,
         return cur.fetchall()
 
 
+def list_horas_anio(anio: int) -> List[Dict[str, Any]]:
+    """Solo las columnas que usa la conciliación contra lo planificado."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT mes, colaborador, id_sap, proyecto_sap, horas_mes, tiempo_novedad_hrs "
+            "FROM sap_report WHERE anio=%s", (anio,)
+        )
+        return cur.fetchall()
+
+
 def get_sap_report(record_id: int) -> Optional[Dict[str, Any]]:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("SELECT * FROM sap_report WHERE id=%s", (record_id,))
@@ -46,48 +91,253 @@ def create_sap_report(data: Dict[str, Any]) -> int:
              data.get("tipo_novedad"), data.get("tiempo_novedad_hrs"),
              1 if data.get("reporte_sap", True) else 0)
         )
-        return cur.lastrowid
+        record_id = cur.lastrowid
+        _log_event(conn, "create", record_id, {"id_sap": data["id_sap"], "colaborador": data["colaborador"],
+                                               "mes": data["mes"], "anio": data.get("anio", 2026)})
+        return record_id
 
 
-def bulk_upsert(rows: List[Dict[str, Any]]) -> int:
-    """Inserta o actualiza masivamente. Retorna cantidad de filas afectadas."""
-    if not rows:
-        return 0
-    sql = """INSERT INTO sap_report
-             (nro, id_empleado_sap, colaborador, id_sap, proyecto_sap, horas_mes, mes, anio,
-              tipo_novedad, tiempo_novedad_hrs, reporte_sap)
-             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-             ON DUPLICATE KEY UPDATE
+# Orden de columnas de la carga (y de las tuplas que acepta bulk_load)
+COLUMNAS = ("nro", "id_empleado_sap", "colaborador", "id_sap", "proyecto_sap", "horas_mes", "mes", "anio",
+            "tipo_novedad", "tiempo_novedad_hrs", "reporte_sap")
+
+# Campos que se pisan cuando la clave natural (anio, mes, id_sap, colaborador) ya existe
+_UPSERT_SET = """nro=VALUES(nro),
+              id_empleado_sap=VALUES(id_empleado_sap),
+              proyecto_sap=VALUES(proyecto_sap),
               horas_mes=VALUES(horas_mes),
               tipo_novedad=VALUES(tipo_novedad),
               tiempo_novedad_hrs=VALUES(tiempo_novedad_hrs),
               reporte_sap=VALUES(reporte_sap),
               updated_at=CURRENT_TIMESTAMP"""
-    values = []
-    for r in rows:
-        reporte = r.get("reporte_sap", True)
-        if isinstance(reporte, str):
-            reporte = reporte.upper() == "TRUE"
-        values.append((
-            r.get("nro"), r.get("id_empleado_sap"), r["colaborador"],
-            r["id_sap"], r["proyecto_sap"], r["horas_mes"], r["mes"], r.get("anio", 2026),
-            r.get("tipo_novedad") or None, r.get("tiempo_novedad_hrs") or None,
-            1 if reporte else 0
-        ))
+
+
+def _values(r: Dict[str, Any]) -> tuple:
+    reporte = r.get("reporte_sap", True)
+    if isinstance(reporte, str):
+        reporte = reporte.upper() == "TRUE"
+    return (
+        r.get("nro"), r.get("id_empleado_sap"), r["colaborador"],
+        r["id_sap"], r["proyecto_sap"], r["horas_mes"], r["mes"], r.get("anio", 2026),
+        r.get("tipo_novedad") or None, r.get("tiempo_novedad_hrs") or None,
+        1 if reporte else 0
+    )
+
+
+def bulk_upsert(rows: List[Dict[str, Any]]) -> int:
+    """Inserta o actualiza masivamente. Retorna cantidad de filas afectadas."""
+    if not rows:
+        return 0
+    sql = f"""INSERT INTO sap_report ({", ".join(COLUMNAS)})
+             VALUES ({", ".join(["%s"] * len(COLUMNAS))})
+             ON DUPLICATE KEY UPDATE
+              {_UPSERT_SET}"""
     with get_conn() as conn, conn.cursor() as cur:
-        cur.executemany(sql, values)
-        return cur.rowcount
+        cur.executemany(sql, [_values(r) for r in rows])
+        afectadas = cur.rowcount
+        _log_event(conn, "bulk_upsert", None, {"filas": len(rows)})
+        return afectadas
+
+
+# ── Carga masiva: staging + merge ──
+# Tabla temporaria de la sesión: no choca entre cargas concurrentes y no
+# bloquea sap_report mientras se llena. Tiene la misma clave natural que
+# sap_report: ante claves repetidas en el archivo gana la última fila, como
+# en un upsert fila a fila.
+_STAGE_DDL = """CREATE TEMPORARY TABLE sap_report_stage (
+    seq INT AUTO_INCREMENT PRIMARY KEY,
+    nro INT NULL,
+    id_empleado_sap VARCHAR(50) NULL,
+    colaborador VARCHAR(200) NOT NULL,
+    id_sap VARCHAR(50) NOT NULL,
+    proyecto_sap VARCHAR(300) NOT NULL,
+    horas_mes DECIMAL(10,2) NOT NULL DEFAULT 0,
+    mes VARCHAR(20) NOT NULL,
+    anio INT NOT NULL,
+    tipo_novedad VARCHAR(100) NULL,
+    tiempo_novedad_hrs DECIMAL(10,2) NULL,
+    reporte_sap TINYINT(1) NOT NULL DEFAULT 1,
+    UNIQUE KEY uq_stage_clave (anio, mes, id_sap, colaborador)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"""
+
+_KEY = ("anio", "mes", "id_sap", "colaborador")
+_CONTENT = tuple(c for c in COLUMNAS if c not in _KEY)
+
+_STAGE_INSERT = (f"INSERT INTO sap_report_stage ({', '.join(COLUMNAS)}) "
+                 f"VALUES ({', '.join(['%s'] * len(COLUMNAS))}) "
+                 f"ON DUPLICATE KEY UPDATE {', '.join(f'{c}=VALUES({c})' for c in _CONTENT)}")
+
+_STAGE_LOAD = (f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE sap_report_stage CHARACTER SET utf8mb4 "
+               f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+               f"({', '.join(COLUMNAS)})")
+
+_MERGE = f"""INSERT INTO sap_report ({", ".join(COLUMNAS)})
+             SELECT {", ".join(COLUMNAS)} FROM sap_report_stage
+             ON DUPLICATE KEY UPDATE
+              {_UPSERT_SET}"""
+
+
+def _on_key(a: str, b: str) -> str:
+    return " AND ".join(f"{b}.{c} = {a}.{c}" for c in _KEY)
+
+
+def _hash(alias: str) -> str:
+    """Huella del contenido (todo lo que no es clave natural) de una fila."""
+    parts = ", ".join(f"IFNULL({alias}.{c}, '\\\\N')" for c in _CONTENT)
+    return f"MD5(CONCAT_WS('|', {parts}))"
+
+
+# Diff contra lo guardado, acotado a los (anio, mes) que trae el archivo.
+# Una tabla temporaria no se puede referenciar dos veces en la misma consulta,
+# por eso los meses van a su propia tabla.
+_DIFF_MESES = """CREATE TEMPORARY TABLE sap_report_stage_meses (
+    PRIMARY KEY (anio, mes)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+  SELECT DISTINCT anio, mes FROM sap_report_stage"""
+
+_DIFF_DELETE = f"""DELETE t FROM sap_report t
+                   JOIN sap_report_stage_meses m ON m.anio = t.anio AND m.mes = t.mes
+                   LEFT JOIN sap_report_stage s ON {_on_key("t", "s")}
+                   WHERE s.seq IS NULL"""
+
+_DIFF_UPDATE = f"""UPDATE sap_report t
+                   JOIN sap_report_stage s ON {_on_key("s", "t")}
+                   SET {", ".join(f"t.{c} = s.{c}" for c in _CONTENT)}
+                   WHERE {_hash("t")} <> {_hash("s")}"""
+
+_DIFF_INSERT = f"""INSERT INTO sap_report ({", ".join(COLUMNAS)})
+                   SELECT {", ".join(f"s.{c}" for c in COLUMNAS)}
+                   FROM sap_report_stage s
+                   LEFT JOIN sap_report t ON {_on_key("s", "t")}
+                   WHERE t.id IS NULL"""
+
+
+def _tsv_field(v) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):  # str(True) = "True", que LOAD DATA guarda como 0
+        return "1" if v else "0"
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _stage_load_data(cur, values: List[tuple]) -> None:
+    """Vuelca el bloque a un TSV temporal y lo sube con LOAD DATA LOCAL INFILE."""
+    fd, path = tempfile.mkstemp(suffix=".tsv", prefix="sap_stage_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            for v in values:
+                f.write("\t".join(_tsv_field(x) for x in v) + "\n")
+        cur.execute(_STAGE_LOAD, (path,))
+    finally:
+        os.unlink(path)
+
+
+def _merge_diff(cur) -> Dict[str, int]:
+    cur.execute(_DIFF_MESES)
+    try:
+        cur.execute(_DIFF_DELETE)
+        eliminadas = cur.rowcount
+        cur.execute(_DIFF_UPDATE)
+        actualizadas = cur.rowcount
+        cur.execute(_DIFF_INSERT)
+        insertadas = cur.rowcount
+    finally:
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS sap_report_stage_meses")
+    return {"insertadas": insertadas, "actualizadas": actualizadas, "eliminadas": eliminadas}
+
+
+def bulk_load(chunks: Iterable[List[Dict[str, Any]]], sync_months: bool = False,
+              use_load_data: bool = False,
+              on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+              before_merge: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Carga masiva a sap_report en una sola transacción. Cada bloque es una lista
+    de dicts o de tuplas ya ordenadas como COLUMNAS.
+    1) cada bloque de filas va a la tabla de staging (INSERT multi-fila vía
+       executemany, o LOAD DATA LOCAL INFILE si use_load_data=True);
+    2) merge set-based contra sap_report:
+       - sync_months=False: un único INSERT ... SELECT ... ON DUPLICATE KEY UPDATE
+         (agrega/actualiza, no borra nada);
+       - sync_months=True: los (anio, mes) del archivo quedan idénticos a él.
+         Se compara por clave natural + huella del contenido y solo se aplican
+         los DELETE/UPDATE/INSERT necesarios; las filas sin cambios no se tocan.
+    sap_report solo se toca en el merge, así que los locks duran lo que dura
+    el merge y no la lectura del archivo.
+    on_chunk recibe las métricas de cada bloque a medida que se carga;
+    before_merge se llama con el staging completo y, si lanza, no se aplica nada.
+    Retorna filas, claves, insertadas, actualizadas, eliminadas, sin_cambios,
+    tiempos y bloques.
+    """
+    t_start = time.perf_counter()
+    bloques: List[Dict[str, Any]] = []
+    total = 0
+    conn_cm = dedicated_conn(local_infile=True) if use_load_data else get_conn()
+    with conn_cm as conn, conn.cursor() as cur:
+        cur.execute(_STAGE_DDL)
+        try:
+            t_parse = time.perf_counter()
+            for n, rows in enumerate(chunks, start=1):
+                t_stage = time.perf_counter()
+                values = [r if isinstance(r, tuple) else _values(r) for r in rows]
+                if values:
+                    if use_load_data:
+                        _stage_load_data(cur, values)
+                    else:
+                        cur.executemany(_STAGE_INSERT, values)
+                t_end = time.perf_counter()
+                total += len(values)
+                seg = t_end - t_parse
+                info = {"bloque": n, "filas": len(values),
+                        "lectura_s": round(t_stage - t_parse, 4),
+                        "staging_s": round(t_end - t_stage, 4),
+                        "filas_s": round(len(values) / seg) if seg > 0 else None,
+                        "acumulado": total}
+                bloques.append(info)
+                if on_chunk:
+                    on_chunk(info)
+                t_parse = time.perf_counter()
+
+            if before_merge:
+                before_merge()
+            t_merge = time.perf_counter()
+            cur.execute("SELECT COUNT(*) AS n FROM sap_report_stage")
+            claves = cur.fetchone()["n"]
+            if sync_months:
+                cambios = _merge_diff(cur)
+            else:
+                cur.execute(f"""SELECT COUNT(*) AS n FROM sap_report_stage s
+                                JOIN sap_report t ON {_on_key("s", "t")}""")
+                existentes = cur.fetchone()["n"]
+                cur.execute(_MERGE)
+                cambios = {"insertadas": claves - existentes, "actualizadas": existentes, "eliminadas": 0}
+            merge_s = time.perf_counter() - t_merge
+            _log_event(conn, "sync" if sync_months else "bulk_load", None, {"filas": total, "claves": claves, **cambios})
+        finally:
+            cur.execute("DROP TEMPORARY TABLE IF EXISTS sap_report_stage")
+
+    return {
+        "filas": total,
+        "claves": claves,
+        **cambios,
+        "sin_cambios": claves - cambios["insertadas"] - cambios["actualizadas"],
+        "merge_s": round(merge_s, 4),
+        "total_s": round(time.perf_counter() - t_start, 4),
+        "bloques": bloques,
+    }
 
 
 def delete_by_anio_mes(anio: int, mes: str) -> int:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("DELETE FROM sap_report WHERE anio=%s AND mes=%s", (anio, mes))
-        return cur.rowcount
+        eliminadas = cur.rowcount
+        _log_event(conn, "delete_mes", None, {"anio": anio, "mes": mes, "filas": eliminadas})
+        return eliminadas
 
 
 def delete_sap_report(record_id: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("DELETE FROM sap_report WHERE id=%s", (record_id,))
+        _log_event(conn, "delete", record_id)
 
 
 def get_distinct_meses(anio: Optional[int] = None) -> List[str]:
@@ -1,7 +1,10 @@
 '''Acceso MySQL Sprints (placeholder)'''
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import json
 from infra.db.connection import get_conn
+from infra.db.async_connection import fetchall_async, fetchone_async
+from infra.db.paging import select_clause, keyset, in_clause
+from infra.repositories import eventlog_repo, fact_costos_repo
 
 def _payload(d):
     import json
@@ -50,29 +53,77 @@ def close_sprint(sid: int, costo_real: float) -> None:
         cur.execute("UPDATE sprints SET estado='Cerrado', costo_real=%s WHERE id=%s", (costo_real, sid))
         _log(conn, "close", sid, {"costo_real": costo_real})
 
-def list_sprints(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
-    sql = "SELECT s.*, p.nombre as proyecto_nombre FROM sprints s LEFT JOIN proyectos p ON s.proyecto_id = p.id"
+_LIST_SELECT = "SELECT s.*, p.nombre as proyecto_nombre"
+_LIST_FROM = " FROM sprints s LEFT JOIN proyectos p ON s.proyecto_id = p.id"
+_LIST_SQL = _LIST_SELECT + _LIST_FROM
+
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f"s.{f}" for f in (
+    "id", "proyecto_id", "nombre", "fecha_inicio", "fecha_fin", "costo_estimado", "costo_real",
+    "estado", "actividades")}
+_LIST_FIELDS["proyecto_nombre"] = "p.nombre"
+
+def _list_query(proyecto_id: Optional[int], estado: Optional[str], search: Optional[str],
+                fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                ids: Optional[List[int]] = None, proyecto_ids: Optional[List[int]] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, _LIST_SELECT) + _LIST_FROM
     where, params = [], []
+    if ids is not None:
+        cond, ids_params = in_clause("s.id", ids)
+        where.append(cond); params.extend(ids_params)
+    if proyecto_ids is not None:
+        cond, ids_params = in_clause("s.proyecto_id", proyecto_ids)
+        where.append(cond); params.extend(ids_params)
     if proyecto_id: where.append("s.proyecto_id=%s"); params.append(proyecto_id)
     if estado: where.append("s.estado=%s"); params.append(estado)
     if search:
         where.append("s.nombre LIKE %s"); params.append(f"%{search}%")
-    if where: sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY s.fecha_inicio DESC, s.id DESC"
+    return keyset(sql, where, params, "s.id", "s.fecha_inicio DESC, s.id DESC", after, limit)
+
+def list_sprints(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None,
+                 fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                 ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id; ids: lookup en lote (IN)."""
+    sql, params = _list_query(proyecto_id, estado, search, fields, after, limit, ids)
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_sprints_async(proyecto_id: Optional[int] = None, estado: Optional[str] = None, search: Optional[str] = None,
+                             fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None,
+                             ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    sql, params = _list_query(proyecto_id, estado, search, fields, after, limit, ids)
+    return await fetchall_async(sql, params)
+
+async def list_sprints_by_proyectos_async(proyecto_ids: List[int]) -> List[Dict[str, Any]]:
+    """Sprints de varios proyectos en una sola consulta (include= de la API)."""
+    sql, params = _list_query(None, None, None, proyecto_ids=proyecto_ids)
+    return await fetchall_async(sql, params)
+
 def get_sprint(sid: int) -> Optional[Dict[str, Any]]:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("SELECT * FROM sprints WHERE id=%s", (sid,))
         return cur.fetchone()
 
+def get_sprint_item(sid: int) -> Optional[Dict[str, Any]]:
+    """Misma forma que list_sprints (incluye proyecto_nombre) para un solo sprint."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(_LIST_SQL + " WHERE s.id=%s", (sid,))
+        return cur.fetchone()
+
+async def get_sprint_item_async(sid: int) -> Optional[Dict[str, Any]]:
+    return await fetchone_async(_LIST_SQL + " WHERE s.id=%s", (sid,))
+
 def delete_sprint(sid: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         # Eliminar asignaciones relacionadas con este sprint
+        prev = fact_costos_repo.pairs_for(conn, "sprint_id=%s", (sid,))
+        cur.execute("SELECT id FROM asignaciones WHERE sprint_id=%s", (sid,))
+        asignacion_ids = [row["id"] for row in cur.fetchall()]
         cur.execute("DELETE FROM asignaciones WHERE sprint_id=%s", (sid,))
+        fact_costos_repo.refresh_pairs(conn, prev)
         
         # Eliminar el sprint
         cur.execute("DELETE FROM sprints WHERE id=%s", (sid,))
+        eventlog_repo.log_deletes(conn, "asignaciones", asignacion_ids, {"sprint_id": sid})
         _log(conn, "delete", sid)
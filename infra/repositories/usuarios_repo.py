@@ -1,6 +1,23 @@
 # infra/repositories/usuarios_repo.py
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import json
 from infra.db.connection import get_conn
+from infra.db.async_connection import fetchall_async
+from infra.db.paging import select_clause, keyset
+
+def _log_event(conn, tipo: str, entidad_id: int, detalle: Dict[str, Any] | None = None) -> None:
+    """
+    Registra el write en event_log (entidad 'usuarios'). El último id de la entidad
+    es la versión de usuarios con la que la API valida sus cachés de autenticación.
+    Nunca incluye el hash de la contraseña.
+    """
+    payload = json.dumps(detalle, ensure_ascii=False) if detalle is not None else None
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO event_log (actor_id, tipo, entidad, entidad_id, detalle) "
+            "VALUES (NULL,%s,'usuarios',%s,CAST(%s AS JSON))",
+            (tipo, entidad_id, payload)
+        )
 
 def get_by_email(email: str) -> Optional[Dict[str, Any]]:
     with get_conn() as conn, conn.cursor() as cur:
@@ -22,7 +39,9 @@ def create_user(email: str, hash_password: str, rol_app: str, persona_id: int |
             "INSERT INTO usuarios (email, hash_password, rol_app, persona_id, activo) VALUES (%s,%s,%s,%s,%s)",
             (email, hash_password, rol_app, persona_id, 1 if activo else 0)
         )
-        return cur.lastrowid
+        user_id = cur.lastrowid
+        _log_event(conn, "create", user_id, {"email": email, "rol_app": rol_app, "activo": bool(activo)})
+        return user_id
 
 def update_user(user_id: int, email: str, rol_app: str, persona_id: int | None, activo: bool) -> None:
     with get_conn() as conn, conn.cursor() as cur:
@@ -30,19 +49,37 @@ def update_user(user_id: int, email: str, rol_app: str, persona_id: int | None,
             "UPDATE usuarios SET email=%s, rol_app=%s, persona_id=%s, activo=%s WHERE id=%s",
             (email, rol_app, persona_id, 1 if activo else 0, user_id)
         )
+        _log_event(conn, "update", user_id, {"email": email, "rol_app": rol_app, "activo": bool(activo)})
 
 def update_password(user_id: int, hash_password: str) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("UPDATE usuarios SET hash_password=%s WHERE id=%s", (hash_password, user_id))
+        _log_event(conn, "password", user_id)
 
-def list_users() -> List[Dict[str, Any]]:
+# Columnas proyectables con fields= (nombre en la respuesta -> expresión SQL)
+_LIST_FIELDS = {f: f for f in ("id", "email", "rol_app", "persona_id", "activo")}
+
+def _list_query(fields: Optional[List[str]] = None, after: Optional[int] = None,
+                limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    sql = select_clause(_LIST_FIELDS, fields, "SELECT id,email,rol_app,persona_id,activo,ultimo_login,created_at")
+    return keyset(sql + " FROM usuarios", [], [], "id", "created_at DESC", after, limit)
+
+def list_users(fields: Optional[List[str]] = None, after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """fields: solo esas columnas; after/limit: paginación keyset por id."""
+    sql, params = _list_query(fields, after, limit)
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT id,email,rol_app,persona_id,activo,ultimo_login,created_at FROM usuarios ORDER BY created_at DESC")
+        cur.execute(sql, tuple(params))
         return cur.fetchall()
 
+async def list_users_async(fields: Optional[List[str]] = None, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    sql, params = _list_query(fields, after, limit)
+    return await fetchall_async(sql, params)
+
 def delete_user(user_id: int) -> None:
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("DELETE FROM usuarios WHERE id=%s", (user_id,))
+        _log_event(conn, "delete", user_id)
 
 # ==================== USUARIO-PROYECTOS ====================
 
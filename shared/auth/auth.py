@@ -3,7 +3,7 @@ import streamlit as st
 import extra_streamlit_components as stx
 import jwt
 from typing import Literal, Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from shared.config import settings
 import time
 
@@ -23,19 +23,28 @@ def get_cookie_manager():
         st.session_state[COOKIE_MANAGER_KEY] = stx.CookieManager(key="project_ops_cookies")
     return st.session_state[COOKIE_MANAGER_KEY]
 
-def create_token(user: Dict[str, Any]) -> str:
+# Audiencia de los tokens de /api/auth/token: la cookie de sesión de Streamlit
+# (sin aud) no sirve como Bearer y un token de la API no restaura una sesión.
+API_TOKEN_AUDIENCE = "project-ops-api"
+
+def create_token(user: Dict[str, Any], expires_in: timedelta = timedelta(days=7),
+                 audience: Optional[str] = None) -> str:
     payload = {
         "sub": str(user["id"]),
         "email": user["email"],
         "rol_app": user["rol_app"],
         "proyectos": user.get("proyectos", []),
-        "exp": datetime.now() + timedelta(days=7)
+        # exp en UTC: PyJWT interpreta datetimes naive como UTC
+        "exp": datetime.now(timezone.utc) + expires_in
     }
+    if audience:
+        payload["aud"] = audience
     return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
 
-def decode_token(token: str) -> Optional[Dict[str, Any]]:
+def decode_token(token: str, audience: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Payload si la firma y la expiración son válidas; con audience exige ese aud."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"], audience=audience)
         return payload
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
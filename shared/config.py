@@ -18,6 +18,43 @@ class Settings:
     DB_NAME: str = os.getenv("DB_NAME", "project_ops")
     DB_USER: str = os.getenv("DB_USER", "project_ops_user")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "project_ops_pass")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_POOL_MAX_LIFETIME: int = int(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # segundos
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Pool aiomysql de los endpoints async de la API (false = consultas sync en hilos)
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "true").lower() == "true"
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "20"))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
 
+    # Caché de credenciales Basic de la API
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "60"))  # segundos, 0 = desactivada
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
+    LAST_LOGIN_MIN_INTERVAL: int = int(os.getenv("LAST_LOGIN_MIN_INTERVAL", "300"))  # segundos
+    API_TOKEN_TTL_MINUTES: int = int(os.getenv("API_TOKEN_TTL_MINUTES", "60"))
+    # /api/changes omite los eventos más nuevos que esto: un id de event_log puede
+    # hacerse visible (commit) después de otro mayor; debe superar la transacción más larga
+    CHANGES_LAG_SECONDS: int = int(os.getenv("CHANGES_LAG_SECONDS", "30"))  # segundos
+
+    # Compresión de respuestas de la API (br/zstd solo si están instalados)
+    API_COMPRESSION: bool = os.getenv("API_COMPRESSION", "true").lower() == "true"
+    API_COMPRESSION_MIN_SIZE: int = int(os.getenv("API_COMPRESSION_MIN_SIZE", "1024"))  # bytes
+    API_COMPRESSION_ENCODINGS: str = os.getenv("API_COMPRESSION_ENCODINGS", "zstd,br,gzip")  # orden de preferencia
+    API_COMPRESSION_GZIP_LEVEL: int = int(os.getenv("API_COMPRESSION_GZIP_LEVEL", "6"))
+    API_COMPRESSION_BROTLI_LEVEL: int = int(os.getenv("API_COMPRESSION_BROTLI_LEVEL", "4"))
+    API_COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("API_COMPRESSION_ZSTD_LEVEL", "3"))
+
+    # Carga masiva de SAP: filas por bloque y staging con LOAD DATA LOCAL INFILE
+    # (requiere local_infile=ON en el servidor; si no, INSERT multi-fila)
+    SAP_LOAD_CHUNK_SIZE: int = int(os.getenv("SAP_LOAD_CHUNK_SIZE", "5000"))
+    SAP_LOAD_DATA_LOCAL: bool = os.getenv("SAP_LOAD_DATA_LOCAL", "false").lower() == "true"
+
+    # Trabajos en segundo plano (tabla jobs + apps/worker.py)
+    JOBS_DIR: str = os.getenv("JOBS_DIR", "uploads/jobs")  # archivos de entrada compartidos app/worker
+    JOBS_POLL_INTERVAL: float = float(os.getenv("JOBS_POLL_INTERVAL", "2"))  # segundos, worker y UI
+    JOBS_HEARTBEAT: int = int(os.getenv("JOBS_HEARTBEAT", "15"))  # segundos
+    JOBS_STALE_AFTER: int = int(os.getenv("JOBS_STALE_AFTER", "120"))  # sin heartbeat -> se reencola
+    JOBS_MAX_INTENTOS: int = int(os.getenv("JOBS_MAX_INTENTOS", "3"))
+    # El worker reconstruye fact_costos_mes al arrancar y cada tanto (extiende el horizonte); 0 = nunca
+    FACT_COSTOS_REBUILD_INTERVAL: int = int(os.getenv("FACT_COSTOS_REBUILD_INTERVAL", "86400"))  # segundos
+
 settings = Settings()
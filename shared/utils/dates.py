@@ -1 +1,38 @@
-'''Helpers de fechas y TZ (placeholder)'''
+'''Helpers de fechas y TZ'''
+# shared/utils/dates.py
+import numpy as np
+import pandas as pd
+
+def month_bounds(fecha_inicio: pd.Series, fecha_fin: pd.Series, year: int):
+    """
+    Primer y último mes (1..12) del año `year` cubiertos por cada rango [inicio, fin].
+    fin nulo = abierto (hasta diciembre). Si el rango no toca el año, start > end.
+    Devuelve dos arrays numpy de enteros.
+    """
+    fi = pd.to_datetime(fecha_inicio, errors="coerce")
+    ff = pd.to_datetime(fecha_fin, errors="coerce")
+    fy, fm = fi.dt.year.to_numpy(dtype=float), fi.dt.month.to_numpy(dtype=float)
+    ty, tm = ff.dt.year.to_numpy(dtype=float), ff.dt.month.to_numpy(dtype=float)
+    # Inicio nulo (NaT) compara False en todo → 13 → sin meses
+    start = np.where(fy < year, 1, np.where(fy == year, fm, 13))
+    end = np.where(np.isnan(ty) | (ty > year), 12, np.where(ty == year, tm, 0))
+    return start.astype(np.int64), end.astype(np.int64)
+
+def explode_months(df: pd.DataFrame, year: int,
+                   start_col: str = "fecha_asignacion", end_col: str = "fecha_fin") -> pd.DataFrame:
+    """
+    Repite cada fila de `df` una vez por mes del año `year` que cubre su rango
+    [start_col, end_col], con operaciones por columna (sin iterrows).
+    Devuelve un DataFrame nuevo con índice 0..n-1 y columna entera 'mes'.
+    """
+    if df.empty:
+        return df.iloc[0:0].assign(mes=pd.Series(dtype="int64"))
+    start, end = month_bounds(df[start_col], df[end_col], year)
+    n = np.clip(end - start + 1, 0, None)
+    total = int(n.sum())
+    idx = np.repeat(np.arange(len(df)), n)
+    # Posición de cada fila repetida dentro de su bloque: 0, 1, 2...
+    offs = np.arange(total) - np.repeat(np.cumsum(n) - n, n)
+    out = df.iloc[idx].reset_index(drop=True)
+    out["mes"] = start[idx] + offs
+    return out
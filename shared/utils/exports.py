@@ -1,16 +1,165 @@
-'''Export CSV/XLSX (placeholder)'''
+'''Export CSV/XLSX/Parquet en streaming'''
 # shared/utils/exports.py
-import pandas as pd
-from datetime import datetime
+import csv
+import gzip
+from datetime import datetime, date
+from decimal import Decimal
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
 EXPORT_DIR = Path("project-ops-export")
 EXPORT_DIR.mkdir(exist_ok=True)
 
-def export_csv(rows: List[Dict[str, Any]], filename_prefix: str) -> str:
-    df = pd.DataFrame(rows)
+# Etiqueta en la UI -> formato
+EXPORT_FORMATS = {"CSV": "csv", "Excel (XLSX)": "xlsx", "Parquet": "parquet"}
+# Formatos en los que aplica `compress` (XLSX ya es un zip)
+COMPRESSIBLE_FORMATS = ("csv", "parquet")
+COMPRESS_HELP = "CSV: .csv.gz · Parquet: códec gzip · XLSX ya va comprimido"
+
+_BATCH = 5000
+
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _write_csv(rows: Iterator[Dict[str, Any]], fields: List[str], path: Path, compress: bool) -> None:
+    opener = gzip.open if compress else open
+    with opener(path, "wt", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _xlsx_value(v: Any) -> Any:
+    if v is None or isinstance(v, (str, int, float, Decimal, bool)):
+        return v
+    if isinstance(v, datetime):
+        return v.replace(tzinfo=None)
+    if isinstance(v, date):
+        return v
+    return str(v)
+
+
+def _write_xlsx(rows: Iterator[Dict[str, Any]], fields: List[str], path: Path) -> None:
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise RuntimeError("Exportar a XLSX requiere openpyxl (pip install openpyxl)") from e
+    # write_only: las filas se vuelcan al archivo sin mantener el libro en memoria
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("datos")
+    ws.append(fields)
+    for r in rows:
+        ws.append([_xlsx_value(r.get(k)) for k in fields])
+    wb.save(path)
+
+
+def _parquet_array(pa, values: List[Any]):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Tipos mezclados dentro del lote: la columna va como texto
+        return pa.array([None if v is None else str(v) for v in values], pa.string())
+
+
+def _parquet_widen(pa, actual, nuevo):
+    """Tipo que admite los valores de ambos (null < int < float; lo demás, texto)."""
+    if actual == nuevo or pa.types.is_null(nuevo):
+        return actual
+    if pa.types.is_null(actual):
+        return nuevo
+    numerico = lambda t: pa.types.is_integer(t) or pa.types.is_floating(t)
+    if numerico(actual) and numerico(nuevo):
+        return pa.float64()
+    return pa.string()
+
+
+def _write_parquet(rows: Iterator[Dict[str, Any]], fields: List[str], path: Path, compress: bool) -> None:
+    """
+    El esquema sale del primer lote (columnas sin valores: texto). Si un lote
+    posterior trae un tipo que no entra (p. ej. floats en una columna que venía
+    con enteros), se ensancha el esquema y se reescriben los lotes ya escritos.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow)") from e
+
+    def _norm(v: Any) -> Any:
+        # Decimal a float: evita choques de precisión entre lotes
+        return float(v) if isinstance(v, Decimal) else v
+
+    compression = "gzip" if compress else "snappy"
+
+    def _reabrir(writer, schema):
+        writer.close()
+        tmp = path.with_name(path.name + ".part")
+        path.replace(tmp)
+        try:
+            nuevo = pq.ParquetWriter(path, schema, compression=compression)
+            previo = pq.ParquetFile(tmp)
+            for i in range(previo.num_row_groups):
+                nuevo.write_table(previo.read_row_group(i).cast(schema))
+        finally:
+            tmp.unlink()
+        return nuevo
+
+    writer = None
+    try:
+        for batch in _batches(rows, _BATCH):
+            table = pa.table({k: _parquet_array(pa, [_norm(r.get(k)) for r in batch]) for k in fields})
+            if writer is None:
+                schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                    for f in table.schema])
+                writer = pq.ParquetWriter(path, schema, compression=compression)
+            else:
+                schema = pa.schema([pa.field(f.name, _parquet_widen(pa, f.type, t.type))
+                                    for f, t in zip(writer.schema, table.schema)])
+                if not schema.equals(writer.schema):
+                    writer = _reabrir(writer, schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            writer = pq.ParquetWriter(path, pa.schema([pa.field(k, pa.string()) for k in fields]))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_rows(rows: Iterable[Dict[str, Any]], filename_prefix: str, fmt: str = "csv",
+                compress: bool = False, fields: Optional[List[str]] = None) -> str:
+    """
+    Exporta filas (dicts) consumiéndolas de a una, sin materializar la lista:
+    pensado para iteradores de cursor de servidor (stream_query / iter_*).
+    fmt: 'csv' (gzip opcional), 'xlsx' (compress no aplica) o 'parquet' (compress = códec gzip).
+    Las columnas salen de `fields` o, si no se indica, de la primera fila.
+    """
+    if fmt not in EXPORT_FORMATS.values():
+        raise ValueError(f"Formato de exporte no soportado: {fmt}")
+    it = iter(rows)
+    if fields is None:
+        first = next(it, None)
+        fields = list(first.keys()) if first else []
+        if first is not None:
+            it = chain([first], it)
+
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = EXPORT_DIR / f"{filename_prefix}_{ts}.csv"
-    df.to_csv(path, index=False, encoding="utf-8-sig")
+    ext = {"csv": ".csv.gz" if compress else ".csv", "xlsx": ".xlsx", "parquet": ".parquet"}[fmt]
+    path = EXPORT_DIR / f"{filename_prefix}_{ts}{ext}"
+    if fmt == "csv":
+        _write_csv(it, fields, path, compress)
+    elif fmt == "xlsx":
+        _write_xlsx(it, fields, path)
+    else:
+        _write_parquet(it, fields, path, compress)
     return str(path)
+
+
+def export_csv(rows: Iterable[Dict[str, Any]], filename_prefix: str) -> str:
+    return export_rows(rows, filename_prefix, "csv")
@@ -0,0 +1,53 @@
+'''Estado de trabajos en segundo plano en Streamlit'''
+# shared/utils/jobs_ui.py
+from typing import Any, Callable, Dict, Optional
+
+import streamlit as st
+
+from domain.services import jobs_service
+from shared.config import settings
+
+_TERMINADOS = ("ok", "error")
+
+
+def _mostrar(job: Dict[str, Any], on_ok: Callable[[Dict[str, Any]], None]) -> None:
+    estado = job["estado"]
+    if estado == "pendiente":
+        st.info(f"⏳ Trabajo #{job['id']} en cola, esperando al worker...")
+    elif estado == "ejecutando":
+        mensaje = (job.get("progreso") or {}).get("mensaje") or "Procesando..."
+        st.info(f"⚙️ Trabajo #{job['id']}: {mensaje}")
+    elif estado == "ok":
+        on_ok(job)
+    else:
+        st.error(f"Trabajo #{job['id']} falló: {job.get('error')}")
+
+
+def job_status(state_key: str, on_ok: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+    """
+    Muestra el estado del trabajo cuyo id está en st.session_state[state_key].
+    Mientras no termina, un fragmento se refresca solo cada JOBS_POLL_INTERVAL
+    segundos (sin rerun de toda la página); al terminar hace un rerun para
+    mostrar el resultado con `on_ok(job)` y deja de consultar.
+    """
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return None
+    job = jobs_service.obtener(job_id)
+    if job is None:
+        st.session_state.pop(state_key, None)
+        return None
+
+    if job["estado"] in _TERMINADOS:
+        _mostrar(job, on_ok)
+        return job
+
+    @st.fragment(run_every=settings.JOBS_POLL_INTERVAL)
+    def _poll():
+        actual = jobs_service.obtener(job_id)
+        if actual is None or actual["estado"] in _TERMINADOS:
+            st.rerun()
+        _mostrar(actual, on_ok)
+
+    _poll()
+    return job
@@ -0,0 +1,54 @@
+# tests/unit/test_compression.py
+import zlib
+
+import pytest
+
+from apps.api.compression import _compressor, available_encodings, negotiate
+
+PREFERIDAS = ("zstd", "br", "gzip")
+
+
+@pytest.mark.parametrize("accept, esperado", [
+    ("gzip, deflate, br, zstd", "zstd"),          # manda el orden del servidor, no el del cliente
+    ("gzip, br", "br"),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("br;q=0, gzip;q=0.5", "gzip"),              # q=0 = no aceptada
+    ("zstd;q=0.1, gzip;q=1", "zstd"),            # cualquier q > 0 vale; no se reordena por q
+    ("*", "zstd"),
+    ("*;q=0.5, zstd;q=0", "br"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=abc", None),                        # q inválido = no aceptada
+    (" br ; q=0.8 ", "br"),
+])
+def test_negotiate(accept, esperado):
+    assert negotiate(accept, PREFERIDAS) == esperado
+
+
+def test_negotiate_respeta_las_disponibles():
+    assert negotiate("zstd, br, gzip", ["gzip"]) == "gzip"
+    assert negotiate("zstd", []) is None
+
+
+def test_gzip_por_tramos_se_descomprime_entero():
+    c = _compressor("gzip", {"gzip": 6})
+    partes = [b'{"id": %d}\n' % i for i in range(200)]
+    out = b"".join(c.compress(p) + c.flush() for p in partes) + c.finish()
+    assert zlib.decompress(out, 31) == b"".join(partes)
+
+
+@pytest.mark.parametrize("encoding", ["br", "zstd"])
+def test_opcionales_por_tramos(encoding):
+    if encoding not in available_encodings():
+        pytest.skip(f"{encoding} no instalado")
+    c = _compressor(encoding, {"br": 4, "zstd": 3})
+    datos = b"a,b,c\n" * 1000
+    out = c.compress(datos[:3000]) + c.flush() + c.compress(datos[3000:]) + c.finish()
+    if encoding == "br":
+        import brotli
+        assert brotli.decompress(out) == datos
+    else:
+        import zstandard
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(out) == datos
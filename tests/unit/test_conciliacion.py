@@ -0,0 +1,101 @@
+# tests/unit/test_conciliacion.py
+import pytest
+
+from domain.services import conciliacion_service
+from infra.repositories import documentos_repo, fact_costos_repo, personas_repo, proyectos_repo, sap_repo
+
+PERSONAS = [{"id": 1, "nombre": "Ana Pérez"}, {"id": 2, "nombre": "Juan Gómez"},
+            {"id": 3, "nombre": "Luis Díaz"}, {"id": 4, "nombre": "Luis Díaz"}]
+PROYECTOS = [{"id": 10, "NOMBRE": "Portal Clientes"}, {"id": 20, "NOMBRE": "Migración ERP"}]
+ANEXOS = [{"id_sap": "SAP-20", "proyecto_id": 20}]
+
+
+def _sap(mes, colaborador, horas, id_sap="X", proyecto_sap="Portal Clientes", novedad=None):
+    return {"mes": mes, "colaborador": colaborador, "id_sap": id_sap, "proyecto_sap": proyecto_sap,
+            "horas_mes": horas, "tiempo_novedad_hrs": novedad}
+
+
+def _plan(persona_id, proyecto_id, mes, horas):
+    return {"proyecto_id": proyecto_id, "persona_id": persona_id, "anio": 2026, "mes": mes,
+            "horas": horas, "costo": 0, "factura": 0}
+
+
+@pytest.fixture
+def datos(monkeypatch):
+    d = {"sap": [], "plan": []}
+    monkeypatch.setattr(sap_repo, "list_horas_anio", lambda anio: d["sap"])
+    monkeypatch.setattr(fact_costos_repo, "list_mensual", lambda anio: d["plan"])
+    monkeypatch.setattr(personas_repo, "list_personas", lambda fields=None: PERSONAS)
+    monkeypatch.setattr(proyectos_repo, "list_proyectos", lambda fields=None: PROYECTOS)
+    monkeypatch.setattr(documentos_repo, "list_id_sap_proyectos", lambda: ANEXOS)
+    return d
+
+
+def _estados(res):
+    return {(r.persona_id, r.proyecto_id, r.mes): r.estado for r in res["detalle"].itertuples()}
+
+
+def test_estados_segun_tolerancia(datos):
+    datos["plan"] = [_plan(1, 10, 1, 100), _plan(1, 10, 2, 100), _plan(1, 10, 3, 100),
+                     _plan(1, 10, 4, 100), _plan(2, 10, 1, 0)]
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 110),     # +10%: dentro de la tolerancia
+                    _sap("Febrero", "Ana Pérez", 111),   # +11%
+                    _sap("Marzo", "Ana Pérez", 89),      # -11%
+                    _sap("Enero", "Juan Gómez", 8),      # planificado 0
+                    _sap("Abril", "Ana Pérez", 0)]       # mes con reporte, sin horas
+    res = conciliacion_service._calcular(2026, 0.10)
+    assert _estados(res) == {
+        (1, 10, 1): "OK", (1, 10, 2): "Sobre plan", (1, 10, 3): "Bajo plan",
+        (1, 10, 4): "Sin reporte", (2, 10, 1): "Sin plan",
+    }
+    fila = res["detalle"].set_index(["persona_id", "mes"]).loc[(1, 2)]
+    assert fila["delta"] == pytest.approx(11.0)
+    assert fila["delta_pct"] == pytest.approx(0.11)
+
+
+def test_sin_plan_sin_delta_pct(datos):
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 5)]
+    detalle = conciliacion_service._calcular(2026, 0.10)["detalle"]
+    assert detalle["estado"].tolist() == ["Sin plan"]
+    assert detalle["delta_pct"].isna().all()
+
+
+def test_solo_meses_con_reporte(datos):
+    datos["plan"] = [_plan(1, 10, 1, 100), _plan(1, 10, 6, 100)]
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 100)]
+    res = conciliacion_service._calcular(2026, 0.10)
+    assert res["detalle"]["mes"].tolist() == [1]
+    assert res["por_mes"]["mes"].tolist() == [1]
+
+
+def test_horas_y_novedades_se_suman_por_clave(datos):
+    datos["plan"] = [_plan(1, 10, 1, 100)]
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 60, novedad="4"), _sap("Enero", "ANA PEREZ", 40, novedad=None)]
+    fila = conciliacion_service._calcular(2026, 0.10)["detalle"].iloc[0]
+    assert (fila["reportadas"], fila["novedad_hrs"], fila["estado"]) == (100.0, 4.0, "OK")
+
+
+def test_match_de_nombres(datos):
+    datos["sap"] = [_sap("Enero", "  perez ana ", 1),            # otro orden, sin tildes
+                    _sap("Enero", "Luis Díaz", 1),               # dos personas con ese nombre
+                    _sap("Enero", "Ana Pérez", 1, id_sap="SAP-20", proyecto_sap="Otro nombre")]
+    res = conciliacion_service._calcular(2026, 0.10)
+    assert sorted(zip(res["detalle"]["persona_id"], res["detalle"]["proyecto_id"])) == [(1, 10), (1, 20)]
+    sin = res["sin_match"]
+    assert sin[["colaborador", "motivo"]].values.tolist() == [["Luis Díaz", "Colaborador sin persona"]]
+
+
+def test_proyecto_sin_match(datos):
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 7, proyecto_sap="Inexistente"),
+                    _sap("Enero", "Nadie", 3, proyecto_sap="Inexistente")]
+    res = conciliacion_service._calcular(2026, 0.10)
+    assert res["detalle"].empty
+    motivos = dict(zip(res["sin_match"]["colaborador"], res["sin_match"]["motivo"]))
+    assert motivos == {"Ana Pérez": "Proyecto SAP sin proyecto", "Nadie": "Colaborador y proyecto sin match"}
+    totales = res["totales"].to_dict("records")[0]
+    assert totales["horas_sin_match"] == 10.0 and totales["colaboradores_match"] == 1
+
+
+def test_meses_invalidos_se_ignoran(datos):
+    datos["sap"] = [_sap("Enero", "Ana Pérez", 5), _sap("Enro", "Ana Pérez", 9)]
+    assert conciliacion_service._calcular(2026, 0.10)["totales"]["horas_sap"].iloc[0] == 5.0
@@ -0,0 +1,72 @@
+# tests/unit/test_dates.py
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from shared.utils.dates import explode_months, month_bounds
+
+
+def _asignaciones(*rangos):
+    return pd.DataFrame({
+        "id": range(1, len(rangos) + 1),
+        "fecha_asignacion": [r[0] for r in rangos],
+        "fecha_fin": [r[1] for r in rangos],
+    })
+
+
+def _meses(exp):
+    return {i: exp.loc[exp["id"] == i, "mes"].tolist() for i in exp["id"].unique()}
+
+
+@pytest.mark.parametrize("inicio, fin, esperado", [
+    (date(2026, 3, 15), date(2026, 5, 2), [3, 4, 5]),
+    (date(2025, 11, 1), date(2026, 2, 28), [1, 2]),       # empieza antes del año
+    (date(2026, 10, 1), date(2027, 6, 30), [10, 11, 12]),  # termina después
+    (date(2026, 12, 1), None, [12]),                       # abierta
+    (date(2024, 1, 1), None, list(range(1, 13))),
+    (date(2026, 7, 31), date(2026, 7, 1), [7]),            # mismo mes
+])
+def test_meses_del_anio(inicio, fin, esperado):
+    exp = explode_months(_asignaciones((inicio, fin)), 2026)
+    assert exp["mes"].tolist() == esperado
+
+
+@pytest.mark.parametrize("inicio, fin", [
+    (date(2025, 1, 1), date(2025, 12, 31)),   # antes del año
+    (date(2027, 1, 1), None),                 # después
+    (None, date(2026, 6, 1)),                 # sin inicio
+    (date(2026, 5, 1), date(2026, 3, 1)),     # fin antes del inicio
+])
+def test_rangos_sin_meses(inicio, fin):
+    assert explode_months(_asignaciones((inicio, fin)), 2026).empty
+
+
+def test_conserva_columnas_y_reindexa():
+    df = _asignaciones((date(2026, 1, 1), date(2026, 2, 1)), (date(2025, 1, 1), date(2025, 2, 1)),
+                       (date(2026, 11, 1), None))
+    df["horas"] = [10.0, 20.0, 30.0]
+    df.index = [7, 8, 9]
+    exp = explode_months(df, 2026)
+    assert _meses(exp) == {1: [1, 2], 3: [11, 12]}
+    assert exp["horas"].tolist() == [10.0, 10.0, 30.0, 30.0]
+    assert exp.index.tolist() == [0, 1, 2, 3]
+    assert str(exp["mes"].dtype) == "int64"
+    assert "mes" not in df.columns
+
+
+def test_columnas_propias():
+    df = pd.DataFrame({"desde": [pd.Timestamp("2026-04-10")], "hasta": [pd.Timestamp("2026-06-01")]})
+    assert explode_months(df, 2026, "desde", "hasta")["mes"].tolist() == [4, 5, 6]
+
+
+def test_vacio():
+    exp = explode_months(_asignaciones(), 2026)
+    assert exp.empty and "mes" in exp.columns
+
+
+def test_month_bounds():
+    start, end = month_bounds(pd.Series([date(2025, 6, 1), date(2026, 2, 1), None]),
+                              pd.Series([date(2026, 3, 1), None, None]), 2026)
+    assert start.tolist() == [1, 2, 13]
+    assert end.tolist() == [3, 12, 12]
@@ -0,0 +1,70 @@
+# tests/unit/test_paging.py
+import pytest
+
+from infra.db.paging import MAX_PAGE_SIZE, in_clause, keyset, select_clause
+
+CAMPOS = {"id": "p.id", "nombre": "p.nombre", "lider": "per.nombre"}
+
+
+def test_select_clause_sin_fields():
+    assert select_clause(CAMPOS, None, "SELECT p.*") == "SELECT p.*"
+    assert select_clause(CAMPOS, [], "SELECT p.*") == "SELECT p.*"
+
+
+def test_select_clause_siempre_incluye_id_sin_repetir():
+    assert select_clause(CAMPOS, ["lider", "nombre", "lider"], "") == \
+        "SELECT p.id AS `id`, per.nombre AS `lider`, p.nombre AS `nombre`"
+    assert select_clause(CAMPOS, ["nombre", "id"], "") == "SELECT p.id AS `id`, p.nombre AS `nombre`"
+
+
+def test_select_clause_campo_desconocido():
+    with pytest.raises(ValueError, match="Campos no válidos: x, p.id"):
+        select_clause(CAMPOS, ["nombre", "x", "p.id"], "")
+
+
+def test_keyset_sin_paginar_conserva_el_orden():
+    sql, params = keyset("SELECT * FROM t", [], [], "t.id", "t.nombre")
+    assert (sql, params) == ("SELECT * FROM t ORDER BY t.nombre", [])
+
+
+def test_keyset_con_after_y_limit():
+    sql, params = keyset("SELECT * FROM t", ["t.activo=%s"], [1], "t.id", "t.nombre", after=40, limit=20)
+    assert sql == "SELECT * FROM t WHERE t.activo=%s AND t.id > %s ORDER BY t.id ASC LIMIT %s"
+    assert params == [1, 40, 20]
+
+
+def test_keyset_solo_limit_ordena_por_id():
+    sql, params = keyset("SELECT * FROM t", [], [], "id", "nombre", limit=10)
+    assert sql == "SELECT * FROM t ORDER BY id ASC LIMIT %s" and params == [10]
+
+
+def test_keyset_after_cero_pagina():
+    sql, params = keyset("SELECT * FROM t", [], [], "id", "nombre", after=0)
+    assert sql == "SELECT * FROM t WHERE id > %s ORDER BY id ASC" and params == [0]
+
+
+@pytest.mark.parametrize("limit, efectivo", [(0, 1), (-5, 1), (MAX_PAGE_SIZE + 1, MAX_PAGE_SIZE), ("7", 7)])
+def test_keyset_acota_limit(limit, efectivo):
+    assert keyset("SELECT 1", [], [], "id", "id", limit=limit)[1] == [efectivo]
+
+
+def test_keyset_no_modifica_las_listas_recibidas():
+    where, params = ["a=%s"], [1]
+    keyset("SELECT 1", where, params, "id", "id", after=3, limit=2)
+    assert where == ["a=%s"] and params == [1]
+
+
+def test_in_clause():
+    assert in_clause("a.id", [3, 1, 2]) == ("a.id IN (%s,%s,%s)", [3, 1, 2])
+    assert in_clause("id", (5,)) == ("id IN (%s)", [5])
+
+
+def test_in_clause_vacio_no_devuelve_filas():
+    assert in_clause("id", []) == ("1=0", [])
+
+
+def test_in_clause_con_keyset():
+    cond, params = in_clause("s.proyecto_id", [7, 8])
+    sql, params = keyset("SELECT * FROM sprints s", [cond], params, "s.id", "s.id", limit=50)
+    assert sql == "SELECT * FROM sprints s WHERE s.proyecto_id IN (%s,%s) ORDER BY s.id ASC LIMIT %s"
+    assert params == [7, 8, 50]
@@ -0,0 +1,130 @@
+# tests/unit/test_sap_parser.py
+import io
+
+import pandas as pd
+import pytest
+
+from domain.services.sap_service import iter_csv_frames, parse_csv_frame, parse_csv_rows
+from infra.repositories import sap_repo
+
+ENCABEZADO = ("NRO,ID EMPLEADO SAP,COLABORADORES,ID SAP,PROYECTO SAP,HORAS MES,MES,"
+              "TIPO NOVEDAD,TIEMPO NOVEDAD (HRS),REPORTE SAP")
+
+
+def _fila(**campos):
+    base = {"NRO": "1", "ID EMPLEADO SAP": "E1", "COLABORADORES": "Ana Pérez", "ID SAP": "P-01",
+            "PROYECTO SAP": "Proyecto Uno", "HORAS MES": "160", "MES": "Enero",
+            "TIPO NOVEDAD": "", "TIEMPO NOVEDAD (HRS)": "", "REPORTE SAP": "TRUE"}
+    base.update(campos)
+    return base
+
+
+def _parse(*filas, anio=2026):
+    return parse_csv_rows(list(filas), anio=anio)
+
+
+def test_fila_valida():
+    filas, errores = _parse(_fila())
+    assert errores == []
+    assert filas == [{
+        "nro": 1, "id_empleado_sap": "E1", "colaborador": "Ana Pérez", "id_sap": "P-01",
+        "proyecto_sap": "Proyecto Uno", "horas_mes": 160.0, "mes": "Enero", "anio": 2026,
+        "tipo_novedad": None, "tiempo_novedad_hrs": None, "reporte_sap": 1,
+    }]
+
+
+def test_nro_debe_ser_entero():
+    filas, errores = _parse(_fila(NRO="1.5"), _fila(NRO="abc"), _fila(NRO=""))
+    assert [e["linea"] for e in errores] == [2, 3]
+    assert all(e["motivo"].startswith("NRO no entero") for e in errores)
+    assert filas[0]["nro"] is None
+
+
+@pytest.mark.parametrize("texto, valor", [("12,5", 12.5), ("12.5", 12.5), (" 8 ", 8.0), ("", 0.0)])
+def test_horas_con_coma_o_punto(texto, valor):
+    filas, errores = _parse(_fila(**{"HORAS MES": texto}))
+    assert errores == []
+    assert filas[0]["horas_mes"] == valor
+
+
+@pytest.mark.parametrize("texto, motivo", [("doce", "HORAS MES no numérico"), ("-3", "HORAS MES negativo"),
+                                           ("1.2.3", "HORAS MES no numérico")])
+def test_horas_invalidas(texto, motivo):
+    filas, errores = _parse(_fila(**{"HORAS MES": texto}))
+    assert filas == []
+    assert errores[0]["motivo"] == f"{motivo}: '{texto}'"
+
+
+def test_tiempo_novedad():
+    filas, errores = _parse(_fila(**{"TIEMPO NOVEDAD (HRS)": "4,25"}), _fila(**{"TIEMPO NOVEDAD (HRS)": "x"}))
+    assert filas[0]["tiempo_novedad_hrs"] == 4.25
+    assert errores[0]["motivo"] == "TIEMPO NOVEDAD (HRS) no numérico: 'x'"
+
+
+@pytest.mark.parametrize("texto, valor", [("SI", 1), ("sí", 1), ("1", 1), ("Verdadero", 1), ("", 1),
+                                          ("NO", 0), ("0", 0), ("false", 0), ("Falso", 0)])
+def test_reporte_sap(texto, valor):
+    filas, errores = _parse(_fila(**{"REPORTE SAP": texto}))
+    assert errores == []
+    assert filas[0]["reporte_sap"] == valor
+    assert type(filas[0]["reporte_sap"]) is int  # LOAD DATA escribiría "True"/"False"
+
+
+def test_reporte_sap_invalido():
+    filas, errores = _parse(_fila(**{"REPORTE SAP": "quizás"}))
+    assert filas == []
+    assert errores[0]["motivo"] == "REPORTE SAP inválido: 'quizás'"
+
+
+@pytest.mark.parametrize("texto", ["enero", "ENERO", " Enero "])
+def test_mes_normalizado(texto):
+    filas, errores = _parse(_fila(MES=texto))
+    assert errores == []
+    assert filas[0]["mes"] == "Enero"
+
+
+def test_mes_invalido():
+    _, errores = _parse(_fila(MES="Enro"))
+    assert errores[0]["motivo"] == "MES inválido: 'Enro'"
+
+
+def test_obligatorias_y_largos():
+    _, errores = _parse(_fila(COLABORADORES="", **{"ID SAP": "X" * 51}))
+    assert errores[0]["motivo"] == "COLABORADORES vacío; ID SAP supera 50 caracteres"
+    assert errores[0]["valores"]["ID SAP"] == "X" * 51
+
+
+def test_varios_motivos_en_una_fila():
+    _, errores = _parse(_fila(NRO="a", MES="", **{"HORAS MES": "x"}))
+    assert errores[0]["motivo"] == "HORAS MES no numérico: 'x'; NRO no entero: 'a'; MES inválido: ''"
+
+
+def test_encabezados_sin_distinguir_mayusculas():
+    df = pd.DataFrame([_fila()]).rename(columns=lambda c: f" {c.lower()} ")
+    filas, errores = parse_csv_frame(df)
+    assert errores == [] and filas[0]["colaborador"] == "Ana Pérez"
+
+
+def test_tuplas_en_orden_de_columnas():
+    filas, _ = parse_csv_frame(pd.DataFrame([_fila()]), anio=2025, tuplas=True)
+    assert dict(zip(sap_repo.COLUMNAS, filas[0]))["anio"] == 2025
+    assert dict(zip(sap_repo.COLUMNAS, filas[0]))["colaborador"] == "Ana Pérez"
+
+
+def test_lineas_continuan_entre_bloques():
+    lineas = [ENCABEZADO] + [f"{i},E{i},Persona {i},P-01,Proyecto,{'x' if i % 2 else '10'},Enero,,,SI"
+                             for i in range(1, 6)]
+    f = io.StringIO("\n".join(lineas) + "\n")
+    validas, errores = [], []
+    for df in iter_csv_frames(f, chunk_size=2):
+        filas, malas = parse_csv_frame(df)
+        validas += filas
+        errores += malas
+    # Encabezado = línea 1: NRO i está en la línea i + 1
+    assert [e["linea"] for e in errores] == [2, 4, 6]
+    assert [e["valores"]["NRO"] for e in errores] == ["1", "3", "5"]
+    assert [f["nro"] for f in validas] == [2, 4]
+
+
+def test_csv_vacio():
+    assert list(iter_csv_frames(io.StringIO(""))) == []